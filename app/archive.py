@@ -0,0 +1,113 @@
+# app/archive.py
+"""
+A módosítás-napló archiválása.
+
+A Modositas tábla minden admin módosítással nő, pedig a friss napló csak a
+legutóbbi hetekről szól. Az `archive` a megadott kornál régebbi sorokat
+kötegenként átmozgatja a ModositasArchiv táblába (azonos azonosítóval), egy
+kötegen belül egy tranzakcióban: INSERT ... SELECT, majd DELETE. Így a
+Modositas kicsi marad, a napló lapozása és indexei gyorsak.
+
+Egy bejelentés teljes története a `history` függvénnyel kérhető le, amely
+mindkét táblát olvassa (bejelentesID indexen). Mivel mindig a legrégebbi
+sorok kerülnek át, az archív sorok időben a frissek előtt vannak; az
+`all_rows` ezért előbb az archívumot, aztán a friss táblát adja vissza.
+
+MODOSITAS_ARCHIVE_DAYS (alapértelmezés 180): ennél régebbi sorok kerülnek át.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, literal, select, union_all
+
+from app.models import Modositas, ModositasArchiv
+
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get("MODOSITAS_ARCHIVE_DAYS", "180"))
+BATCH_SIZE = 5000
+
+COLUMNS = ("modositasiID", "bejelentesID", "adminID", "datum_ido", "mezo", "regi_ertek", "uj_ertek")
+
+
+def cutoff(days: int | None = None, now: datetime | None = None) -> datetime:
+    days = ARCHIVE_AFTER_DAYS if days is None else days
+    return (now or datetime.utcnow()) - timedelta(days=days)
+
+
+def _columns(model):
+    return [getattr(model, name) for name in COLUMNS]
+
+
+def archive(db, before: datetime, batch_size: int = BATCH_SIZE, log=None) -> int:
+    """
+    A `before`-nél régebbi Modositas sorok átmozgatása; visszaadja a darabszámot.
+    Kötegenként commitol, így megszakítva is konzisztens, és újra futtatható.
+    """
+    moved = 0
+    while True:
+        # a legrégebbi sorok, az (datum_ido, modositasiID) indexen
+        ids = db.execute(
+            select(Modositas.modositasiID)
+            .where(Modositas.datum_ido < before)
+            .order_by(Modositas.datum_ido, Modositas.modositasiID)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return moved
+
+        db.execute(
+            insert(ModositasArchiv).from_select(
+                list(COLUMNS),
+                select(*_columns(Modositas)).where(Modositas.modositasiID.in_(ids)),
+            )
+        )
+        db.execute(delete(Modositas).where(Modositas.modositasiID.in_(ids)))
+        db.commit()
+
+        moved += len(ids)
+        if log:
+            log(moved)
+
+
+def status(db) -> dict:
+    def summary(model):
+        n, oldest, newest = db.execute(
+            select(func.count(), func.min(model.datum_ido), func.max(model.datum_ido))
+        ).one()
+        fmt = lambda v: v.isoformat(sep=" ", timespec="seconds") if v else None  # noqa: E731
+        return {"sorok": n, "legregebbi": fmt(oldest), "legujabb": fmt(newest)}
+
+    return {
+        "friss": summary(Modositas),
+        "archiv": summary(ModositasArchiv),
+        "archivalas_napok": ARCHIVE_AFTER_DAYS,
+    }
+
+
+def history(db, bejelentes_id: int) -> list:
+    """Egy bejelentés összes módosítása (friss + archív), időrendben."""
+    parts = [
+        select(*_columns(model), literal(archiv).label("archiv"))
+        .where(model.bejelentesID == bejelentes_id)
+        for model, archiv in ((ModositasArchiv, True), (Modositas, False))
+    ]
+    u = union_all(*parts).subquery()
+    return db.execute(
+        select(u).order_by(u.c.datum_ido, u.c.modositasiID)
+    ).all()
+
+
+def all_rows(stream, where_for):
+    """
+    Az archív, majd a friss sorok egy (stream, where_for) párral:
+    `where_for(model)` a szűrőfeltételek listája, `stream(stmt)` futtatja.
+    """
+    for model in (ModositasArchiv, Modositas):
+        stmt = (
+            select(*_columns(model))
+            .where(*where_for(model))
+            .order_by(model.datum_ido, model.modositasiID)
+        )
+        yield from stream(stmt)
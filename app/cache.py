@@ -0,0 +1,243 @@
+# app/cache.py
+"""
+Válasz-cache a nyilvános JSON listákhoz, ETag / 304 támogatással.
+
+Minden cache-elt válasz egy verziószámhoz kötött ("bejelentes"). Amikor egy
+bejelentést létrehozó / módosító tranzakció commitol, a verzió nő, és a
+régi bejegyzések ettől kezdve érvénytelenek – minden workerben, mert a
+számláló közös:
+
+- RESPONSE_CACHE=shm (alapértelmezett): egy mmap-elt 8 bájtos fájl; olvasása
+  egy memóriaolvasás, a gunicorn workerek (egy gépen) osztoznak rajta
+- RESPONSE_CACHE=db: a CacheVerzio tábla egy sora; több gépes telepítéshez,
+  kérésenként egy elsődleges kulcsos SELECT a teljes lista-lekérdezés helyett
+- RESPONSE_CACHE=off: nincs cache
+
+A válasz törzse workerenként egy LRU-ban van; az ETag a törzs hash-e, így
+a kliens If-None-Match kérésére 304-et adunk törzs nélkül. A tömörített
+(gzip / br, app/serialize.py) változat a bejegyzés mellett tárolódik, saját
+ETag-gel, így a tömörítés bejegyzésenként egyszer fut.
+
+Olvasási replikáról (app/replica.py) készült választ egy verzióváltás után
+REPLICA_MAX_LAG_S-ig nem tárolunk: a replika ekkor még a régi állapotot
+adhatja, és az az új verzió alatt ragadna a cache-ben.
+"""
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, g, request
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app import replica, serialize
+from app.database import get_engine, local_state_path
+from app.models import CacheVerzio
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+MODE = os.environ.get("RESPONSE_CACHE", "shm")
+MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_ENTRIES", "1024"))
+
+BEJELENTES = "bejelentes"
+# a változásnapló (app/changefeed.py) számlálója; nincs hozzá cache-elt válasz
+VALTOZAS = "valtozas"
+
+
+class MmapCounter:
+    """Folyamatok közötti számlálók egy mmap-elt fájlban (névenként 8 bájt)."""
+
+    SLOTS = (BEJELENTES, VALTOZAS)
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+        self._mm = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _map(self):
+        # fork után újranyitjuk, hogy ne örököljünk fájlleírót a mastertől
+        if self._mm is None or self._pid != os.getpid():
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            size = 8 * len(self.SLOTS)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._fd = fd
+            self._mm = mmap.mmap(fd, size)
+            self._pid = os.getpid()
+        return self._mm
+
+    def get(self, name: str) -> int:
+        return struct.unpack_from("<Q", self._map(), 8 * self.SLOTS.index(name))[0]
+
+    def bump(self, name: str) -> None:
+        mm = self._map()
+        offset = 8 * self.SLOTS.index(name)
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                v = struct.unpack_from("<Q", mm, offset)[0]
+                struct.pack_into("<Q", mm, offset, v + 1)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+class DbCounter:
+    """Verziószámok a CacheVerzio táblában."""
+
+    def get(self, name: str) -> int:
+        with get_engine().connect() as conn:
+            v = conn.execute(
+                select(CacheVerzio.verzio).where(CacheVerzio.nev == name)
+            ).scalar()
+        return v or 0
+
+    def bump_in(self, db, name: str) -> None:
+        """A hívó tranzakciójában növel, így pontosan a commitkor lesz látható."""
+        n = (
+            db.query(CacheVerzio)
+            .filter(CacheVerzio.nev == name)
+            .update({CacheVerzio.verzio: CacheVerzio.verzio + 1}, synchronize_session=False)
+        )
+        if not n:
+            db.add(CacheVerzio(nev=name, verzio=1))
+
+
+if MODE == "db":
+    _counter = DbCounter()
+elif MODE == "shm":
+    _counter = MmapCounter(
+        os.environ.get("RESPONSE_CACHE_FILE") or local_state_path("cache-version")
+    )
+else:
+    _counter = None
+
+_entries: OrderedDict = OrderedDict()
+_entries_lock = threading.Lock()
+# név -> (verzió, mikor láttuk először ebben a workerben)
+_first_seen: dict[str, tuple[int, float]] = {}
+# session.info kulcs: a commitkor növelendő verziók nevei (shm mód)
+_PENDING = "cache_invalidate"
+
+
+def current_version(name: str = BEJELENTES) -> int:
+    return _counter.get(name) if _counter is not None else 0
+
+
+def invalidate(db, name: str = BEJELENTES) -> None:
+    """
+    A db.commit() ELŐTT hívandó. A verzió pontosan akkor nő, amikor a
+    tranzakció sikeresen commitol (rollbacknél nem).
+    """
+    if _counter is None:
+        return
+    if isinstance(_counter, DbCounter):
+        _counter.bump_in(db, name)
+        return
+
+    # a session tranzakciójához kötve: egy rollback után a következő
+    # tranzakció commitja már nem növel
+    db.info.setdefault(_PENDING, set()).add(name)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_pending(session) -> None:
+    # egy savepoint (begin_nested) commitja még nem a végleges commit
+    if session.in_nested_transaction():
+        return
+    for name in session.info.pop(_PENDING, ()):
+        _counter.bump(name)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_pending(session, transaction) -> None:
+    # a külső tranzakció vége commit nélkül (rollback, close)
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+
+def _settled(name: str, version: int) -> bool:
+    """Eltelt-e REPLICA_MAX_LAG_S a verzió első észlelése óta."""
+    now = time.monotonic()
+    seen = _first_seen.get(name)
+    if seen is None or seen[0] != version:
+        seen = _first_seen[name] = (version, now)
+    return now - seen[1] >= replica.MAX_LAG_S
+
+
+def _not_modified(etag: str) -> bool:
+    return request.if_none_match.contains(etag) if request.if_none_match else False
+
+
+def _respond(entry) -> Response:
+    etag, body, mimetype, encoded = entry
+    # tömörített változat: saját ETag, a tömörítés bejegyzésenként egyszer fut
+    encoding = serialize.negotiate(len(body))
+    if encoding is not None:
+        etag = f"{etag}-{encoding}"
+    if _not_modified(etag):
+        resp = Response(status=304)
+    else:
+        if encoding is not None:
+            if encoding not in encoded:
+                encoded[encoding] = serialize.compress(body, encoding)
+            body = encoded[encoding]
+        resp = Response(body, mimetype=mimetype)
+    serialize.set_encoding(resp, encoding if resp.status_code == 200 else None)
+    resp.set_etag(etag)
+    # a böngésző tárolhatja, de minden használat előtt újraellenőrzi
+    resp.headers["Cache-Control"] = "public, no-cache"
+    return resp
+
+
+def cached_json(name: str = BEJELENTES):
+    """
+    GET JSON végpontok cache-elése a teljes query string szerint.
+    Csak a 200-as válaszokat tároljuk.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _counter is None:
+                return fn(*args, **kwargs)
+
+            version = current_version(name)
+            key = (request.endpoint, tuple(sorted(request.args.items(multi=True))))
+
+            with _entries_lock:
+                hit = _entries.get(key)
+                if hit and hit[0] == version:
+                    _entries.move_to_end(key)
+                    return _respond(hit[1])
+
+            rv = fn(*args, **kwargs)
+            resp = rv if isinstance(rv, Response) else None
+            if resp is None or resp.status_code != 200:
+                return rv
+
+            body = resp.get_data()
+            entry = (hashlib.sha256(body).hexdigest()[:32], body, resp.mimetype, {})
+            if g.get("db_replica") and not _settled(name, version):
+                return _respond(entry)
+            with _entries_lock:
+                _entries[key] = (version, entry)
+                _entries.move_to_end(key)
+                while len(_entries) > MAX_ENTRIES:
+                    _entries.popitem(last=False)
+            return _respond(entry)
+        return wrapper
+    return decorator
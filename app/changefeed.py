@@ -0,0 +1,218 @@
+# app/changefeed.py
+"""
+Változásfolyam (change feed) a dashboard élő frissítéséhez.
+
+Minden tranzakció, amely bejelentést hoz létre vagy módosít, a Valtozas
+táblába is ír egy sort (`record`). A kliens egy átlátszatlan cursort kap
+(az utolsó látott valtozasID és modositasiID), és csak az azóta változott
+bejelentéseket / új módosításokat kéri le – a költség a változások
+számával arányos, nem azzal, hogy milyen gyakran kérdez.
+
+Az autoincrement azonosítók nem feltétlenül commit-sorrendben válnak
+láthatóvá (két párhuzamos tranzakció). Ezért a cursor nem lép át egy
+hiányzó azonosítót, amíg az utána következő sor GAP_WAIT_S-nál frissebb:
+addig a hiányzó sor még commitolhat. (Rollback után a hiány végleges,
+azt a várakozási idő után átlépjük.)
+
+Az SSE folyam (`stream`) csak akkor kérdezi az adatbázist, ha a közös
+"valtozas" számláló (app/cache.py) nőtt; RESPONSE_CACHE=off esetén
+NO_COUNTER_POLL_S-enként kérdez.
+
+Egy nyitott folyam a kérést kiszolgáló szálat a folyam végéig foglalja.
+Szinkron gunicorn workerben ez az egész worker: minden nyitott dashboard
+fül lefog egyet, és a gunicorn `timeout` (30 s) után a master megöli a
+folyamot. Ezért a gunicorn.conf.py alapból gthread workert állít be, és az
+SSE alapértelmezésben csak szálas / aszinkron workerben él (a worker
+indulásakor a `configure_sse` dönt); szinkron workerben a dashboard
+pollol.
+
+Beállítások:
+- VALTOZAS_SSE=auto (alapértelmezett): gunicorn alatt csak nem szinkron
+  workerben, gunicorn nélkül (fejlesztői szerver) mindig
+- VALTOZAS_SSE=on / off: mindig / soha; off esetén a dashboard
+  VALTOZAS_POLL_S-enként kérdez
+- VALTOZAS_SSE_MAX_S (300): ennyi után a folyam lezárul, a böngésző
+  újracsatlakozik
+- VALTOZAS_MEGORZES_NAP (7): a régebbi Valtozas sorokat a
+  tools/archive_audit_log.py törli
+"""
+from __future__ import annotations
+
+import base64
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+from app import cache
+from app.database import SessionLocal
+from app.models import Modositas, Valtozas
+
+
+SSE_MODE = os.environ.get("VALTOZAS_SSE", "auto")
+# gunicorn alatt (a gunicorn.conf.py beírja a mester pid-jét) a worker
+# indulásakor a configure_sse kapcsolja be
+SSE_ENABLED = SSE_MODE == "on" or (SSE_MODE == "auto" and "ZOLD_GUNICORN_MASTER" not in os.environ)
+SSE_MAX_S = float(os.environ.get("VALTOZAS_SSE_MAX_S", "300"))
+POLL_S = float(os.environ.get("VALTOZAS_POLL_S", "10"))
+RETENTION_DAYS = int(os.environ.get("VALTOZAS_MEGORZES_NAP", "7"))
+
+GAP_WAIT_S = 5.0
+STREAM_TICK_S = 0.5
+NO_COUNTER_POLL_S = 2.0
+HEARTBEAT_S = 15.0
+LIMIT = 500
+
+
+def configure_sse(threaded: bool) -> None:
+    """gunicorn post_worker_init: VALTOZAS_SSE=auto mellett SSE csak szálas / aszinkron workerben."""
+    global SSE_ENABLED
+    if SSE_MODE == "auto":
+        SSE_ENABLED = threaded
+
+
+# ---- írás ----
+
+def record(db, ids) -> None:
+    """A db.commit() ELŐTT hívandó, a módosítással azonos tranzakcióban."""
+    ids = sorted(set(ids))
+    if not ids:
+        return
+    now = datetime.utcnow()
+    db.execute(insert(Valtozas), [{"bejelentesID": i, "datum_ido": now} for i in ids])
+    cache.invalidate(db, cache.VALTOZAS)
+
+
+def prune(db, before: datetime | None = None) -> int:
+    """A `before` (alapértelmezés: RETENTION_DAYS napja) előtti sorok törlése."""
+    before = before or datetime.utcnow() - timedelta(days=RETENTION_DAYS)
+    n = db.execute(delete(Valtozas).where(Valtozas.datum_ido < before)).rowcount
+    db.commit()
+    return n
+
+
+# ---- cursor ----
+
+def encode_cursor(valtozas_id: int, modositas_id: int) -> str:
+    raw = json.dumps([int(valtozas_id), int(modositas_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[int, int]:
+    """ValueError-t dob, ha a token sérült vagy nem tőlünk származik."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        valtozas_id, modositas_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return int(valtozas_id), int(modositas_id)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+
+def head(db) -> str:
+    """A jelenlegi vég: az ettől kért változások a hívás utániak."""
+    return encode_cursor(
+        db.scalar(select(func.max(Valtozas.valtozasID))) or 0,
+        db.scalar(select(func.max(Modositas.modositasiID))) or 0,
+    )
+
+
+# ---- olvasás ----
+
+def _advance(rows, last: int, now: datetime) -> tuple[list, int, bool]:
+    """
+    A `last` utáni sorok, legfeljebb az első még friss hiányig.
+    Visszatérés: (sorok, új last, van-e még hátra).
+    """
+    out = []
+    for row in rows:
+        row_id, datum_ido = row[0], row[-1]
+        if row_id != last + 1 and (now - datum_ido).total_seconds() < GAP_WAIT_S:
+            return out, last, True
+        out.append(row)
+        last = row_id
+    return out, last, len(rows) >= LIMIT
+
+
+def fetch(db, cursor: str) -> dict:
+    """
+    A cursor óta commitolt változások:
+    {"cursor", "bejelentesIDk", "modositasok", "tobb", "ujratoltes"}.
+    "ujratoltes": a cursor régebbi a megőrzött naplónál, a kliens töltsön újra.
+    ValueError: hibás cursor.
+    """
+    valtozas_id, modositas_id = decode_cursor(cursor)
+    now = datetime.utcnow()
+
+    oldest = db.scalar(select(func.min(Valtozas.valtozasID)))
+    if oldest is not None and oldest > valtozas_id + 1 and valtozas_id > 0:
+        return {"cursor": head(db), "bejelentesIDk": [], "modositasok": [], "tobb": False, "ujratoltes": True}
+
+    v_rows = db.execute(
+        select(Valtozas.valtozasID, Valtozas.bejelentesID, Valtozas.datum_ido)
+        .where(Valtozas.valtozasID > valtozas_id)
+        .order_by(Valtozas.valtozasID)
+        .limit(LIMIT)
+    ).all()
+    v_rows, valtozas_id, v_more = _advance(v_rows, valtozas_id, now)
+
+    m_rows = db.execute(
+        select(
+            Modositas.modositasiID, Modositas.bejelentesID, Modositas.adminID, Modositas.mezo,
+            Modositas.regi_ertek, Modositas.uj_ertek, Modositas.datum_ido,
+        )
+        .where(Modositas.modositasiID > modositas_id)
+        .order_by(Modositas.modositasiID)
+        .limit(LIMIT)
+    ).all()
+    m_rows, modositas_id, m_more = _advance(m_rows, modositas_id, now)
+
+    return {
+        "cursor": encode_cursor(valtozas_id, modositas_id),
+        "bejelentesIDk": sorted({r.bejelentesID for r in v_rows}),
+        "modositasok": m_rows,
+        "tobb": v_more or m_more,
+        "ujratoltes": False,
+    }
+
+
+def stream(cursor: str, render):
+    """
+    SSE események: `render(db, valtozasok) -> dict` állítja elő az esemény
+    adatát. Az esemény azonosítója a cursor, így újracsatlakozáskor a böngésző
+    Last-Event-ID fejléce onnan folytatja.
+    """
+    started = time.monotonic()
+    last_beat = last_poll = started
+    seen_version = None
+    pending = True
+    yield "retry: 3000\n\n"
+    while time.monotonic() - started < SSE_MAX_S:
+        if cache.MODE in ("shm", "db"):
+            version = cache.current_version(cache.VALTOZAS)
+            changed = version != seen_version
+        else:
+            version = None
+            changed = time.monotonic() - last_poll >= NO_COUNTER_POLL_S
+        if pending or changed:
+            seen_version = version
+            last_poll = time.monotonic()
+            db = SessionLocal()
+            try:
+                valtozasok = fetch(db, cursor)
+                if valtozasok["bejelentesIDk"] or valtozasok["modositasok"] or valtozasok["ujratoltes"]:
+                    payload = render(db, valtozasok)
+                    cursor = valtozasok["cursor"]
+                    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+                    yield f"id: {cursor}\nevent: valtozas\ndata: {data}\n\n"
+                    last_beat = time.monotonic()
+                    if valtozasok["ujratoltes"]:
+                        return
+                pending = valtozasok["tobb"]
+            finally:
+                db.close()
+        if time.monotonic() - last_beat >= HEARTBEAT_S:
+            yield ": ping\n\n"
+            last_beat = time.monotonic()
+        time.sleep(STREAM_TICK_S)
@@ -0,0 +1,250 @@
+# app/clustering.py
+"""
+Szerveroldali marker-klaszterezés a térképhez.
+
+A látható területet Web Mercator csempékre (z/x/y, mint a Google Maps)
+bontjuk. Csempénként az adatbázis geohash prefix szerint csoportosít
+(GROUP BY, a geohash index mellett), majd a csoportokat egy
+CLUSTER_GRID x CLUSTER_GRID rácsba vonjuk össze – így egy csempe legfeljebb
+CLUSTER_GRID² klasztert ad, bármennyi bejelentés van alatta.
+Nagy nagyításon (POINT_ZOOM-tól) egyedi pontokat adunk vissza.
+
+A csempék eredményét folyamaton belül cache-eljük (TTL + LRU), a kulcsban
+a közös "bejelentes" verzióval (app/cache.py): egy új bejelentés / módosítás
+commitja – bármelyik workerben, az importerben vagy a geokódolóban – minden
+worker csempéit érvényteleníti. RESPONSE_CACHE=off mellett csak a TTL
+érvényes.
+
+Egy válasz legfeljebb MAX_OBJECTS klasztert + pontot tartalmaz: ha a
+pontos csempék együtt ennél többet adnának, a legtöbb pontot tartalmazó
+csempék klaszterként mennek, és ha ez sem elég, a legtöbb klasztert adó
+csempék a durvább COARSE_GRID rácson. A csempék félig nyitottak (south <= lat <
+north, west <= lng < east), így a határon fekvő pont csak egyszer számít.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import and_, func, literal_column
+
+from app import cache, geo
+from app.models import Bejelentes
+
+
+MIN_ZOOM = 0
+MAX_ZOOM = 21
+POINT_ZOOM = 17              # innentől egyedi pontok
+MAX_POINTS_PER_TILE = 200    # ennél több pontnál egy csempén mégis klaszter
+CLUSTER_GRID = 4             # csempénként legfeljebb 4x4 klaszter
+COARSE_GRID = 2              # túl sok objektumnál csempénként 2x2 klaszter
+MAX_TILES = 64               # egy kérésben legfeljebb ennyi csempe
+MAX_OBJECTS = 300            # klaszter + pont egy válaszban (>= MAX_TILES * COARSE_GRID²)
+
+CACHE_TTL_S = 60.0
+CACHE_MAX_TILES = 5000
+
+_cache: OrderedDict = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# ---- csempe matek (Web Mercator) ----
+
+def _lat_to_tile_y(lat: float, n: int) -> int:
+    lat = max(-85.05112878, min(85.05112878, lat))
+    r = math.radians(lat)
+    y = (1.0 - math.asinh(math.tan(r)) / math.pi) / 2.0 * n
+    return max(0, min(n - 1, int(y)))
+
+
+def _lng_to_tile_x(lng: float, n: int) -> int:
+    x = (lng + 180.0) / 360.0 * n
+    return max(0, min(n - 1, int(x)))
+
+
+def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """(south, west, north, east)"""
+    n = 1 << z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return south, west, north, east
+
+
+def tiles_for_bbox(south: float, west: float, north: float, east: float, z: int, max_tiles: int = MAX_TILES):
+    """ValueError, ha a terület több mint max_tiles csempe (a listát meg sem építjük)."""
+    n = 1 << z
+    y0 = _lat_to_tile_y(north, n)
+    y1 = _lat_to_tile_y(south, n)
+    x0 = _lng_to_tile_x(west, n)
+    x1 = _lng_to_tile_x(east, n)
+    nx = (x1 - x0 + 1) if x0 <= x1 else (n - x0 + x1 + 1)
+    if nx * (y1 - y0 + 1) > max_tiles:
+        raise ValueError("too many tiles")
+    xs = [(x0 + i) % n for i in range(nx)]
+    return [(z, x, y) for y in range(y0, y1 + 1) for x in xs]
+
+
+def _precision_for_tile(west: float, east: float, grid: int = CLUSTER_GRID) -> int:
+    """A legdurvább geohash szint, ahol a cella legfeljebb a rácscella szélessége."""
+    target = (east - west) / grid
+    for p in range(1, geo.GEOHASH_PRECISION + 1):
+        _, w = geo.cell_size_deg(p)
+        if w <= target:
+            return p
+    return geo.GEOHASH_PRECISION
+
+
+def _tile_filter(z: int, x: int, y: int):
+    """A csempe területe; a felső határok nyitottak, kivéve a térkép szélén."""
+    south, west, north, east = bounds = tile_bounds(z, x, y)
+    n = 1 << z
+    conds = [geo.bbox_filter(*bounds)]
+    if y > 0:
+        conds.append(Bejelentes.koord_szel < north)
+    if x < n - 1:
+        conds.append(Bejelentes.koord_hossz < east)
+    return and_(*conds)
+
+
+# ---- aggregálás ----
+
+def _tile_points(db, where):
+    rows = (
+        db.query(
+            Bejelentes.bejelentesID,
+            Bejelentes.koord_szel,
+            Bejelentes.koord_hossz,
+            Bejelentes.statusz,
+        )
+        .filter(where)
+        .limit(MAX_POINTS_PER_TILE + 1)
+        .all()
+    )
+    if len(rows) > MAX_POINTS_PER_TILE:
+        return None
+    return [
+        {
+            "bejelentesID": r.bejelentesID,
+            "lat": float(r.koord_szel),
+            "lng": float(r.koord_hossz),
+            "statusz": r.statusz,
+        }
+        for r in rows
+    ]
+
+
+def _tile_clusters(db, bounds, where, grid: int = CLUSTER_GRID):
+    south, west, north, east = bounds
+    precision = _precision_for_tile(west, east, grid)
+    # a hossz literálként megy, hogy a SELECT és a GROUP BY kifejezés azonos legyen
+    cell = func.substring(Bejelentes.geohash, literal_column("1"), literal_column(str(precision)))
+
+    rows = (
+        db.query(
+            cell.label("cella"),
+            Bejelentes.statusz,
+            func.count().label("db"),
+            func.avg(Bejelentes.koord_szel).label("lat"),
+            func.avg(Bejelentes.koord_hossz).label("lng"),
+        )
+        .filter(where)
+        .group_by(cell, Bejelentes.statusz)
+        .all()
+    )
+
+    # geohash cellák -> grid x grid rács (súlyozott középpont)
+    cells = {}
+    cell_h = (north - south) / grid or 1.0
+    cell_w = (east - west) / grid or 1.0
+    for r in rows:
+        lat = float(r.lat)
+        lng = float(r.lng)
+        gi = min(grid - 1, max(0, int((lat - south) / cell_h)))
+        gj = min(grid - 1, max(0, int((lng - west) / cell_w)))
+        c = cells.setdefault((gi, gj), {"count": 0, "lat_sum": 0.0, "lng_sum": 0.0, "statusz": {}})
+        c["count"] += r.db
+        c["lat_sum"] += lat * r.db
+        c["lng_sum"] += lng * r.db
+        c["statusz"][r.statusz] = c["statusz"].get(r.statusz, 0) + r.db
+
+    return [
+        {
+            "lat": c["lat_sum"] / c["count"],
+            "lng": c["lng_sum"] / c["count"],
+            "count": c["count"],
+            "statusz": c["statusz"],
+        }
+        for c in cells.values()
+    ]
+
+
+def _compute_tile(db, z: int, x: int, y: int, points: bool, grid: int) -> dict:
+    bounds = tile_bounds(z, x, y)
+    where = _tile_filter(z, x, y)
+    if points and z >= POINT_ZOOM:
+        rows = _tile_points(db, where)
+        if rows is not None:
+            return {"clusters": [], "points": rows}
+    return {"clusters": _tile_clusters(db, bounds, where, grid), "points": []}
+
+
+def get_tile(
+    db, z: int, x: int, y: int, points: bool = True, version: int | None = None, grid: int = CLUSTER_GRID
+) -> dict:
+    """points=False / grid: pont-nagyításon is klaszterek, durvább rács (a válasz méretkorlátjához)."""
+    if version is None:
+        version = cache.current_version()
+    key = (version, z, x, y, points, grid)
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and hit[0] > now:
+            _cache.move_to_end(key)
+            return hit[1]
+
+    data = _compute_tile(db, z, x, y, points, grid)
+
+    with _cache_lock:
+        _cache[key] = (now + CACHE_TTL_S, data)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_TILES:
+            _cache.popitem(last=False)
+    return data
+
+
+def clusters_for_viewport(db, south: float, west: float, north: float, east: float, zoom: int) -> dict:
+    """ValueError, ha a terület ezen a nagyításon túl sok csempe."""
+    zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+    tiles = tiles_for_bbox(south, west, north, east, zoom)
+    version = cache.current_version()
+
+    data = {t: get_tile(db, *t, version=version) for t in tiles}
+    total = sum(len(d["clusters"]) + len(d["points"]) for d in data.values())
+    if total > MAX_OBJECTS:
+        # a legtöbb pontot adó csempék klaszterként, amíg a válasz belefér
+        for t in sorted(data, key=lambda t: len(data[t]["points"]), reverse=True):
+            if total <= MAX_OBJECTS or not data[t]["points"]:
+                break
+            clustered = get_tile(db, *t, points=False, version=version)
+            total += len(clustered["clusters"]) - len(data[t]["points"])
+            data[t] = clustered
+    if total > MAX_OBJECTS:
+        # még mindig sok: a legtöbb klasztert adó csempék durvább rácson
+        # (csupa ilyen csempével legfeljebb MAX_TILES * COARSE_GRID² objektum)
+        for t in sorted(data, key=lambda t: len(data[t]["clusters"]), reverse=True):
+            if total <= MAX_OBJECTS:
+                break
+            coarse = get_tile(db, *t, points=False, version=version, grid=COARSE_GRID)
+            total += len(coarse["clusters"]) - len(data[t]["clusters"]) - len(data[t]["points"])
+            data[t] = coarse
+
+    clusters = []
+    points = []
+    for t in tiles:
+        clusters.extend(data[t]["clusters"])
+        points.extend(data[t]["points"])
+    return {"zoom": zoom, "clusters": clusters, "points": points}
@@ -1,14 +1,139 @@
+import hashlib
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL environment variable is not set")
 
 # Render / Heroku jellegű URL javítás
-if DATABASE_URL.startswith("postgres://"):
+if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool, ami méri, mennyit vártunk szabad kapcsolatra (workerenként
+    összesítve, és szálanként a kérésenkénti méréshez: app/querylog.py).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.wait_stats = {"checkouts": 0, "wait_s": 0.0, "max_wait_s": 0.0, "timeouts": 0, "max_checkedout": 0}
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.wait_stats["timeouts"] += 1
+            raise
+        waited = time.perf_counter() - started
+        self.local.wait_s = getattr(self.local, "wait_s", 0.0) + waited
+        with self._stats_lock:
+            st = self.wait_stats
+            st["checkouts"] += 1
+            st["wait_s"] += waited
+            st["max_wait_s"] = max(st["max_wait_s"], waited)
+            st["max_checkedout"] = max(st["max_checkedout"], self.checkedout())
+        return conn
+
+    def wait_snapshot(self) -> dict:
+        with self._stats_lock:
+            return dict(self.wait_stats)
+
+
+def _pool_options(url: str) -> dict:
+    """
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (mp), DB_POOL_RECYCLE (mp).
+    Ami nincs megadva, az SQLAlchemy alapértelmezése marad.
+    Egy gépen a kapcsolatok felső korlátja: workerek * (size + overflow).
+    """
+    opts = {}
+    for env, key, conv in (
+        ("DB_POOL_SIZE", "pool_size", int),
+        ("DB_MAX_OVERFLOW", "max_overflow", int),
+        ("DB_POOL_TIMEOUT", "pool_timeout", float),
+        ("DB_POOL_RECYCLE", "pool_recycle", int),
+    ):
+        raw = os.environ.get(env)
+        if raw:
+            opts[key] = conv(raw)
+
+    u = make_url(url)
+    if issubclass(u.get_dialect().get_pool_class(u), QueuePool):
+        opts["poolclass"] = TimedQueuePool
+    else:
+        # pl. memóriabeli SQLite: nincs méretezhető pool
+        for key in ("pool_size", "max_overflow", "pool_timeout"):
+            opts.pop(key, None)
+    return opts
+
+
+# Az engine lustán, az első használatkor jön létre: az importálás nem nyit
+# kapcsolatot és nem tölti be a DB drivert, így a gunicorn --preload mesterében
+# is olcsó. Fork után a gyermek eldobja az örökölt pool-t (close=False: a
+# szülő kapcsolatait nem zárja be), és saját kapcsolatokat nyit.
+_engine = None
+_engine_lock = threading.Lock()
+_fork_hooks = []
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if not DATABASE_URL:
+                    raise RuntimeError("DATABASE_URL environment variable is not set")
+                _engine = create_engine(DATABASE_URL, pool_pre_ping=True, **_pool_options(DATABASE_URL))
+    return _engine
+
+
+def dispose_after_fork(eng) -> None:
+    """Fork után a gyermekben eldobja az `eng` örökölt kapcsolatait."""
+    _fork_hooks.append(eng)
+
+
+def _after_fork_in_child() -> None:
+    global _engine_lock
+    _engine_lock = threading.Lock()
+    for eng in ([_engine] if _engine is not None else []) + _fork_hooks:
+        eng.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def __getattr__(name):
+    # `from app.database import engine` (tools/, bench/): ekkor jön létre
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class LazySession(Session):
+    """Session, amely kötés (bind) nélkül az elsődleges engine-t használja."""
+
+    def __init__(self, bind=None, **kwargs):
+        super().__init__(bind=bind if bind is not None else get_engine(), **kwargs)
+
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, class_=LazySession)
+
+
+def local_state_path(suffix: str) -> str:
+    """
+    Helyi, gépen belül megosztott állapotfájl útvonala (cache verzió, spool, ...).
+    Adatbázisonként külön fájl, hogy két példány ne zavarja egymást.
+    """
+    tag = hashlib.sha1((DATABASE_URL or "").encode("utf-8")).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"zold-lovag-{tag}.{suffix}")
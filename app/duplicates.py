@@ -0,0 +1,234 @@
+# app/duplicates.py
+"""
+Duplikált bejelentések felismerése beküldéskor.
+
+Ugyanazt a lerakást sokan, kicsit eltérő koordinátával vagy címírással
+jelentik be. Beküldéskor megkeressük a nyitott (nem lezárt), nem duplikátum
+bejelentést, amely
+- SUGAR_M méteren belül van (geohash index, app/geo.py), vagy
+- ugyanarra a normalizált címre szól (cim_kulcs, (cim_kulcs, datum_ido) index),
+és az utolsó NAPOK napban érkezett. A címjegyzékből csak utca / település
+pontosan geokódolt koordináta (Bejelentes.geokod, app/geocode.py) egy
+egész utcára ugyanaz, ezért ezek a sugaras keresésben nem vesznek részt
+(se keresőként, se jelöltként), csak a cím szerintiben. Ha van ilyen, az új bejelentés
+beíródik (fotó, leírás megmarad), de a kanonikusID-ja a talált bejelentésre
+mutat, így a dashboardon nem lesz külön munkatétel.
+
+Az admin bejelentéseket összevonhat (merge) és egy duplikátumot újra
+önállóvá tehet (split).
+
+Beállítások: DUPLIKATUM_KERESES=off, DUPLIKATUM_SUGAR_M (30), DUPLIKATUM_NAPOK (14).
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+
+from app import geo, search
+from app.models import Bejelentes
+
+
+ENABLED = os.environ.get("DUPLIKATUM_KERESES", "on") != "off"
+SUGAR_M = float(os.environ.get("DUPLIKATUM_SUGAR_M", "30"))
+NAPOK = int(os.environ.get("DUPLIKATUM_NAPOK", "14"))
+
+CANDIDATE_LIMIT = 50
+
+# házszám szintű geokód (app/geocode.py); a többi csak a címre illeszthető
+HOUSE_LEVEL = ("pontos", "becsult")
+
+
+def address_key(cim: str | None) -> str | None:
+    """A cím normalizált alakja ("Fő u. 5." és "fo utca 5" ugyanaz)."""
+    key = search.normalize(cim)
+    return key[:255] or None
+
+
+def _open_since(since: datetime):
+    return (
+        Bejelentes.statusz != "lezárt",
+        # COALESCE: szándékosan nem indexelhető, különben (ANALYZE nélkül) a
+        # tervező a szinte csupa NULL kanonikusID indexet választaná a
+        # geohash / cim_kulcs index helyett
+        func.coalesce(Bejelentes.kanonikusID, 0) == 0,
+        Bejelentes.datum_ido >= since,
+    )
+
+
+def _point_like(geokod: str | None) -> bool:
+    """Beküldött vagy házszám szintű koordináta (a sugaras keresésben részt vesz)."""
+    return geokod is None or geokod in HOUSE_LEVEL
+
+
+def find_canonical(
+    db, cim_kulcs: str | None, lat, lng, datum_ido: datetime | None = None, geokod: str | None = None,
+    before_id: int | None = None,
+) -> int | None:
+    """
+    A legközelebbi nyitott bejelentés SUGAR_M-en belül, különben a
+    legrégebbi nyitott bejelentés ugyanazzal a címmel; None, ha nincs.
+    `geokod`: a koordináta geokódolási pontossága (None: beküldött).
+    before_id: egy már beírt bejelentésnél (link_inserted) csak a
+    (datum_ido, bejelentesID) sorrendben előtte lévők jöhetnek szóba.
+    """
+    now = datum_ido or datetime.utcnow()
+    since = now - timedelta(days=NAPOK)
+    earlier = () if before_id is None else (or_(
+        Bejelentes.datum_ido < now,
+        and_(Bejelentes.datum_ido == now, Bejelentes.bejelentesID < before_id),
+    ),)
+
+    if lat is not None and lng is not None and _point_like(geokod):
+        lat, lng = float(lat), float(lng)
+        rows = db.execute(
+            select(Bejelentes.bejelentesID, Bejelentes.koord_szel, Bejelentes.koord_hossz)
+            .where(
+                geo.radius_filter(lat, lng, SUGAR_M),
+                or_(Bejelentes.geokod == None, Bejelentes.geokod.in_(HOUSE_LEVEL)),  # noqa: E711
+                *_open_since(since),
+                *earlier,
+            )
+            # a legközelebbiek kerüljenek a korlátba
+            .order_by(geo.distance_order(lat, lng))
+            .limit(CANDIDATE_LIMIT)
+        ).all()
+        best = None
+        for bejelentes_id, szel, hossz in rows:
+            d = geo.haversine_m(lat, lng, float(szel), float(hossz))
+            if d <= SUGAR_M and (best is None or (d, bejelentes_id) < best):
+                best = (d, bejelentes_id)
+        if best is not None:
+            return best[1]
+
+    if cim_kulcs:
+        return db.execute(
+            select(Bejelentes.bejelentesID)
+            .where(Bejelentes.cim_kulcs == cim_kulcs, *_open_since(since), *earlier)
+            .order_by(Bejelentes.datum_ido, Bejelentes.bejelentesID)
+            .limit(1)
+        ).scalar()
+    return None
+
+
+def _same_place(a: Bejelentes, b: Bejelentes) -> bool:
+    if a.cim_kulcs and a.cim_kulcs == b.cim_kulcs:
+        return True
+    if None in (a.koord_szel, a.koord_hossz, b.koord_szel, b.koord_hossz):
+        return False
+    if not (_point_like(a.geokod) and _point_like(b.geokod)):
+        return False
+    return geo.haversine_m(
+        float(a.koord_szel), float(a.koord_hossz), float(b.koord_szel), float(b.koord_hossz)
+    ) <= SUGAR_M
+
+
+def link_new(db, items: list[Bejelentes]) -> list[tuple[Bejelentes, Bejelentes]]:
+    """
+    Beállítja az új (még nem flush-olt) bejelentések kanonikusID-ját.
+    Egy kötegen belüli ismétléseket is felismer: ezeket (duplikátum, eredeti)
+    párként adja vissza, a hívó a flush után állítja be (az eredetinek addig
+    nincs ID-ja).
+    """
+    pending = []
+    canonical_in_batch = []
+    for b in items:
+        if b.cim_kulcs is None:
+            b.cim_kulcs = address_key(b.cim)
+        if not ENABLED:
+            continue
+        b.kanonikusID = find_canonical(db, b.cim_kulcs, b.koord_szel, b.koord_hossz, b.datum_ido, b.geokod)
+        if b.kanonikusID is not None:
+            continue
+        original = next((o for o in canonical_in_batch if _same_place(b, o)), None)
+        if original is not None:
+            pending.append((b, original))
+        else:
+            canonical_in_batch.append(b)
+    return pending
+
+
+def link_inserted(db, rows) -> int:
+    """
+    Már beírt, kanonikusID nélküli bejelentések duplikátum-keresése (régi
+    adatok betöltése, app/importer.py). Időrendben haladunk, és csak korábbi
+    bejelentés lehet az eredeti; a köteg sorai ekkor már a táblában vannak,
+    így a kötegen belüli ismétléseket is az index találja meg.
+    `rows`: (bejelentesID, cim_kulcs, lat, lng, datum_ido, geokod).
+    Visszatérés: a duplikátumként megjelöltek száma. Nem commitol.
+    """
+    if not ENABLED:
+        return 0
+    n = 0
+    for bejelentes_id, cim_kulcs, lat, lng, datum_ido, geokod in sorted(rows, key=lambda r: (r[4], r[0])):
+        kanonikus = find_canonical(db, cim_kulcs, lat, lng, datum_ido, geokod, before_id=bejelentes_id)
+        if kanonikus is not None:
+            db.execute(
+                update(Bejelentes).where(Bejelentes.bejelentesID == bejelentes_id).values(kanonikusID=kanonikus)
+            )
+            n += 1
+    return n
+
+
+def merge(db, canonical_id: int, ids: list[int]) -> list[int]:
+    """
+    Az `ids` bejelentések (és az ő duplikátumaik) a `canonical_id`
+    duplikátumai lesznek. Visszatérés: az érintett sorok azonosítói (a
+    változásnaplóhoz). Nem commitol.
+    """
+    ids = [i for i in ids if i != canonical_id]
+    if not ids:
+        return []
+    where = Bejelentes.bejelentesID.in_(ids) | Bejelentes.kanonikusID.in_(ids)
+    affected = list(db.execute(
+        select(Bejelentes.bejelentesID).where(where).order_by(Bejelentes.bejelentesID)
+    ).scalars())
+    db.execute(update(Bejelentes).where(Bejelentes.bejelentesID == canonical_id).values(kanonikusID=None))
+    db.execute(update(Bejelentes).where(where).values(kanonikusID=canonical_id))
+    return affected
+
+
+def split(db, bejelentes_id: int) -> bool:
+    """A duplikátum újra önálló bejelentés lesz. Nem commitol."""
+    return bool(db.execute(
+        update(Bejelentes)
+        .where(Bejelentes.bejelentesID == bejelentes_id, Bejelentes.kanonikusID != None)
+        .values(kanonikusID=None)
+    ).rowcount)
+
+
+def duplicate_counts(db, ids: list[int]) -> dict[int, int]:
+    """Kanonikus ID -> duplikátumok száma (a dashboard egy oldalához)."""
+    if not ids:
+        return {}
+    return dict(db.execute(
+        select(Bejelentes.kanonikusID, func.count())
+        .where(Bejelentes.kanonikusID.in_(ids))
+        .group_by(Bejelentes.kanonikusID)
+    ).all())
+
+
+def backfill_address_keys(db, batch_size: int = 1000) -> int:
+    """Kitölti a cim_kulcs-ot a címmel rendelkező, de még kulcs nélküli sorokra."""
+    total = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(Bejelentes)
+            .filter(
+                Bejelentes.bejelentesID > last_id,
+                Bejelentes.cim_kulcs == None,
+                Bejelentes.cim != None,
+            )
+            .order_by(Bejelentes.bejelentesID)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return total
+        for b in batch:
+            b.cim_kulcs = address_key(b.cim)
+        db.commit()
+        total += len(batch)
+        last_id = batch[-1].bejelentesID
@@ -0,0 +1,163 @@
+# app/export.py
+"""
+Bejelentések és a módosítás-napló teljes exportja NDJSON vagy CSV formában.
+
+A sorok szerveroldali cursorból jönnek (stream_results + yield_per), és
+soronként kerülnek a kimenetre, így a memóriahasználat nem függ az
+exportált sorok számától. Csak a kimenethez szükséges oszlopokat kérjük le
+(Core select, nincs ORM objektum és identity map).
+
+A bejelentések szűrői ugyanazok, mint a dashboardon (app/filters.py); a
+módosítás-napló exportja az archivált sorokat is tartalmazza.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app import archive, replica
+from app.filters import dashboard_filters, parse_date
+from app.models import Bejelentes, Modositas
+
+
+YIELD_PER = 1000
+CHUNK_SIZE = 64 * 1024
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+BEJELENTES_COLUMNS = [
+    Bejelentes.bejelentesID,
+    Bejelentes.datum_ido,
+    Bejelentes.cim,
+    Bejelentes.koord_szel,
+    Bejelentes.koord_hossz,
+    Bejelentes.leiras,
+    Bejelentes.statusz,
+    Bejelentes.prioritas,
+    Bejelentes.hulladek_tipus,
+    Bejelentes.mennyiseg,
+    Bejelentes.foto_url,
+]
+
+MODOSITAS_COLUMNS = [
+    Modositas.modositasiID,
+    Modositas.bejelentesID,
+    Modositas.adminID,
+    Modositas.datum_ido,
+    Modositas.mezo,
+    Modositas.regi_ertek,
+    Modositas.uj_ertek,
+]
+
+
+def _value(v):
+    if isinstance(v, datetime):
+        return v.isoformat(sep=" ", timespec="seconds")
+    if v is None or isinstance(v, (str, int, float)):
+        return v
+    # Numeric (koordináták) -> float
+    return float(v)
+
+
+def _stream(stmt, post_filter=None):
+    """Sorok (Row) egy szerveroldali cursorból; a kapcsolat a generátoré (replikán, ha van)."""
+    with replica.read_engine().connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=YIELD_PER).execute(stmt)
+        for row in result:
+            if post_filter is None or post_filter(row):
+                yield row
+
+
+def bejelentes_rows(statusz="", hely="", date_from="", date_to="", sugar="", duplikatumok="1"):
+    """
+    Visszatérés: (hibak, sorok). A hibás szűrőmezőket – a dashboardhoz
+    hasonlóan – kihagyjuk, és a hibaüzenetet visszaadjuk.
+    duplikatumok != "1": csak a kanonikus bejelentések (mint a dashboardon).
+    """
+    filters, hibak, post_filter = dashboard_filters(statusz, hely, date_from, date_to, sugar, duplikatumok)
+    stmt = (
+        select(*BEJELENTES_COLUMNS)
+        .where(*filters)
+        .order_by(Bejelentes.datum_ido, Bejelentes.bejelentesID)
+    )
+    return hibak, _stream(stmt, post_filter)
+
+
+def modositas_rows(date_from="", date_to="", bejelentes_id: int | None = None):
+    """
+    A módosítás-napló időrendben, az archivált sorokkal együtt (app/archive.py);
+    a dátumszűrők a dashboardéval azonos értelműek.
+    """
+    hibak = []
+    start = end = None
+    if date_from:
+        try:
+            start = parse_date(date_from)
+        except ValueError:
+            hibak.append("Hibás 'date_from' formátum (YYYY-MM-DD).")
+    if date_to:
+        try:
+            end = parse_date(date_to)
+        except ValueError:
+            hibak.append("Hibás 'date_to' formátum (YYYY-MM-DD).")
+
+    def where_for(model):
+        conds = []
+        if bejelentes_id is not None:
+            conds.append(model.bejelentesID == bejelentes_id)
+        if start is not None:
+            conds.append(model.datum_ido >= start)
+        if end is not None:
+            conds.append(model.datum_ido < end)
+        return conds
+
+    return hibak, archive.all_rows(_stream, where_for)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps({k: _value(v) for k, v in row._mapping.items()}, ensure_ascii=False) + "\n"
+
+
+def csv_lines(rows, columns):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def take() -> str:
+        s = buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        return s
+
+    writer.writerow([c.key for c in columns])
+    yield take()
+    for row in rows:
+        writer.writerow([_value(v) for v in row])
+        yield take()
+
+
+def _chunked(lines):
+    # soronként egy HTTP chunk túl sok apró írás lenne; ~CHUNK_SIZE-onként küldjük
+    parts = []
+    size = 0
+    for line in lines:
+        parts.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts)
+
+
+def render(rows, fmt: str, columns):
+    """Szöveges darabok generátora a kért formátumban."""
+    lines = csv_lines(rows, columns) if fmt == "csv" else ndjson_lines(rows)
+    return _chunked(lines)
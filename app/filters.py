@@ -0,0 +1,96 @@
+# app/filters.py
+"""
+Az admin dashboard szűrőinek felépítése.
+
+Külön modulban van, hogy a dashboard route és a séma-ellenőrző
+(EXPLAIN) pontosan ugyanazokat a feltételeket használja.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+from app import geo, search
+from app.models import Bejelentes
+
+
+DEFAULT_RADIUS_M = 50
+MAX_RADIUS_M = 50_000
+
+
+def parse_date(s: str) -> datetime:
+    return datetime.strptime(s, "%Y-%m-%d")
+
+
+def parse_radius(s: str | None) -> float:
+    """Sugár méterben; üres / hibás érték esetén az alapértelmezett."""
+    try:
+        r = float(s) if s else DEFAULT_RADIUS_M
+    except ValueError:
+        return DEFAULT_RADIUS_M
+    return max(1.0, min(r, MAX_RADIUS_M))
+
+
+def _text_filter(hely: str):
+    cond = search.match_filter(hely)
+    # csak írásjelekből / egybetűs szavakból álló kifejezés: marad a régi LIKE
+    return cond if cond is not None else Bejelentes.cim.ilike(f"%{hely}%")
+
+
+def dashboard_filters(
+    statusz: str, hely: str, date_from: str, date_to: str, sugar: str = "", duplikatumok: str = "1"
+):
+    """
+    duplikatumok != "1": csak a kanonikus (nem duplikátum) bejelentések, mint a
+    dashboardon alapból (app/duplicates.py).
+
+    Visszatérés: (filters, hibak, post_filter)
+    - hibak: a felhasználónak szóló üzenetek, a hibás mezőt kihagyjuk a szűrésből
+    - post_filter: None, vagy egy Bejelentes -> bool függvény a pontos (haversine)
+      távolság-ellenőrzéshez; az SQL szűrő ennél bővebb halmazt ad vissza
+    """
+    filters = []
+    hibak = []
+    post_filter = None
+
+    if statusz:
+        filters.append(Bejelentes.statusz == statusz)
+
+    if duplikatumok != "1":
+        # a duplikátumok a kanonikus bejelentésükkel együtt kezelendők
+        filters.append(Bejelentes.kanonikusID == None)  # noqa: E711
+
+    # időpont szűrés (nap pontossággal)
+    if date_from:
+        try:
+            dtf = parse_date(date_from)
+            filters.append(Bejelentes.datum_ido >= dtf)
+        except ValueError:
+            hibak.append("Hibás 'date_from' formátum (YYYY-MM-DD).")
+
+    if date_to:
+        try:
+            # date_to nap vége: +1 nap, < következő nap
+            dtt = parse_date(date_to)
+            filters.append(Bejelentes.datum_ido < (dtt.replace(hour=0, minute=0, second=0, microsecond=0) ))
+            # (ha akarod, később napvége-logicát finomítjuk)
+        except ValueError:
+            hibak.append("Hibás 'date_to' formátum (YYYY-MM-DD).")
+
+    # helyszín szűrés:
+    # - ha "lat,lng" formátum, akkor a ponttól `sugar` méteren belül (geohash index)
+    # - különben szabadszavas keresés a címben és a leírásban (app/search.py)
+    if hely:
+        if "," in hely:
+            try:
+                lat_s, lng_s = [x.strip() for x in hely.split(",", 1)]
+                lat = float(lat_s)
+                lng = float(lng_s)
+                radius_m = parse_radius(sugar)
+                filters.append(geo.radius_filter(lat, lng, radius_m))
+                post_filter = lambda b: geo.is_within(b, lat, lng, radius_m)
+            except ValueError:
+                filters.append(_text_filter(hely))
+        else:
+            filters.append(_text_filter(hely))
+
+    return filters, hibak, post_filter
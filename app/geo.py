@@ -0,0 +1,262 @@
+# app/geo.py
+"""
+Geohash alapú térbeli index a Bejelentes táblához.
+
+Minden koordinátás bejelentés kap egy GEOHASH_PRECISION hosszú geohash-t
+(`Bejelentes.geohash`, B-fa indexszel). Egy geohash prefix a térkép egy
+téglalap alakú cellája, a cella összes pontja egy folytonos
+[prefix, prefix + "~") kulcstartományba esik – így a sugaras és a
+téglalapos keresés néhány index-tartomány olvasása, a tábla méretétől
+függetlenül.
+
+- radius_filter / within_radius: "R méteren belül" (pontos haversine utószűréssel);
+  within_radius limit mellett bővülő sugárral, korlátos SQL LIMIT-tel keres
+- bbox_filter: "a térkép látható területén belül"
+"""
+from __future__ import annotations
+
+import math
+
+from sqlalchemy import and_, or_
+
+from app.models import Bejelentes
+
+
+GEOHASH_PRECISION = 9          # ~4.8 m x 4.8 m cella
+EARTH_RADIUS_M = 6371008.8
+MAX_BBOX_CELLS = 32            # ennyi tartománynál többet nem adunk a lekérdezésnek
+RADIUS_STEP_START_M = 500.0    # within_radius: a bővülő keresés első sugara
+RADIUS_STEP_FACTOR = 4.0
+CANDIDATE_MARGIN = 20          # a közelítő SQL sorrend és a haversine eltérésére
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    out = []
+    bit = 0
+    ch = 0
+    even = True  # páros bit: hosszúság
+    while len(out) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch = (ch << 1) | 1
+                lng_lo = mid
+            else:
+                ch <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            out.append(_BASE32[ch])
+            bit = 0
+            ch = 0
+    return "".join(out)
+
+
+def geohash_for(koord_szel, koord_hossz) -> str | None:
+    """Geohash a Bejelentes mezőiből (None, ha nincs koordináta)."""
+    if koord_szel is None or koord_hossz is None:
+        return None
+    return encode(float(koord_szel), float(koord_hossz))
+
+
+def cell_size_deg(precision: int) -> tuple[float, float]:
+    """(magasság fokban, szélesség fokban) egy adott hosszúságú geohash cellára."""
+    bits = 5 * precision
+    lng_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _wrap_lng(lng: float) -> float:
+    return ((lng + 180.0) % 360.0) - 180.0
+
+
+def _clamp_lat(lat: float) -> float:
+    return max(-90.0, min(90.0, lat))
+
+
+def _prefix_ranges(prefixes):
+    col = Bejelentes.geohash
+    return or_(*[and_(col >= p, col < p + "~") for p in sorted(prefixes)])
+
+
+def _radius_cells(lat: float, lng: float, radius_m: float) -> set[str]:
+    """
+    A legfinomabb geohash szint, ahol egy cella mindkét irányban >= R,
+    és a pontot tartalmazó cella + 8 szomszédja. Ez a 3x3 blokk biztosan
+    lefedi az R sugarú kört.
+    """
+    m_per_deg_lat = math.pi * EARTH_RADIUS_M / 180.0
+    m_per_deg_lng = m_per_deg_lat * max(math.cos(math.radians(lat)), 1e-6)
+
+    precision = 1
+    for p in range(GEOHASH_PRECISION, 0, -1):
+        h, w = cell_size_deg(p)
+        if h * m_per_deg_lat >= radius_m and w * m_per_deg_lng >= radius_m:
+            precision = p
+            break
+
+    h, w = cell_size_deg(precision)
+    cells = set()
+    for dlat in (-h, 0.0, h):
+        for dlng in (-w, 0.0, w):
+            cells.add(encode(_clamp_lat(lat + dlat), _wrap_lng(lng + dlng), precision))
+    return cells
+
+
+def radius_filter(lat: float, lng: float, radius_m: float):
+    """
+    Index-alapú előszűrés: a kört lefedő geohash cellák + a kör befoglaló
+    téglalapja. A pontos távolságot a hívó ellenőrzi (haversine_m / is_within).
+    """
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    return and_(
+        _prefix_ranges(_radius_cells(lat, lng, radius_m)),
+        Bejelentes.koord_szel.between(lat - dlat, lat + dlat),
+        Bejelentes.koord_hossz.between(lng - dlng, lng + dlng),
+    )
+
+
+def is_within(b, lat: float, lng: float, radius_m: float) -> bool:
+    if b.koord_szel is None or b.koord_hossz is None:
+        return False
+    return haversine_m(lat, lng, float(b.koord_szel), float(b.koord_hossz)) <= radius_m
+
+
+def distance_order(lat: float, lng: float):
+    """
+    Közelítő távolság² (egyenközű vetület) ORDER BY-hoz: néhány km-en belül
+    ugyanazt a sorrendet adja, mint a haversine.
+    """
+    k = math.cos(math.radians(lat))
+    dlat = Bejelentes.koord_szel - lat
+    dlng = (Bejelentes.koord_hossz - lng) * k
+    return dlat * dlat + dlng * dlng
+
+
+def _by_distance(rows, lat: float, lng: float, radius_m: float):
+    found = []
+    for b in rows:
+        d = haversine_m(lat, lng, float(b.koord_szel), float(b.koord_hossz))
+        if d <= radius_m:
+            found.append((b, d))
+    found.sort(key=lambda x: x[1])
+    return found
+
+
+def within_radius(query, lat: float, lng: float, radius_m: float, limit: int | None = None):
+    """
+    (Bejelentes, távolság_m) párok távolság szerint növekvő sorrendben.
+    `query` egy Bejelentes-re szóló (akár már szűrt) ORM query.
+
+    limit mellett a keresés RADIUS_STEP_START_M sugárról indul, és
+    RADIUS_STEP_FACTOR-szorosára bővül, amíg nincs meg `limit` találat vagy
+    el nem éri radius_m-et; egy lépés legfeljebb limit + CANDIDATE_MARGIN
+    sort olvas, közelítő távolság szerint rendezve – a nagy sugár így sem
+    tölti be a környék összes bejelentését.
+    """
+    if limit is None:
+        return _by_distance(query.filter(radius_filter(lat, lng, radius_m)).all(), lat, lng, radius_m)
+
+    r = min(radius_m, RADIUS_STEP_START_M)
+    while True:
+        rows = (
+            query.filter(radius_filter(lat, lng, r))
+            .order_by(distance_order(lat, lng))
+            .limit(limit + CANDIDATE_MARGIN)
+            .all()
+        )
+        found = _by_distance(rows, lat, lng, r)
+        # r-en belül megvan `limit` találat: a legközelebbiek mind r-en belül vannak
+        if len(found) >= limit or r >= radius_m:
+            return found[:limit]
+        r = min(radius_m, r * RADIUS_STEP_FACTOR)
+
+
+def _bbox_cells(south: float, west: float, north: float, east: float) -> set[str]:
+    """A téglalapot lefedő cellák a legfinomabb szinten, ahol még <= MAX_BBOX_CELLS."""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        h, w = cell_size_deg(precision)
+        rows = int((north - south) / h) + 2
+        cols = int((east - west) / w) + 2
+        if rows * cols > MAX_BBOX_CELLS:
+            continue
+
+        cells = set()
+        for i in range(rows):
+            lat = _clamp_lat(min(south + i * h, north))
+            for j in range(cols):
+                lng = min(west + j * w, east)
+                cells.add(encode(lat, lng, precision))
+        return cells
+    return set()  # az egész Föld: nincs értelme prefixre szűrni
+
+
+def bbox_filter(south: float, west: float, north: float, east: float):
+    """
+    A térkép látható területe (viewport). Ha a terület átlépi a 180. hosszúsági
+    kört (west > east), két téglalapra bontjuk.
+    """
+    if west > east:
+        return or_(
+            bbox_filter(south, west, north, 180.0),
+            bbox_filter(south, -180.0, north, east),
+        )
+
+    exact = and_(
+        Bejelentes.koord_szel.between(south, north),
+        Bejelentes.koord_hossz.between(west, east),
+    )
+    cells = _bbox_cells(south, west, north, east)
+    if not cells:
+        return and_(Bejelentes.geohash != None, exact)
+    return and_(_prefix_ranges(cells), exact)
+
+
+def backfill_geohash(db, batch_size: int = 1000) -> int:
+    """Kitölti a geohash-t a koordinátás, de még geohash nélküli sorokra."""
+    total = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(Bejelentes)
+            .filter(
+                Bejelentes.bejelentesID > last_id,
+                Bejelentes.geohash == None,
+                Bejelentes.koord_szel != None,
+                Bejelentes.koord_hossz != None,
+            )
+            .order_by(Bejelentes.bejelentesID)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return total
+        for b in batch:
+            b.geohash = geohash_for(b.koord_szel, b.koord_hossz)
+        db.commit()
+        total += len(batch)
+        last_id = batch[-1].bejelentesID
@@ -0,0 +1,499 @@
+# app/geocode.py
+"""
+Offline geokódolás: csak címmel beküldött bejelentések koordinátái.
+
+Külső szolgáltatást nem hívunk. A címeket a helyi címjegyzékben (Cimjegyzek
+tábla) keressük, amit egy CSV fájlból töltünk be (tools/geocode_reports.py
+--load). A fájl első sora a fejléc, az elválasztó "," vagy ";":
+
+    telepules;utca;hazszam;lat;lng
+    Győr;Fő utca;5;47.687500;17.634800
+    Győr;Fő utca;;47.687200;17.635100      <- az utca pontja
+    Győr;;;47.687471;17.650397             <- a település pontja
+
+A település, az utca és a házszám normalizálva kerül a táblába (ékezet
+nélkül, "u." -> "utca", app/search.py), így a keresés egyetlen összetett
+index ((telepules, utca, hazszam)) tartományain fut:
+
+- "pontos": a házszám szerepel a címjegyzékben
+- "becsult": a szomszédos (azonos oldali) házszámok közötti lineáris becslés
+- "utca": az utca pontja, vagy a címjegyzékben szereplő házszámainak átlaga
+- "telepules": a település pontja (csak ha GEOKOD_MIN_PONTOSSAG=telepules)
+
+Minden normalizált cím eredménye (a sikertelen is) a GeokodCache táblába
+kerül, így ugyanaz a cím egy elsődleges kulcsos olvasás. Új címjegyzék
+betöltésekor a cache ürül.
+
+Beküldéskor (app/ingest.py) a koordináta nélküli bejelentés a cache / a
+címjegyzék alapján kap koordinátát; a már meglévő sorokat a `backfill`
+kötegelt feladat tölti ki (tools/geocode_reports.py).
+
+Beállítások: GEOKODOLAS=off, GEOKOD_MIN_PONTOSSAG (utca).
+"""
+from __future__ import annotations
+
+import csv
+import os
+import re
+from bisect import bisect_left
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import Numeric, and_, bindparam, delete, func, insert, select, tuple_, type_coerce, update
+from sqlalchemy.exc import IntegrityError
+
+from app import cache, changefeed, geo, search
+from app.duplicates import address_key
+from app.models import Bejelentes, Cimjegyzek, GeokodCache
+
+
+ENABLED = os.environ.get("GEOKODOLAS", "on") != "off"
+
+# a legpontosabbtól; a MIN_PONTOSSAG-nál durvább eredményt nem használjuk
+PRECISIONS = ("pontos", "becsult", "utca", "telepules")
+MIN_PONTOSSAG = os.environ.get("GEOKOD_MIN_PONTOSSAG", "utca")
+if MIN_PONTOSSAG not in PRECISIONS:
+    raise RuntimeError(f"Ismeretlen GEOKOD_MIN_PONTOSSAG: {MIN_PONTOSSAG}")
+
+BATCH_SIZE = 1000
+LOAD_BATCH_SIZE = 5000
+PREFETCH_CHUNK = 400
+# ennyi szomszédos házszámból keressük az azonos oldalit
+NEIGHBOUR_WINDOW = 6
+
+STREET_TYPES = {
+    "utca", "ut", "ter", "korut", "sugarut", "setany", "rakpart", "koz", "sor",
+    "fasor", "lakotelep", "dulo", "park", "liget", "udvar", "lejto", "lepcso",
+    "sikator", "telep", "tanya", "kert", "sziget", "part", "hid", "kulterulet",
+}
+
+_HOUSE_NUMBER_RE = re.compile(r"^\d{1,4}$")
+_ROMAN_RE = re.compile(r"^[ivxl]+$")
+_Q = Decimal("0.000001")
+_FLOAT = Numeric(asdecimal=False)
+
+
+def _usable(pontossag: str | None) -> bool:
+    return pontossag is not None and PRECISIONS.index(pontossag) <= PRECISIONS.index(MIN_PONTOSSAG)
+
+
+def settlement_key(text: str | None) -> str:
+    # "Budapest XI. kerület" -> "budapest xi"
+    return " ".join(t for t in search.tokenize(text) if t != "kerulet")[:100]
+
+
+def street_key(text: str | None) -> str:
+    return search.normalize(text)[:150]
+
+
+def house_number(text) -> int | None:
+    """ "12/A", "12-14", "12." -> 12"""
+    m = re.match(r"\s*(\d{1,4})", str(text or ""))
+    return int(m.group(1)) if m else None
+
+
+def _street_end(tokens: list[str]) -> int | None:
+    """Az utolsó közterület-típus szó indexe a házszám előtt ("Park utca 5": "utca")."""
+    end = None
+    for i, tok in enumerate(tokens):
+        if tok in STREET_TYPES:
+            end = i
+        elif end is not None and _HOUSE_NUMBER_RE.match(tok):
+            break
+    return end
+
+
+def _street_and_number(tokens: list[str]) -> tuple[str | None, int | None]:
+    """Az utca (a közterület-típus szóig) és az utána álló első szám."""
+    end = _street_end(tokens)
+    if end is None:
+        return None, None
+    number = next((int(t) for t in tokens[end + 1:] if _HOUSE_NUMBER_RE.match(t)), None)
+    return " ".join(tokens[:end + 1]), number
+
+
+def parse_address(cim: str | None) -> list[tuple[str, str | None, int | None]]:
+    """
+    A cím lehetséges (település, utca, házszám) értelmezései, a
+    valószínűbbel kezdve. Formák: "9021 Győr, Fő u. 5.", "Fő utca 5, Győr",
+    "Győr Fő utca 5", "Budapest XI. kerület, Bartók Béla út 12/A", "Győr".
+    """
+    parts = [search.tokenize(p) for p in (cim or "").split(",")]
+    # irányítószám a rész elején
+    parts = [p[1:] if len(p) > 1 and len(p[0]) == 4 and p[0].isdigit() else p for p in parts]
+    parts = [p for p in parts if p]
+    if not parts:
+        return []
+
+    candidates = []
+    street_parts = [p for p in parts if any(t in STREET_TYPES for t in p)]
+    if street_parts and len(parts) > 1:
+        utca, number = _street_and_number(street_parts[0])
+        for p in parts:
+            if p in street_parts:
+                continue
+            candidates.append((" ".join(t for t in p if t != "kerulet"), utca, number))
+            if _ROMAN_RE.match(p[-1]) or p[-1] == "kerulet":
+                # "budapest xi" nincs a címjegyzékben: "budapest"
+                candidates.append((p[0], utca, number))
+    for p in street_parts[:1]:
+        # vessző nélkül: az első egy vagy két szó a település
+        idx = _street_end(p)
+        for k in (1, 2):
+            if k < idx:
+                utca, number = _street_and_number(p[k:])
+                candidates.append((" ".join(p[:k]), utca, number))
+    if not street_parts:
+        candidates.append((settlement_key(" ".join(parts[0])), None, None))
+    return list(dict.fromkeys(candidates))
+
+
+# ---- keresés a címjegyzékben ----
+
+class _Streets:
+    """
+    Utcák (és települések) címjegyzék sorai, kötegenként memoizálva. Egy
+    köteg összes utcája néhány (telepules, utca) IN lekérdezéssel jön az
+    indexből; a házszám keresés és a becslés már a memóriában fut.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._rows: dict[tuple, tuple] = {}
+
+    def _read(self, where) -> None:
+        # a koordináták float-ként jönnek a drivertől (nincs soronkénti Decimal)
+        rows = self.db.connection().execute(
+            select(
+                Cimjegyzek.telepules, Cimjegyzek.utca, Cimjegyzek.hazszam,
+                type_coerce(Cimjegyzek.koord_szel, _FLOAT), type_coerce(Cimjegyzek.koord_hossz, _FLOAT),
+            )
+            .where(where)
+            .order_by(Cimjegyzek.telepules, Cimjegyzek.utca, Cimjegyzek.hazszam)
+        ).all()
+        for telepules, utca, hazszam, szel, hossz in rows:
+            own, numbers, points = self._rows.setdefault((telepules, utca), (None, [], []))
+            if hazszam is None:
+                if own is None:
+                    self._rows[(telepules, utca)] = ((szel, hossz), numbers, points)
+            else:
+                numbers.append(hazszam)
+                points.append((szel, hossz))
+
+    def prefetch(self, keys) -> None:
+        """Sok utca egyszerre: (telepules, utca) IN (...) kötegenként."""
+        keys = [k for k in dict.fromkeys(keys) if k not in self._rows]
+        for i in range(0, len(keys), PREFETCH_CHUNK):
+            chunk = keys[i:i + PREFETCH_CHUNK]
+            self._read(tuple_(Cimjegyzek.telepules, Cimjegyzek.utca).in_(chunk))
+            for k in chunk:
+                self._rows.setdefault(k, (None, [], []))
+
+    def get(self, telepules: str, utca: str | None) -> tuple[tuple | None, list, list]:
+        """(saját pont, házszámok, pontok) házszám szerint rendezve."""
+        key = (telepules, utca)
+        if key not in self._rows:
+            if utca is None:
+                # a település pontja: a házszámok sorait nem olvassuk fel
+                self._read(and_(
+                    Cimjegyzek.telepules == telepules,
+                    Cimjegyzek.utca == None,  # noqa: E711
+                    Cimjegyzek.hazszam == None,  # noqa: E711
+                ))
+            else:
+                self._read(and_(Cimjegyzek.telepules == telepules, Cimjegyzek.utca == utca))
+            self._rows.setdefault(key, (None, [], []))
+        return self._rows[key]
+
+
+def _same_side(numbers: list, points: list, idx: range, number: int):
+    """Az első azonos oldali (páros / páratlan) házszám a tartományból, vagy az első."""
+    first = None
+    for i in idx[:NEIGHBOUR_WINDOW]:
+        if numbers[i] % 2 == number % 2:
+            return numbers[i], points[i]
+        if first is None:
+            first = (numbers[i], points[i])
+    return first
+
+
+def _house(numbers: list, points: list, number: int):
+    i = bisect_left(numbers, number)
+    if i < len(numbers) and numbers[i] == number:
+        return points[i], "pontos"
+    below = _same_side(numbers, points, range(i - 1, -1, -1), number)
+    above = _same_side(numbers, points, range(i, len(numbers)), number)
+    if below is None or above is None:
+        return None
+    t = (number - below[0]) / (above[0] - below[0])
+    lat = below[1][0] + t * (above[1][0] - below[1][0])
+    lng = below[1][1] + t * (above[1][1] - below[1][1])
+    return (lat, lng), "becsult"
+
+
+def lookup(db, cim: str | None, streets: _Streets | None = None):
+    """((lat, lng), pontosság) a címjegyzékből, vagy None. A cache-t nem nézi."""
+    streets = streets or _Streets(db)
+    candidates = parse_address(cim)
+    for telepules, utca, number in candidates:
+        if utca is None:
+            continue
+        own, numbers, points = streets.get(telepules, utca)
+        if number is not None and numbers:
+            found = _house(numbers, points, number)
+            if found is not None:
+                return found
+        if own is not None:
+            return own, "utca"
+        if points:
+            # az utcának nincs saját pontja: a házszámai átlaga
+            return (
+                (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points)),
+                "utca",
+            )
+    if _usable("telepules"):
+        for telepules in dict.fromkeys(c[0] for c in candidates):
+            own = streets.get(telepules, None)[0]
+            if own is not None:
+                return own, "telepules"
+    return None
+
+
+def _quantize(v: float) -> Decimal:
+    return Decimal(repr(v)).quantize(_Q)
+
+
+def resolve(db, keys_to_cim: dict[str, str]) -> dict[str, tuple]:
+    """
+    Normalizált cím -> (lat, lng, pontosság) vagy (None, None, None), a
+    cache-ből (egy IN lekérdezés), a hiányzókat a címjegyzékből, és a
+    cache-be is beírja őket. Nem commitol.
+    """
+    if not keys_to_cim:
+        return {}
+    out = {}
+    for kulcs, szel, hossz, pontossag in db.execute(
+        select(GeokodCache.kulcs, GeokodCache.koord_szel, GeokodCache.koord_hossz, GeokodCache.pontossag)
+        .where(GeokodCache.kulcs.in_(list(keys_to_cim)))
+    ):
+        out[kulcs] = (szel, hossz, pontossag)
+
+    new_rows = []
+    now = datetime.utcnow()
+    misses = {k: cim for k, cim in keys_to_cim.items() if k not in out}
+    streets = _Streets(db)
+    streets.prefetch(
+        (telepules, utca)
+        for cim in misses.values()
+        for telepules, utca, _ in parse_address(cim)
+        if utca is not None
+    )
+    for kulcs, cim in misses.items():
+        found = lookup(db, cim, streets)
+        if found is None:
+            value = (None, None, None)
+        else:
+            (lat, lng), pontossag = found
+            value = (_quantize(lat), _quantize(lng), pontossag)
+        out[kulcs] = value
+        new_rows.append({
+            "kulcs": kulcs, "koord_szel": value[0], "koord_hossz": value[1],
+            "pontossag": value[2], "datum_ido": now,
+        })
+    if new_rows:
+        _cache_rows(db, new_rows)
+    return out
+
+
+def _cache_rows(db, rows: list[dict]) -> None:
+    """
+    A cache írása a hívó tranzakciójában, de savepointban: ha egy párhuzamos
+    beküldés ugyanazt a címet már beírta (IntegrityError a kulcson), azt a sort
+    kihagyjuk – a cache írás hibája sosem veszítheti el a bejelentést.
+    """
+    try:
+        with db.begin_nested():
+            db.execute(insert(GeokodCache), rows)
+        return
+    except IntegrityError:
+        pass
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(GeokodCache), [row])
+        except IntegrityError:
+            # a párhuzamos tranzakció ugyanabból a címjegyzékből ugyanazt számolta
+            continue
+
+
+def coordinates_for(db, cims) -> dict[str, tuple]:
+    """
+    Cím -> (lat, lng, pontosság), csak a GEOKOD_MIN_PONTOSSAG-nak megfelelő
+    találatokra (a cache-en keresztül). Nem commitol.
+    """
+    if not ENABLED:
+        return {}
+    by_key = {}
+    for cim in cims:
+        kulcs = address_key(cim)
+        if kulcs:
+            by_key.setdefault(kulcs, []).append(cim)
+    if not by_key:
+        return {}
+    found = resolve(db, {k: v[0] for k, v in by_key.items()})
+    out = {}
+    for kulcs, same in by_key.items():
+        if _usable(found[kulcs][2]):
+            out.update(dict.fromkeys(same, found[kulcs]))
+    return out
+
+
+def fill_missing(db, items: list[Bejelentes]) -> int:
+    """
+    Koordinátát ad a még nem beírt, csak címmel rendelkező bejelentéseknek
+    (app/ingest.py, a duplikátum-keresés előtt). Visszatérés: a kitöltöttek száma.
+    """
+    todo = [b for b in items if b.cim and (b.koord_szel is None or b.koord_hossz is None)]
+    found = coordinates_for(db, [b.cim for b in todo])
+    n = 0
+    for b in todo:
+        if b.cim in found:
+            b.koord_szel, b.koord_hossz, b.geokod = found[b.cim]
+            b.geohash = geo.geohash_for(b.koord_szel, b.koord_hossz)
+            n += 1
+    return n
+
+
+def backfill(db, batch_size: int = BATCH_SIZE, log=None) -> tuple[int, int]:
+    """
+    A meglévő, csak címmel rendelkező bejelentések kitöltése, kötegenként
+    commitolva (megszakítva is konzisztens, újra futtatható).
+    Visszatérés: (vizsgált sorok, kitöltött sorok).
+    """
+    seen = filled = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Bejelentes.bejelentesID, Bejelentes.cim)
+            .where(
+                Bejelentes.bejelentesID > last_id,
+                Bejelentes.koord_szel == None,  # noqa: E711
+                Bejelentes.cim != None,  # noqa: E711
+            )
+            .order_by(Bejelentes.bejelentesID)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return seen, filled
+        last_id = rows[-1][0]
+        seen += len(rows)
+
+        keys = {}
+        for bejelentes_id, cim in rows:
+            kulcs = address_key(cim)
+            if kulcs:
+                keys.setdefault(kulcs, (cim, []))[1].append(bejelentes_id)
+        found = resolve(db, {k: v[0] for k, v in keys.items()})
+
+        params = []
+        for kulcs, (_, ids) in keys.items():
+            szel, hossz, pontossag = found[kulcs]
+            if not _usable(pontossag):
+                continue
+            gh = geo.geohash_for(szel, hossz)
+            params.extend(
+                {"b_id": i, "szel": szel, "hossz": hossz, "gh": gh, "pontossag": pontossag} for i in ids
+            )
+        if params:
+            db.connection().execute(
+                update(Bejelentes)
+                .where(Bejelentes.bejelentesID == bindparam("b_id"))
+                .values(
+                    koord_szel=bindparam("szel"), koord_hossz=bindparam("hossz"),
+                    geohash=bindparam("gh"), geokod=bindparam("pontossag"),
+                ),
+                params,
+            )
+            changefeed.record(db, [p["b_id"] for p in params])
+            cache.invalidate(db)
+        db.commit()
+        filled += len(params)
+        if log:
+            log(seen, filled)
+
+
+# ---- címjegyzék betöltése ----
+
+def _read_gazetteer(path: str):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        header = f.readline()
+        delimiter = ";" if header.count(";") > header.count(",") else ","
+        fields = [h.strip().lower() for h in next(csv.reader([header], delimiter=delimiter))]
+        missing = {"telepules", "lat", "lng"} - set(fields)
+        if missing:
+            raise ValueError(f"Hiányzó oszlop(ok) a címjegyzékben: {', '.join(sorted(missing))}")
+        for lineno, row in enumerate(csv.DictReader(f, fieldnames=fields, delimiter=delimiter), start=2):
+            try:
+                lat, lng = float(row["lat"]), float(row["lng"])
+            except (TypeError, ValueError):
+                raise ValueError(f"{path}:{lineno}: hibás koordináta") from None
+            if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                raise ValueError(f"{path}:{lineno}: a koordináta tartományon kívül esik")
+            telepules = settlement_key(row["telepules"])
+            if not telepules:
+                continue
+            utca = street_key(row.get("utca")) or None
+            yield {
+                "telepules": telepules,
+                "utca": utca,
+                "hazszam": house_number(row.get("hazszam")) if utca else None,
+                "koord_szel": _quantize(lat),
+                "koord_hossz": _quantize(lng),
+            }
+
+
+def load_gazetteer(db, path: str, log=None) -> int:
+    """
+    A címjegyzék cseréje a fájl tartalmára (kötegelt executemany), és a
+    geokódolási cache ürítése. Egy tranzakció: hiba esetén a régi marad.
+    """
+    db.execute(delete(Cimjegyzek))
+    db.execute(delete(GeokodCache))
+    n = 0
+    batch = []
+    for row in _read_gazetteer(path):
+        batch.append(row)
+        if len(batch) >= LOAD_BATCH_SIZE:
+            db.execute(insert(Cimjegyzek), batch)
+            n += len(batch)
+            batch = []
+            if log:
+                log(n)
+    if batch:
+        db.execute(insert(Cimjegyzek), batch)
+        n += len(batch)
+    db.commit()
+    return n
+
+
+def status(db) -> dict:
+    missing = db.scalar(
+        select(func.count()).select_from(Bejelentes)
+        .where(Bejelentes.koord_szel == None, Bejelentes.cim != None)  # noqa: E711
+    )
+    by_precision = dict(db.execute(
+        select(Bejelentes.geokod, func.count())
+        .where(Bejelentes.geokod != None)  # noqa: E711
+        .group_by(Bejelentes.geokod)
+    ).all())
+    cache_rows, cache_misses = db.execute(
+        select(func.count(), func.count() - func.count(GeokodCache.pontossag))
+    ).one()
+    return {
+        "cimjegyzek_sorok": db.scalar(select(func.count()).select_from(Cimjegyzek)),
+        "cache_sorok": cache_rows,
+        "cache_nem_talalt": cache_misses,
+        "koordinata_nelkul": missing,
+        "geokodolt": by_precision,
+        "min_pontossag": MIN_PONTOSSAG,
+    }
@@ -0,0 +1,329 @@
+# app/images.py
+"""
+Feltöltött fotók háttérfeldolgozása.
+
+A kérés csak a metaadatokat (EXIF/GPS, XMP, IPTC) távolítja el – még a
+tárolás és a hash ELŐTT, mert a fotótár kulcsa a tartalom hash-e, és egy
+kulcs alatti fájlt utólag sosem írunk felül (a médiaválasz immutable, az
+ETag a hash) –, majd beírja a bejelentést. JPEG-nél és PNG-nél ez újrakódolás
+nélkül, a szegmensek / chunkok kihagyásával történik: a képadat és az ICC
+profil bájtra azonos marad, az EXIF-ből csak a tájolás marad meg (a
+származékok ebből forgatnak). A többi formátumot újrakódoljuk. A többit egy
+szálkészlet végzi a kérésen kívül:
+- bélyegkép (THUMB_SIZE, WebP) a dashboardhoz és a listákhoz,
+- tömörített nagyobb változat (MEDIUM_SIZE, WebP és ha a Pillow tudja, AVIF),
+- az elkészült URL-ek rögzítése a Bejelentes soron.
+
+A fájlok a fotótárból (app/storage.py) jönnek és oda kerülnek vissza; a
+származékok kulcsa az eredeti tartalom-kulcsából képzett, így egy
+duplikált feltöltésnél a már meglévő származékokat használjuk újra.
+
+A Pillow opcionális: ha nincs telepítve, a feldolgozás kimarad, és minden
+felület az eredeti fotót mutatja.
+"""
+from __future__ import annotations
+
+import io
+import logging
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app import cache, changefeed
+from app.database import SessionLocal
+from app.models import Bejelentes
+from app.storage import derived_key, get_storage
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # pragma: no cover - opcionális függőség
+    Image = None
+
+
+log = logging.getLogger(__name__)
+
+ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff", ".heic", ".avif"}
+
+THUMB_SIZE = 320
+MEDIUM_SIZE = 1280
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+WORKERS = int(os.environ.get("IMAGE_WORKERS", "2"))
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def is_allowed_filename(filename: str) -> bool:
+    return Path(filename).suffix.lower() in ALLOWED_EXTENSIONS
+
+
+def extension_for(filename: str) -> str:
+    ext = Path(filename).suffix.lower()
+    return ".jpg" if ext == ".jpeg" else ext
+
+
+def _avif_supported() -> bool:
+    return Image is not None and features.check("avif")
+
+
+ORIENTATION = 0x0112
+
+# JPEG: ezek a szegmensek maradnak ki (APP1 EXIF/XMP, APP13 IPTC, COM)
+_APP1_METADATA = (b"Exif\x00\x00", b"http://ns.adobe.com/xap/1.0/", b"http://ns.adobe.com/xmp/extension/")
+_JPEG_DROP = (0xED, 0xFE)
+# PNG: metaadat chunkok (az iCCP marad)
+_PNG_DROP = {b"eXIf", b"tEXt", b"iTXt", b"zTXt", b"tIME"}
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _orientation_exif(orientation: int) -> bytes | None:
+    """Csak a tájolást tartalmazó EXIF blokk, vagy None, ha nem kell."""
+    if orientation in (None, 1):
+        return None
+    exif = Image.Exif()
+    exif[ORIENTATION] = orientation
+    return exif.tobytes()
+
+
+def _strip_jpeg(data: bytes, orientation: int) -> bytes | None:
+    """A metaadat szegmensek nélküli JPEG (a képadat bájtra azonos), None, ha hibás."""
+    out = [data[:2]]
+    pos = 2
+    while True:
+        if pos + 4 > len(data) or data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:  # kitöltő bájt
+            pos += 1
+            continue
+        if marker in (0xDA, 0xD9):  # SOS: innentől a képadat
+            out.append(data[pos:])
+            break
+        length = int.from_bytes(data[pos + 2:pos + 4], "big")
+        segment = data[pos:pos + 2 + length]
+        if len(segment) != 2 + length:
+            return None
+        if not (marker in _JPEG_DROP or (marker == 0xE1 and segment[4:].startswith(_APP1_METADATA))):
+            out.append(segment)
+        pos += 2 + length
+
+    exif = _orientation_exif(orientation)
+    if exif is not None:
+        # a JFIF APP0-nak elsőnek kell maradnia
+        at = 2 if len(out) > 2 and out[1][1] == 0xE0 else 1
+        out.insert(at, b"\xff\xe1" + (len(exif) + 2).to_bytes(2, "big") + exif)
+    return b"".join(out)
+
+
+def _png_chunk(kind: bytes, body: bytes) -> bytes:
+    return len(body).to_bytes(4, "big") + kind + body + zlib.crc32(kind + body).to_bytes(4, "big")
+
+
+def _strip_png(data: bytes, orientation: int) -> bytes | None:
+    """A metaadat chunkok nélküli PNG (a képadat bájtra azonos), None, ha hibás."""
+    out = [_PNG_SIGNATURE]
+    pos = len(_PNG_SIGNATURE)
+    while True:
+        if pos + 12 > len(data):
+            return None
+        length = int.from_bytes(data[pos:pos + 4], "big")
+        kind = data[pos + 4:pos + 8]
+        chunk = data[pos:pos + 12 + length]
+        if len(chunk) != 12 + length:
+            return None
+        if kind not in _PNG_DROP:
+            out.append(chunk)
+        pos += 12 + length
+        if kind == b"IHDR":
+            exif = _orientation_exif(orientation)
+            if exif is not None:
+                out.append(_png_chunk(b"eXIf", exif[6:]))
+        if kind == b"IEND":
+            return b"".join(out)
+
+
+def _reencode(img, orientation: int) -> bytes:
+    # a többi formátum: újrakódolás, az ICC profillal és a tájolással
+    params = {}
+    if img.info.get("icc_profile"):
+        params["icc_profile"] = img.info["icc_profile"]
+    exif = _orientation_exif(orientation)
+    if exif is not None:
+        params["exif"] = exif
+    buf = io.BytesIO()
+    img.save(buf, format=img.format, **params)
+    return buf.getvalue()
+
+
+def _strip_metadata(data: bytes) -> bytes | None:
+    """Metaadat nélküli példány (ugyanabban a formátumban), vagy None, ha nem kell / nem kép."""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            exif = img.getexif()
+            orientation = exif.get(ORIENTATION, 1)
+            if img.format == "JPEG":
+                clean = _strip_jpeg(data, orientation)
+            elif img.format == "PNG":
+                clean = _strip_png(data, orientation)
+            elif set(exif) - {ORIENTATION} or img.info.get("xmp"):
+                clean = _reencode(img, orientation)
+            else:
+                clean = None
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    # a már tiszta fájl (pl. egy korábbi tisztítás eredménye) változatlan marad
+    return clean if clean != data else None
+
+
+def _clean_stream(stream):
+    """A feltöltés metaadat nélküli változata (BytesIO), vagy None, ha nem kell / nem kép."""
+    if Image is None:
+        return None
+    start = stream.tell()
+    try:
+        clean = _strip_metadata(stream.read())
+    finally:
+        stream.seek(start)
+    return io.BytesIO(clean) if clean is not None else None
+
+
+def save_upload(storage, stream, ext: str) -> tuple[str, bool]:
+    """
+    Feltöltött fotó a fotótárba, metaadatok nélkül (storage.save_stream).
+    A stream legyen seekelhető.
+    """
+    clean = _clean_stream(stream)
+    return storage.save_stream(clean if clean is not None else stream, ext)
+
+
+def _derivative(img, size: int, fmt: str, quality: int, icc: bytes | None = None) -> bytes:
+    copy = img.copy()
+    copy.thumbnail((size, size))
+    # save() metaadatot csak kérésre ír, így a származékok "tiszták";
+    # az ICC profil a helyes színekhez kell (konvertált színtérnél már nem érvényes)
+    params = {"icc_profile": icc} if icc and copy.mode in ("RGB", "RGBA") else {}
+    if copy.mode not in ("RGB", "RGBA"):
+        copy = copy.convert("RGBA" if "transparency" in copy.info else "RGB")
+    buf = io.BytesIO()
+    copy.save(buf, format=fmt, quality=quality, **params)
+    return buf.getvalue()
+
+
+def _derivative_specs() -> dict:
+    """mező -> (kulcs utótag, méret, formátum, minőség)"""
+    specs = {
+        "foto_thumb_url": ("thumb.webp", THUMB_SIZE, "WEBP", WEBP_QUALITY),
+        "foto_webp_url": (f"{MEDIUM_SIZE}.webp", MEDIUM_SIZE, "WEBP", WEBP_QUALITY),
+    }
+    if _avif_supported():
+        specs["foto_avif_url"] = (f"{MEDIUM_SIZE}.avif", MEDIUM_SIZE, "AVIF", AVIF_QUALITY)
+    return specs
+
+
+def process_photo(foto_url: str) -> dict:
+    """
+    Elkészíti a származékokat. Visszatérés: a Bejelentes mezőinek új értékei
+    (üres dict, ha nincs Pillow vagy a fájl nem kép); egy még metaadatos
+    eredetinél a tiszta példány új foto_url-je is.
+    """
+    if Image is None:
+        return {}
+
+    storage = get_storage()
+    key = storage.key_for_url(foto_url)
+    if key is None:
+        return {}
+
+    specs = _derivative_specs()
+    keys = {field: derived_key(key, spec[0]) for field, spec in specs.items()}
+
+    # ugyanez a tartalom már fel volt dolgozva (duplikált feltöltés)
+    if all(storage.exists(k) for k in keys.values()):
+        return {field: storage.url(k) for field, k in keys.items()}
+
+    try:
+        with storage.open(key) as f:
+            data = f.read()
+        result = {}
+        clean = _strip_metadata(data)
+        if clean is not None:
+            # save_upload előtti, még metaadatos eredeti: a tiszta példány
+            # saját tartalom-kulcsot kap, a régi kulcsot nem írjuk felül
+            key, _ = storage.save_stream(io.BytesIO(clean), Path(key).suffix)
+            keys = {field: derived_key(key, spec[0]) for field, spec in specs.items()}
+            result["foto_url"] = storage.url(key)
+
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+            icc = img.info.get("icc_profile")
+            upright = ImageOps.exif_transpose(img)
+            for field, (_, size, fmt, quality) in specs.items():
+                storage.put_bytes(keys[field], _derivative(upright, size, fmt, quality, icc))
+                result[field] = storage.url(keys[field])
+        return result
+    except (OSError, Image.DecompressionBombError) as e:
+        log.warning("Fotó feldolgozása sikertelen (%s): %s", foto_url, e)
+        return {}
+
+
+def _run(bejelentes_id: int, foto_url: str) -> None:
+    values = process_photo(foto_url)
+    if not values:
+        return
+    db = SessionLocal()
+    try:
+        (
+            db.query(Bejelentes)
+            .filter(Bejelentes.bejelentesID == bejelentes_id)
+            .update(values, synchronize_session=False)
+        )
+        # a listák a bélyegkép URL-jét is mutatják
+        changefeed.record(db, [bejelentes_id])
+        cache.invalidate(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        log.exception("Fotó származékok mentése sikertelen (bejelentes %s)", bejelentes_id)
+    finally:
+        db.close()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # lustán jön létre, így gunicorn fork után minden worker a sajátját kapja
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="foto")
+        return _executor
+
+
+def submit(bejelentes_id: int, foto_url: str):
+    """Feldolgozás ütemezése a háttérben (a commit után hívandó)."""
+    return _get_executor().submit(_run, bejelentes_id, foto_url)
+
+
+def process_pending(db, batch_size: int = 100) -> int:
+    """Szinkron feldolgozás a még származék nélküli fotókra (visszatöltéshez)."""
+    total = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(Bejelentes.bejelentesID, Bejelentes.foto_url)
+            .filter(
+                Bejelentes.bejelentesID > last_id,
+                Bejelentes.foto_url != None,
+                Bejelentes.foto_thumb_url == None,
+            )
+            .order_by(Bejelentes.bejelentesID)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return total
+        for bejelentes_id, foto_url in batch:
+            _run(bejelentes_id, foto_url)
+            total += 1
+        last_id = batch[-1].bejelentesID
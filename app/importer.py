@@ -0,0 +1,447 @@
+# app/importer.py
+"""
+Régi bejelentések (és fotóik) tömeges betöltése CSV-ből vagy JSONL-ből
+(tools/import_reports.py).
+
+Bemenet: az export (app/export.py) oszlopai, CSV-ben ("," vagy ";"
+elválasztó, fejléccel) vagy soronként egy JSON objektumként. A
+bejelentesID-t és az ismeretlen oszlopokat figyelmen kívül hagyjuk. A
+"foto" / "foto_url" mező lehet
+- helyi fájl (abszolút, vagy a --foto-dir-hez képest): átmásoljuk a
+  tartalom-címzett fotótárba (app/storage.py), és elkészülnek a
+  származékai (app/images.py)
+- már a fotótárban lévő URL: csak a származékok készülnek el
+- http(s):// URL: változatlanul marad
+
+Minden sort ugyanazokkal a szabályokkal ellenőrzünk, mint a Bejelentes
+tábla CHECK megszorításai (és az oszlophosszak); a hibás sorok a hibaokkal
+egy JSONL fájlba kerülnek, a betöltés megy tovább.
+
+A beírás kötegenként (IMPORT_BATCH_SIZE) egy tranzakció: executemany
+(insertmanyvalues), PostgreSQL-en psycopg2-vel COPY ... FROM STDIN. A
+kiegészítő adatok ugyanazok, mint a beküldésnél: geohash, cim_kulcs,
+kereso_szoveg és keresési index, geokódolás a címjegyzékből
+(app/geocode.py), napi statisztika, változásnapló, cache verzió, és a
+duplikátumok összekapcsolása (app/duplicates.py). Ez utóbbi a köteg beírása
+után, időrendben fut, és csak korábbi bejelentést választ eredetinek (az
+időablak a bejelentés saját dátumához képest számít); a kötegek között is
+akkor a legpontosabb, ha a forrás időrendben van. Soronként egy-két indexelt
+lekérdezés; DUPLIKATUM_KERESES=off mellett kimarad.
+
+A fotók egy folyamatkészletben (ProcessPoolExecutor) készülnek, egy köteggel
+előre: amíg az egyik köteg az adatbázisba íródik, a következő fotói már
+feldolgozás alatt vannak.
+
+Folytatás megszakítás után: minden commit után a checkpoint fájlba kerül a
+forrás következő rekordjának bájtpozíciója. Minden rekord determinisztikus
+ingest_token-t kap (forrás azonosító + rekord sorszám), így a commit és a
+checkpoint mentése közti megszakítás, vagy ugyanannak a fájlnak az újbóli
+betöltése sem okoz dupla sort.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import insert, select
+
+from app import cache, changefeed, duplicates, geo, geocode, images, ingest, search, stats
+from app.models import Bejelentes, KeresesiIndex
+from app.routes.admin import PRIORITASOK, STATUSZOK
+from app.storage import get_storage
+
+
+BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "5000"))
+FORMATS = ("csv", "jsonl")
+
+# a bemenet mezői (az export oszlopai, a foto_url helyett "foto" is)
+TEXT_FIELDS = ("cim", "leiras", "statusz", "prioritas", "hulladek_tipus", "mennyiseg")
+
+# a beírt oszlopok (a COPY oszloplistája is)
+COLUMNS = (
+    "datum_ido", "cim", "koord_szel", "koord_hossz", "geohash", "leiras", "kereso_szoveg",
+    "foto_url", "foto_thumb_url", "foto_webp_url", "foto_avif_url", "ingest_token", "cim_kulcs",
+    "geokod", "statusz", "prioritas", "hulladek_tipus", "mennyiseg",
+)
+
+_TOKEN_NAMESPACE = uuid.UUID("0b6c3d55-0f6e-4a57-9a3e-6b1c1f3e2a10")
+
+
+# ---- bemenet ----
+
+class Source:
+    """A bemeneti fájl rekordjai, mindegyik a következő rekord bájtpozíciójával."""
+
+    def __init__(self, path: str, fmt: str | None = None):
+        self.path = os.path.abspath(path)
+        if fmt is None:
+            fmt = "jsonl" if Path(path).suffix.lower() in (".jsonl", ".ndjson", ".json") else "csv"
+        if fmt not in FORMATS:
+            raise ValueError(f"Ismeretlen formátum: {fmt}")
+        self.format = fmt
+        self.size = os.path.getsize(self.path)
+        self.pos = 0
+
+    def _lines(self, f, first: bool):
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            self.pos = f.tell()
+            # UTF-8 BOM csak a fájl elején lehet
+            yield line.decode("utf-8-sig" if first else "utf-8")
+            first = False
+
+    def records(self, offset: int = 0, record_no: int = 0):
+        """(rekord sorszám, következő bájtpozíció, nyers dict vagy hibaüzenet)"""
+        with open(self.path, "rb") as f:
+            if self.format == "jsonl":
+                f.seek(offset)
+                for line in self._lines(f, first=offset == 0):
+                    if not line.strip():
+                        continue
+                    record_no += 1
+                    try:
+                        raw = json.loads(line)
+                    except ValueError as e:
+                        raw = f"hibás JSON: {e}"
+                    else:
+                        if not isinstance(raw, dict):
+                            raw = "a sor nem JSON objektum"
+                    yield record_no, self.pos, raw
+                return
+
+            header = f.readline().decode("utf-8-sig")
+            delimiter = ";" if header.count(";") > header.count(",") else ","
+            fields = [h.strip() for h in next(csv.reader([header], delimiter=delimiter))]
+            f.seek(max(offset, f.tell()))
+            # a csv.reader csak a rekordhoz szükséges sorokat kéri le, így a
+            # pozíció minden rekord után a következő elejére mutat
+            for values in csv.reader(self._lines(f, first=False), delimiter=delimiter):
+                if not any(values):
+                    continue
+                record_no += 1
+                if len(values) != len(fields):
+                    yield record_no, self.pos, f"{len(values)} mező a fejléc {len(fields)} mezője helyett"
+                    continue
+                yield record_no, self.pos, dict(zip(fields, values))
+
+
+# ---- ellenőrzés ----
+
+def _text(raw: dict, name: str) -> str | None:
+    v = raw.get(name)
+    if v is None:
+        return None
+    v = str(v).strip()
+    if not v:
+        return None
+    limit = Bejelentes.__table__.c[name].type.length
+    if limit is not None and len(v) > limit:
+        raise ValueError(f"{name}: legfeljebb {limit} karakter lehet")
+    return v
+
+
+def _coordinate(raw: dict, name: str) -> float | None:
+    # ugyanaz az ellenőrzés, mint beküldéskor (app/ingest.py)
+    return ingest.parse_coordinate(raw.get(name), name)
+
+
+def _datum_ido(raw: dict) -> datetime:
+    v = raw.get("datum_ido")
+    if v is None or not str(v).strip():
+        raise ValueError("datum_ido: hiányzik")
+    try:
+        d = datetime.fromisoformat(str(v).strip())
+    except ValueError:
+        raise ValueError("datum_ido: nem ISO dátum (ÉÉÉÉ-HH-NN[ óó:pp[:mm]])") from None
+    if d.tzinfo is not None:
+        # a táblában UTC idő van, időzóna nélkül
+        d = d.astimezone(timezone.utc).replace(tzinfo=None)
+    return d
+
+
+def validate(raw: dict) -> dict:
+    """
+    A rekord oszlopértékei a Bejelentes CHECK megszorításai szerint
+    ellenőrizve (ValueError a hibaokkal). A "foto" mező a kimenetben is
+    "foto", a fotó feldolgozás előtt.
+    """
+    row = {name: _text(raw, name) for name in TEXT_FIELDS}
+    row["datum_ido"] = _datum_ido(raw)
+    row["koord_szel"] = _coordinate(raw, "koord_szel")
+    row["koord_hossz"] = _coordinate(raw, "koord_hossz")
+    row["statusz"] = row["statusz"] or "beérkezett"
+    if row["statusz"] not in STATUSZOK:
+        raise ValueError(f"statusz: {', '.join(STATUSZOK)} egyike lehet")
+    if row["prioritas"] is not None and row["prioritas"] not in PRIORITASOK:
+        raise ValueError(f"prioritas: üres, vagy {', '.join(PRIORITASOK)} egyike lehet")
+    if row["cim"] is None and (row["koord_szel"] is None or row["koord_hossz"] is None):
+        raise ValueError("cím vagy mindkét koordináta szükséges")
+    foto = raw.get("foto") or raw.get("foto_url")
+    row["foto"] = str(foto).strip() if foto and str(foto).strip() else None
+    return row
+
+
+# ---- fotók (a folyamatkészletben) ----
+
+def store_photo(foto: str, foto_dir: str | None, derivatives: bool) -> tuple[dict, str | None]:
+    """
+    A fotó a fotótárba (helyi fájl esetén) és a származékai.
+    Visszatérés: (Bejelentes mezők, hibaüzenet vagy None).
+    """
+    if foto.startswith(("http://", "https://")):
+        return {"foto_url": foto}, None
+    storage = get_storage()
+    if storage.key_for_url(foto) is not None:
+        url = foto
+    else:
+        path = Path(foto)
+        if not path.is_absolute() and foto_dir:
+            path = Path(foto_dir) / path
+        if not images.is_allowed_filename(path.name):
+            return {}, f"fotó: nem képfájl ({foto})"
+        try:
+            with open(path, "rb") as f:
+                key, _ = images.save_upload(storage, f, images.extension_for(path.name))
+        except OSError as e:
+            return {}, f"fotó: {e}"
+        url = storage.url(key)
+    fields = {"foto_url": url}
+    if derivatives:
+        fields.update(images.process_photo(url))
+    return fields, None
+
+
+# ---- checkpoint ----
+
+def load_checkpoint(path: str, source: Source) -> dict:
+    state = {"forras": source.path, "offset": 0, "rekord": 0,
+             "beirt": 0, "mar_megvolt": 0, "elutasitott": 0, "foto_hibak": 0}
+    if not os.path.exists(path):
+        return state
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)
+    if saved.get("forras") != source.path:
+        raise ValueError(f"A checkpoint egy másik forráshoz tartozik: {saved.get('forras')}")
+    if saved.get("offset", 0) > source.size:
+        raise ValueError("A forrásfájl rövidebb, mint a checkpoint pozíciója (megváltozott?)")
+    state.update(saved)
+    return state
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ---- beírás ----
+
+def _use_copy(db) -> bool:
+    dialect = db.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+
+def _copy_value(v):
+    if isinstance(v, datetime):
+        return v.isoformat(sep=" ")
+    return v
+
+
+def _copy(db, rows: list[dict]) -> None:
+    """COPY ... FROM STDIN (CSV) a session tranzakciójában."""
+    preparer = db.get_bind().dialect.identifier_preparer
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for r in rows:
+        # az üres, idézőjel nélküli mező NULL (üres szöveg nem kerül a sorokba)
+        writer.writerow([_copy_value(r[c]) for c in COLUMNS])
+    buf.seek(0)
+    sql = (
+        f"COPY {preparer.format_table(Bejelentes.__table__)} "
+        f"({', '.join(preparer.quote(c) for c in COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    )
+    with db.connection().connection.driver_connection.cursor() as cur:
+        cur.copy_expert(sql, buf)
+
+
+def _insert(db, rows: list[dict], use_copy: bool) -> dict[str, int]:
+    """A sorok beírása; visszatérés: ingest_token -> bejelentesID."""
+    table = Bejelentes.__table__
+    if not use_copy:
+        # insertmanyvalues: több soros INSERT ... RETURNING, nagy kötegekben
+        return dict(db.connection().execute(
+            insert(table).returning(table.c.ingest_token, table.c.bejelentesID),
+            [{c: r[c] for c in COLUMNS} for r in rows],
+        ).all())
+    _copy(db, rows)
+    tokens = [r["ingest_token"] for r in rows]
+    return dict(db.connection().execute(
+        select(table.c.ingest_token, table.c.bejelentesID).where(table.c.ingest_token.in_(tokens))
+    ).all())
+
+
+def _index(db, rows: list[dict], ids: dict[str, int]) -> None:
+    """Invertált keresési index (nem PostgreSQL-en, mint search.index_bejelentes)."""
+    if search._use_trigram():
+        return
+    entries = []
+    for r in rows:
+        counts = Counter(r["_tokens"])
+        entries.extend(
+            {"szo": tok, "bejelentesID": ids[r["ingest_token"]], "gyakorisag": n}
+            for tok, n in counts.items()
+        )
+    if entries:
+        db.connection().execute(insert(KeresesiIndex), entries)
+
+
+class Importer:
+    """Egy forrásfájl betöltése checkpointtal (lásd a modul leírását)."""
+
+    def __init__(self, db, source: Source, checkpoint_path: str, rejects_path: str, *,
+                 source_id: str | None = None, batch_size: int = BATCH_SIZE, foto_dir: str | None = None,
+                 workers: int | None = None, derivatives: bool = True, use_copy: bool | None = None):
+        self.db = db
+        self.source = source
+        self.checkpoint_path = checkpoint_path
+        self.rejects_path = rejects_path
+        self.source_id = source_id or Path(source.path).name
+        self.batch_size = batch_size
+        self.foto_dir = foto_dir
+        self.workers = workers
+        self.derivatives = derivatives
+        self.use_copy = _use_copy(db) if use_copy is None else use_copy
+        self.state = load_checkpoint(checkpoint_path, source)
+
+    def token(self, record_no: int) -> str:
+        return str(uuid.uuid5(_TOKEN_NAMESPACE, f"{self.source_id}:{record_no}"))
+
+    def _batches(self):
+        batch = []
+        for rec in self.source.records(self.state["offset"], self.state["rekord"]):
+            batch.append(rec)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _prepare(self, pool, batch) -> dict:
+        """Ellenőrzés, a már beírt rekordok kiszűrése, a fotók elküldése a készletbe."""
+        rows, rejects = [], []
+        for record_no, _, raw in batch:
+            if isinstance(raw, str):
+                rejects.append({"rekord": record_no, "hiba": raw})
+                continue
+            try:
+                row = validate(raw)
+            except ValueError as e:
+                rejects.append({"rekord": record_no, "hiba": str(e), "adat": raw})
+                continue
+            row["ingest_token"] = self.token(record_no)
+            row["_rekord"] = record_no
+            rows.append(row)
+
+        tokens = [r["ingest_token"] for r in rows]
+        done = set(self.db.connection().execute(
+            select(Bejelentes.ingest_token).where(Bejelentes.ingest_token.in_(tokens))
+        ).scalars()) if tokens else set()
+        # a tranzakció ne maradjon nyitva, amíg a fotókra várunk
+        self.db.rollback()
+        skipped = len(rows)
+        rows = [r for r in rows if r["ingest_token"] not in done]
+        skipped -= len(rows)
+
+        photos = [
+            (r, pool.submit(store_photo, r["foto"], self.foto_dir, self.derivatives))
+            for r in rows if r["foto"]
+        ]
+        return {"rows": rows, "rejects": rejects, "photos": photos, "skipped": skipped,
+                "offset": batch[-1][1], "rekord": batch[-1][0]}
+
+    def _finish(self, prepared: dict) -> None:
+        """Fotó eredmények, kiegészítő oszlopok, beírás + commit, majd a checkpoint."""
+        db = self.db
+        rows, rejects = prepared["rows"], prepared["rejects"]
+        foto_hibak = 0
+        for r, fut in prepared["photos"]:
+            fields, error = fut.result()
+            r.update(fields)
+            if error:
+                foto_hibak += 1
+                # a bejelentés fotó nélkül is bekerül
+                rejects.append({"rekord": r["_rekord"], "hiba": error, "figyelmeztetes": True})
+
+        address_only = [r["cim"] for r in rows if r["koord_szel"] is None or r["koord_hossz"] is None]
+        found = geocode.coordinates_for(db, address_only) if address_only else {}
+        for r in rows:
+            for field in ("foto_url", "foto_thumb_url", "foto_webp_url", "foto_avif_url"):
+                r.setdefault(field, None)
+            r["geokod"] = None
+            if (r["koord_szel"] is None or r["koord_hossz"] is None) and r["cim"] in found:
+                r["koord_szel"], r["koord_hossz"], r["geokod"] = found[r["cim"]]
+            r["geohash"] = geo.geohash_for(r["koord_szel"], r["koord_hossz"])
+            # egy tokenizálás soronként: ugyanaz, mint duplicates.address_key
+            # és search.document_text (a szöveg tokenjei a cím + leírás tokenjei)
+            cim_tokens = search.tokenize(r["cim"])
+            r["_tokens"] = cim_tokens + search.tokenize(r["leiras"])
+            r["cim_kulcs"] = " ".join(cim_tokens)[:255] or None
+            r["kereso_szoveg"] = " ".join(r["_tokens"]) or None
+
+        if rows:
+            ids = _insert(db, rows, self.use_copy)
+            _index(db, rows, ids)
+            duplicates.link_inserted(db, [
+                (ids[r["ingest_token"]], r["cim_kulcs"], r["koord_szel"], r["koord_hossz"], r["datum_ido"], r["geokod"])
+                for r in rows
+            ])
+            stats.apply(db, Counter(
+                stats.key_of(r["datum_ido"], r["statusz"], r["prioritas"], r["hulladek_tipus"]) for r in rows
+            ))
+            changefeed.record(db, ids.values())
+            cache.invalidate(db)
+        db.commit()
+
+        if rejects:
+            with open(self.rejects_path, "a", encoding="utf-8") as f:
+                for rej in rejects:
+                    f.write(json.dumps(rej, ensure_ascii=False, default=str) + "\n")
+        self.state["offset"] = prepared["offset"]
+        self.state["rekord"] = prepared["rekord"]
+        self.state["beirt"] += len(rows)
+        self.state["mar_megvolt"] += prepared["skipped"]
+        self.state["elutasitott"] += sum(1 for r in rejects if not r.get("figyelmeztetes"))
+        self.state["foto_hibak"] += foto_hibak
+        save_checkpoint(self.checkpoint_path, self.state)
+
+    def run(self, progress=None) -> dict:
+        """
+        A betöltés a checkpointtól a fájl végéig. `progress(state)` minden
+        köteg commitja után hívódik. Visszatérés: a checkpoint állapota.
+        """
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = None
+            for batch in self._batches():
+                prepared = self._prepare(pool, batch)
+                if pending is not None:
+                    self._finish(pending)
+                    if progress:
+                        progress(self.state)
+                pending = prepared
+            if pending is not None:
+                self._finish(pending)
+                if progress:
+                    progress(self.state)
+        return self.state
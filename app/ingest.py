@@ -0,0 +1,407 @@
+# app/ingest.py
+"""
+Bejelentések beírása, szinkron vagy sorbanálló (spool) módban.
+
+INGEST_MODE=sync (alapértelmezett): a kérés maga írja be a bejelentést.
+
+INGEST_MODE=queue: a kérés csak validál (check_payload, a Bejelentes CHECK
+megszorításai szerint), és a bejelentést egy helyi, tartós SQLite spoolba
+teszi (WAL, synchronous=FULL), majd azonnal válaszol.
+Egy háttérszál kötegekben (INGEST_BATCH_SIZE) üríti a spoolt; ha nincs
+elég sor, legfeljebb INGEST_FLUSH_INTERVAL másodpercet vár. Egy köteg egy
+tranzakció, több soros INSERT-tel.
+
+Összeomlás utáni helyreállítás: a writer egy köteget csak "kölcsönvesz"
+(claimed_at); ha a folyamat a commit előtt meghal, a kölcsön LEASE_S után
+lejár, és egy másik writer újra felveszi. Minden tételnek egyedi
+ingest_token-je van, amit a Bejelentes sor is megkap (egyedi index), így a
+már beírt, de a spoolból még nem törölt tételek nem íródnak be kétszer –
+akkor sem, ha egy lassú köteg kölcsöne a commit előtt lejár, és két writer
+egyszerre írná be: a második IntegrityError-t kap, és a tételt már
+beírtnak veszi. A sosem beírható tételek (érvénytelen adat, CHECK hiba)
+újrapróbálás nélkül a spool_dead táblába kerülnek.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app import cache, changefeed, duplicates, geo, geocode, images, search, stats
+from app.database import SessionLocal, local_state_path
+from app.models import Bejelentes
+
+
+log = logging.getLogger(__name__)
+
+MODE = os.environ.get("INGEST_MODE", "sync")
+SPOOL_PATH = os.environ.get("INGEST_SPOOL") or local_state_path("spool.sqlite")
+BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "200"))
+FLUSH_INTERVAL_S = float(os.environ.get("INGEST_FLUSH_INTERVAL", "0.5"))
+LEASE_S = 60.0
+MAX_ATTEMPTS = 5
+# a tétel maga hibás: egyedül beírva sem sikerül, újrapróbálás nélkül spool_dead
+PERMANENT_ERRORS = (IntegrityError, DataError, KeyError, TypeError, ValueError)
+
+_local = threading.local()
+_writer: threading.Thread | None = None
+_writer_pid: int | None = None
+_writer_lock = threading.Lock()
+
+# folyamaton belüli számlálók (a spool mélysége / késése a spoolból jön)
+_stats = {"beirt": 0, "kotegek": 0, "hibas_kotegek": 0, "elhagyott": 0, "utolso_koteg_ms": 0.0}
+_stats_lock = threading.Lock()
+
+
+# ---- közös beíró út (szinkron és spool mód) ----
+
+COORDINATE_LIMITS = {"koord_szel": 90, "koord_hossz": 180}
+CIM_MAX_LEN = Bejelentes.__table__.c.cim.type.length
+
+
+def parse_coordinate(v, name: str) -> float | None:
+    """
+    A Bejelentes CHECK tartománya szerint ellenőrzött koordináta (ValueError a
+    hibaokkal); üres érték -> None. A beküldés, a spool és az importer közös
+    ellenőrzése.
+    """
+    if v is None or (isinstance(v, str) and not v.strip()):
+        return None
+    limit = COORDINATE_LIMITS[name]
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: nem szám") from None
+    if not math.isfinite(f) or not -limit <= f <= limit:
+        raise ValueError(f"{name}: -{limit} és {limit} között kell lennie")
+    return round(f, 6)
+
+
+def check_payload(p: dict) -> None:
+    """ValueError, ha a tétel sosem írható be (a CHECK megszorítások és az oszlophossz szerint)."""
+    koord_szel = parse_coordinate(p.get("koord_szel"), "koord_szel")
+    koord_hossz = parse_coordinate(p.get("koord_hossz"), "koord_hossz")
+    if not p.get("cim") and (koord_szel is None or koord_hossz is None):
+        raise ValueError("cím vagy mindkét koordináta szükséges")
+    if p.get("cim") and len(p["cim"]) > CIM_MAX_LEN:
+        raise ValueError(f"cim: legfeljebb {CIM_MAX_LEN} karakter lehet")
+
+
+def new_payload(cim, koord_szel, koord_hossz, leiras, foto_url) -> dict:
+    """Egy beküldés tétele; ValueError, ha érvénytelen (még a spool előtt)."""
+    p = {
+        "token": str(uuid.uuid4()),
+        "datum_ido": datetime.utcnow().isoformat(),
+        "cim": cim or None,
+        "koord_szel": parse_coordinate(koord_szel, "koord_szel"),
+        "koord_hossz": parse_coordinate(koord_hossz, "koord_hossz"),
+        "leiras": leiras or None,
+        "foto_url": foto_url,
+    }
+    check_payload(p)
+    return p
+
+
+def _to_bejelentes(p: dict) -> Bejelentes:
+    check_payload(p)
+    return Bejelentes(
+        datum_ido=datetime.fromisoformat(p["datum_ido"]),
+        cim=p["cim"],
+        koord_szel=p["koord_szel"],
+        koord_hossz=p["koord_hossz"],
+        geohash=geo.geohash_for(p["koord_szel"], p["koord_hossz"]),
+        leiras=p["leiras"],
+        foto_url=p["foto_url"],
+        ingest_token=p["token"],
+        statusz="beérkezett",
+    )
+
+
+def insert_batch(db, payloads: list[dict], retry: bool = True) -> list[Bejelentes]:
+    """
+    Beírja a még nem beírt tételeket (ingest_token szerint), commitol, és
+    elvégzi a commit utáni teendőket. Visszatérés: az új sorok.
+    """
+    try:
+        items = _insert_new(db, payloads)
+    except IntegrityError:
+        db.rollback()
+        if not retry:
+            raise
+        # egy másik writer (lejárt kölcsön) közben beírta valamelyik tételt:
+        # az egyedi ingest_token index miatt az a sor már megvan, a többit
+        # még egyszer próbáljuk
+        log.info("Párhuzamosan beírt spool tétel, a köteg újrapróbálása")
+        return insert_batch(db, payloads, retry=False)
+
+    for b in items:
+        if b.foto_url:
+            images.submit(b.bejelentesID, b.foto_url)
+    return items
+
+
+def _insert_new(db, payloads: list[dict]) -> list[Bejelentes]:
+    tokens = [p["token"] for p in payloads]
+    done = {
+        t for (t,) in db.query(Bejelentes.ingest_token).filter(Bejelentes.ingest_token.in_(tokens))
+    }
+    items = [_to_bejelentes(p) for p in payloads if p["token"] not in done]
+    if not items:
+        return []
+
+    # csak címmel beküldött bejelentés: koordináta a helyi címjegyzékből
+    # (app/geocode.py), még a duplikátum-keresés előtt
+    geocode.fill_missing(db, items)
+
+    # cim_kulcs + duplikátum-keresés (app/duplicates.py)
+    pending = duplicates.link_new(db, items)
+
+    # a flush egy több soros INSERT ... RETURNING-ként megy (insertmanyvalues)
+    db.add_all(items)
+    db.flush()
+    for dup, original in pending:
+        dup.kanonikusID = original.bejelentesID
+    for b in items:
+        search.index_bejelentes(db, b, replace=False)
+    stats.record_new(db, items)
+    changefeed.record(db, [b.bejelentesID for b in items])
+    cache.invalidate(db)
+    db.commit()
+    return items
+
+
+# ---- spool ----
+
+def _spool():
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "pid", None) != os.getpid():
+        conn = sqlite3.connect(SPOOL_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " payload TEXT NOT NULL,"
+            " enqueued_at REAL NOT NULL,"
+            " claimed_at REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS spool_dead ("
+            " id INTEGER PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " enqueued_at REAL NOT NULL,"
+            " failed_at REAL NOT NULL)"
+        )
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+
+def enqueue(payload: dict) -> None:
+    """ValueError, ha a tétel nem írható be – az ilyen tétel a spoolba sem kerül."""
+    check_payload(payload)
+    _spool().execute(
+        "INSERT INTO spool (payload, enqueued_at) VALUES (?, ?)",
+        (json.dumps(payload), time.time()),
+    )
+    ensure_writer()
+
+
+def _claim(limit: int) -> list[tuple[int, dict]]:
+    conn = _spool()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            "SELECT id, payload FROM spool"
+            " WHERE claimed_at IS NULL OR claimed_at < ?"
+            " ORDER BY id LIMIT ?",
+            (now - LEASE_S, limit),
+        ).fetchall()
+        if rows:
+            conn.executemany(
+                "UPDATE spool SET claimed_at = ? WHERE id = ?",
+                [(now, r[0]) for r in rows],
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return [(r[0], json.loads(r[1])) for r in rows]
+
+
+def _ack(ids: list[int]) -> None:
+    _spool().executemany("DELETE FROM spool WHERE id = ?", [(i,) for i in ids])
+
+
+def _release(ids: list[int]) -> None:
+    """Sikertelen tételek visszaadása; MAX_ATTEMPTS után a spool_dead táblába kerülnek."""
+    conn = _spool()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            "UPDATE spool SET claimed_at = NULL, attempts = attempts + 1 WHERE id = ?",
+            [(i,) for i in ids],
+        )
+        dead = [
+            i for (i,) in conn.execute("SELECT id FROM spool WHERE attempts >= ?", (MAX_ATTEMPTS,))
+        ]
+        _move_dead(conn, dead)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    _count_dead(dead)
+
+
+def _dead(ids: list[int]) -> None:
+    """Sosem beírható tételek: újrapróbálás nélkül a spool_dead táblába."""
+    conn = _spool()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _move_dead(conn, ids)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    _count_dead(ids)
+
+
+def _move_dead(conn, ids: list[int]) -> None:
+    if not ids:
+        return
+    now = time.time()
+    conn.executemany(
+        "INSERT INTO spool_dead (id, payload, enqueued_at, failed_at)"
+        " SELECT id, payload, enqueued_at, ? FROM spool WHERE id = ?",
+        [(now, i) for i in ids],
+    )
+    conn.executemany("DELETE FROM spool WHERE id = ?", [(i,) for i in ids])
+
+
+def _count_dead(ids: list[int]) -> None:
+    if ids:
+        log.error("%d spool tétel véglegesen sikertelen (spool_dead)", len(ids))
+        with _stats_lock:
+            _stats["elhagyott"] += len(ids)
+
+
+def _write(claimed: list[tuple[int, dict]]) -> int:
+    """Visszatérés: a commitolt új sorok száma (a már beírt tételek nélkül)."""
+    db = SessionLocal()
+    try:
+        return len(insert_batch(db, [p for _, p in claimed]))
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def drain_once(limit: int = BATCH_SIZE) -> int:
+    """Egy köteg feldolgozása. Visszatérés: a spoolból kivett tételek száma."""
+    claimed = _claim(limit)
+    if not claimed:
+        return 0
+
+    started = time.monotonic()
+    # a validáció nélkül (régebben) spoolba került, érvénytelen tételek ne
+    # buktassák el a köteget
+    valid = []
+    invalid = []
+    for item in claimed:
+        try:
+            check_payload(item[1])
+        except (KeyError, TypeError, ValueError):
+            log.warning("Érvénytelen spool tétel: %r", item[1])
+            invalid.append(item[0])
+        else:
+            valid.append(item)
+    _dead(invalid)
+
+    written = 0
+    try:
+        if valid:
+            written = _write(valid)
+            _ack([i for i, _ in valid])
+    except Exception:
+        log.exception("Spool köteg beírása sikertelen, tételenként próbáljuk")
+        with _stats_lock:
+            _stats["hibas_kotegek"] += 1
+        # egy hibás tétel ne akassza el a többit
+        for item in valid:
+            try:
+                written += _write([item])
+                _ack([item[0]])
+            except PERMANENT_ERRORS:
+                # a tétel maga hibás (pl. CHECK megszorítás): újrapróbálni felesleges
+                log.exception("Spool tétel véglegesen sikertelen: %r", item[1])
+                _dead([item[0]])
+            except Exception:
+                _release([item[0]])
+
+    with _stats_lock:
+        _stats["beirt"] += written
+        _stats["kotegek"] += 1
+        _stats["utolso_koteg_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return len(claimed)
+
+
+def drain_all() -> int:
+    total = 0
+    while True:
+        n = drain_once()
+        if not n:
+            return total
+        total += n
+
+
+def _writer_loop() -> None:
+    while True:
+        try:
+            # tele köteg esetén azonnal jön a következő, különben várunk
+            if drain_once() < BATCH_SIZE:
+                time.sleep(FLUSH_INTERVAL_S)
+        except Exception:
+            log.exception("Spool writer hiba")
+            time.sleep(max(FLUSH_INTERVAL_S, 1.0))
+
+
+def ensure_writer() -> None:
+    """Elindítja a háttér writert ebben a folyamatban (fork után újra)."""
+    global _writer, _writer_pid
+    if MODE != "queue":
+        return
+    with _writer_lock:
+        if _writer is not None and _writer_pid == os.getpid() and _writer.is_alive():
+            return
+        _writer = threading.Thread(target=_writer_loop, name="ingest-writer", daemon=True)
+        _writer_pid = os.getpid()
+        _writer.start()
+
+
+def queue_stats() -> dict:
+    """Spool mélység és késés (minden workerre közös) + a folyamat számlálói."""
+    conn = _spool()
+    depth, oldest = conn.execute("SELECT COUNT(*), MIN(enqueued_at) FROM spool").fetchone()
+    (dead,) = conn.execute("SELECT COUNT(*) FROM spool_dead").fetchone()
+    with _stats_lock:
+        stats = dict(_stats)
+    stats.update({
+        "mod": MODE,
+        "sor_hossz": depth,
+        "keses_s": round(time.time() - oldest, 3) if oldest else 0.0,
+        "sikertelen": dead,
+        "koteg_meret": BATCH_SIZE,
+        "flush_intervallum_s": FLUSH_INTERVAL_S,
+    })
+    return stats
@@ -2,19 +2,24 @@
 from __future__ import annotations
 
 import os
+import time
 from flask import Flask
 
-from app.database import engine
-from app.models import Base
+from app import ingest, metrics, querylog, replica, serialize, startup
+from app.database import get_engine
+from app.schema import ensure_schema
 from app.routes.public import public_bp
 from app.routes.admin import admin_bp
+from app.routes.media import media_bp
 
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    # hiányzó táblák + meglévő táblákra utólag felvett indexek
+    ensure_schema(get_engine())
 
 
 def create_app() -> Flask:
+    started = time.perf_counter()
     app = Flask(
         __name__,
         template_folder="templates",
@@ -23,17 +28,41 @@ def create_app() -> Flask:
     app.config["MAX_CONTENT_LENGTH"] = 10 * 1024 * 1024  # 10MB
     app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev-secret-change-me")
 
+    querylog.init_app(app)
+    metrics.init_app(app)
+    replica.init_app(app)
+    serialize.init_app(app)
+
     app.register_blueprint(public_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(media_bp)
 
     if os.environ.get("AUTO_CREATE_TABLES") == "1":
-        init_db()
+        # gunicorn alatt egyszer, a mesterben (app/startup.py)
+        startup.check_schema_once()
+
+    startup.configure_templates(app)
+    if startup.PRECOMPILE:
+        startup.precompile_templates(app)
 
+    # INGEST_MODE=queue: a háttér writer (fork után a workerekben is újraindul);
+    # a gunicorn mesterében nem, ott a workerek indítják (startup.worker_ready)
+    if not startup.in_master():
+        ingest.ensure_writer()
+
+    startup.app_created(started)
     return app
 
-app = create_app()
+
+def __getattr__(name):
+    # `gunicorn app.main:app`: az alkalmazás az első hozzáféréskor épül fel,
+    # nem már az importáláskor
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
     init_db()
-    app.run(debug=True)
+    create_app().run(debug=True)
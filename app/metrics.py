@@ -0,0 +1,346 @@
+# app/metrics.py
+"""
+Prometheus szöveges formátumú metrikák a /metrics végponton.
+
+Minden folyamat (gunicorn worker) a saját mmap-elt fájljába ír a METRICS_DIR
+könyvtárban (alapértelmezés: a gép ideiglenes könyvtárában, adatbázisonként
+külön); a /metrics bármelyik workerben az összes fájlt összegzi. Így a
+számlálók a workerek között is helyesek, és a kérésenkénti költség néhány
+memóriaírás, zár a folyamatok között nincs.
+
+Gyűjtött metrikák:
+- zold_http_requests_total{endpoint,method,status}
+- zold_http_request_errors_total{endpoint,method,status} (5xx)
+- zold_http_request_duration_seconds{endpoint,method,status} hisztogram
+- zold_db_queries_total / zold_db_time_seconds_total{endpoint} (app/querylog.py)
+- zold_upload_bytes_total / zold_uploads_total{tarolas="uj"|"duplikalt"}
+- zold_login_rejected_total{kulcs="ip"|"nev"} (app/ratelimit.py)
+- zold_worker_startup_seconds hisztogram (app/startup.py)
+- zold_db_pool_size / _checked_out / _overflow (gauge), zold_db_pool_checkouts_total,
+  zold_db_pool_wait_seconds_total, zold_db_pool_timeouts_total (app/querylog.py):
+  a workerek kapcsolat-pooljai összegezve; egy worker legfeljebb
+  POOL_REFRESH_S-enként, a kérés végén írja be a saját értékeit
+
+A leállt workerek fájljai megmaradnak (a számlálóik így nem csökkennek, a
+gauge értékeik viszont kimaradnak az összegből); a könyvtárat az
+alkalmazás teljes újraindításakor érdemes üríteni.
+
+METRICS=off kikapcsolja a gyűjtést és a végpontot.
+"""
+from __future__ import annotations
+
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from flask import Response, g, request
+
+from app import querylog
+from app.database import local_state_path
+
+
+ENABLED = os.environ.get("METRICS", "on") != "off"
+METRICS_DIR = os.environ.get("METRICS_DIR") or local_state_path("metrics")
+
+POOL_REFRESH_S = 1.0
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+# név -> (típus, leírás)
+METRICS = {
+    "zold_http_requests_total": ("counter", "HTTP kérések száma."),
+    "zold_http_request_errors_total": ("counter", "5xx válaszok száma."),
+    "zold_http_request_duration_seconds": ("histogram", "Kérés feldolgozási ideje (mp)."),
+    "zold_db_queries_total": ("counter", "Lefutott SQL utasítások száma."),
+    "zold_db_time_seconds_total": ("counter", "SQL utasításokban töltött idő (mp)."),
+    "zold_upload_bytes_total": ("counter", "Feltöltött fotók mérete (bájt)."),
+    "zold_uploads_total": ("counter", "Feltöltött fotók száma."),
+    "zold_login_rejected_total": ("counter", "Korlátozás miatt elutasított belépési kísérletek."),
+    "zold_worker_startup_seconds": ("histogram", "Worker indulási ideje a forktól a forgalom fogadásáig (mp)."),
+    "zold_db_pool_size": ("gauge", "A kapcsolat-poolok alapmérete (a workerek összege)."),
+    "zold_db_pool_checked_out": ("gauge", "Foglalt pool kapcsolatok (a workerek összege)."),
+    "zold_db_pool_overflow": ("gauge", "Az alapméreten felül nyitott kapcsolatok (a workerek összege)."),
+    "zold_db_pool_checkouts_total": ("counter", "Kapcsolatszerzések a poolból."),
+    "zold_db_pool_wait_seconds_total": ("counter", "Szabad pool kapcsolatra várt idő (mp)."),
+    "zold_db_pool_timeouts_total": ("counter", "Pool időtúllépések (nem jutott kapcsolat)."),
+}
+
+
+class ProcessFile:
+    """
+    Egy folyamat számlálói egy mmap-elt fájlban.
+
+    Felépítés: 8 bájt fejléc (a használt bájtok száma), utána bejegyzések:
+    [kulcs hossza u32][kulcs utf-8, 8 bájtra kiegészítve][érték f64].
+    Új bejegyzésnél a fejlécet írjuk utoljára, így az olvasó csak teljes
+    bejegyzéseket lát.
+    """
+
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = os.fstat(self._fd).st_size
+        if size < self.INITIAL_SIZE:
+            os.ftruncate(self._fd, self.INITIAL_SIZE)
+            size = self.INITIAL_SIZE
+        self._mm = mmap.mmap(self._fd, size)
+        self._used = struct.unpack_from("<Q", self._mm, 0)[0] or 8
+        self._offsets = {key: offset for key, offset, _ in _entries(self._mm, self._used)}
+
+    def _grow(self, needed: int) -> None:
+        size = len(self._mm)
+        while size < needed:
+            size *= 2
+        self._mm.close()
+        os.ftruncate(self._fd, size)
+        self._mm = mmap.mmap(self._fd, size)
+
+    def _add(self, key: str) -> int:
+        raw = key.encode("utf-8")
+        padded = len(raw) + (-(4 + len(raw)) % 8)
+        entry = 4 + padded + 8
+        if self._used + entry > len(self._mm):
+            self._grow(self._used + entry)
+        pos = self._used
+        struct.pack_into(f"<I{padded}s", self._mm, pos, len(raw), raw)
+        offset = pos + 4 + padded
+        struct.pack_into("<d", self._mm, offset, 0.0)
+        self._used += entry
+        struct.pack_into("<Q", self._mm, 0, self._used)
+        self._offsets[key] = offset
+        return offset
+
+    def inc(self, key: str, amount: float) -> None:
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._add(key)
+        value = struct.unpack_from("<d", self._mm, offset)[0]
+        struct.pack_into("<d", self._mm, offset, value + amount)
+
+    def set(self, key: str, value: float) -> None:
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._add(key)
+        struct.pack_into("<d", self._mm, offset, float(value))
+
+
+def _entries(buf, used: int):
+    """(kulcs, érték offset, érték) hármasok egy fájl tartalmából."""
+    pos = 8
+    while pos + 4 <= used:
+        (length,) = struct.unpack_from("<I", buf, pos)
+        padded = length + (-(4 + length) % 8)
+        key = bytes(buf[pos + 4:pos + 4 + length]).decode("utf-8")
+        offset = pos + 4 + padded
+        yield key, offset, struct.unpack_from("<d", buf, offset)[0]
+        pos = offset + 8
+
+
+_file: ProcessFile | None = None
+_file_pid: int | None = None
+_lock = threading.Lock()
+_pool_refreshed = 0.0
+
+
+_keys: dict = {}
+
+
+def _key(name: str, labels: dict) -> str:
+    # a json kódolás a drága rész; a címke-kombinációk száma kicsi
+    cache_key = (name, *labels.items())
+    key = _keys.get(cache_key)
+    if key is None:
+        key = _keys[cache_key] = json.dumps([name, labels], sort_keys=True, ensure_ascii=False)
+    return key
+
+
+def _process_file() -> ProcessFile:
+    """A _lock alatt hívandó."""
+    global _file, _file_pid
+    # fork után minden worker saját fájlt kap
+    if _file is None or _file_pid != os.getpid():
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _file = ProcessFile(os.path.join(METRICS_DIR, f"metrics-{os.getpid()}.db"))
+        _file_pid = os.getpid()
+    return _file
+
+
+def inc(name: str, labels: dict, amount: float = 1.0) -> None:
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _process_file().inc(key, amount)
+
+
+def set_value(name: str, labels: dict, value: float) -> None:
+    """Gauge, vagy egy máshol (pl. a poolban) számolt, folyamaton belüli összeg."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _process_file().set(key, value)
+
+
+def _refresh_pool(force: bool = False) -> None:
+    global _pool_refreshed
+    now = time.monotonic()
+    if not force and now - _pool_refreshed < POOL_REFRESH_S:
+        return
+    _pool_refreshed = now
+    for name, value in querylog.pool_metrics().items():
+        set_value(name, {}, value)
+
+
+def observe(name: str, labels: dict, value: float) -> None:
+    """Hisztogram: a bucketeket nem kumulálva tároljuk (kérésenként egy írás)."""
+    le = next(b for b in BUCKETS if value <= b)
+    inc(name + "_bucket", {**labels, "le": _fmt(le)})
+    inc(name + "_sum", labels, value)
+
+
+def count_upload(nbytes: int, is_new: bool) -> None:
+    labels = {"tarolas": "uj" if is_new else "duplikalt"}
+    inc("zold_upload_bytes_total", labels, nbytes)
+    inc("zold_uploads_total", labels)
+
+
+# ---- kiírás ----
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    v = float(v)
+    return str(int(v)) if v.is_integer() and abs(v) < 1e15 else repr(v)
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OverflowError):
+        return True
+    return True
+
+
+def _is_gauge(key: str) -> bool:
+    return METRICS.get(json.loads(key)[0], ("counter",))[0] == "gauge"
+
+
+def collect() -> dict:
+    """
+    Az összes folyamat fájljának összege: {(név, címkék json): érték}.
+    A gauge értékek csak a még futó folyamatokból számítanak.
+    """
+    totals = defaultdict(float)
+    for path in glob.glob(os.path.join(METRICS_DIR, "metrics-*.db")):
+        try:
+            with open(path, "rb") as f:
+                buf = f.read()
+        except OSError:
+            continue
+        if len(buf) < 8:
+            continue
+        pid = Path(path).stem.rsplit("-", 1)[-1]
+        alive = not pid.isdigit() or _alive(int(pid))
+        used = min(struct.unpack_from("<Q", buf, 0)[0], len(buf))
+        for key, _, value in _entries(buf, used):
+            if alive or not _is_gauge(key):
+                totals[key] += value
+    return totals
+
+
+def render() -> str:
+    by_name = defaultdict(list)
+    for key, value in collect().items():
+        name, labels = json.loads(key)
+        by_name[name].append((labels, value))
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind != "histogram":
+            for labels, value in sorted(by_name.get(name, []), key=lambda x: sorted(x[0].items())):
+                lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+            continue
+
+        # bucketek kumulálása címke-kombinációnként
+        series = defaultdict(dict)
+        for labels, value in by_name.get(name + "_bucket", []):
+            le = labels.pop("le")
+            series[json.dumps(labels, sort_keys=True)][le] = value
+        sums = {json.dumps(l, sort_keys=True): v for l, v in by_name.get(name + "_sum", [])}
+        for skey in sorted(series):
+            labels = json.loads(skey)
+            running = 0.0
+            for b in BUCKETS:
+                running += series[skey].get(_fmt(b), 0.0)
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': _fmt(b)})} {_fmt(running)}")
+            lines.append(f"{name}_sum{_labels(labels)} {sums.get(skey, 0.0)!r}")
+            lines.append(f"{name}_count{_labels(labels)} {_fmt(running)}")
+    return "\n".join(lines) + "\n"
+
+
+# ---- Flask ----
+
+def _start():
+    g.metrics_start = time.perf_counter()
+
+
+def _finish(response):
+    started = g.pop("metrics_start", None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    labels = {
+        # útvonal helyett endpoint: a 404-ek nem növelik a címkék számát
+        "endpoint": request.endpoint or "nincs",
+        "method": request.method,
+        "status": str(response.status_code),
+    }
+    inc("zold_http_requests_total", labels)
+    if response.status_code >= 500:
+        inc("zold_http_request_errors_total", labels)
+    observe("zold_http_request_duration_seconds", labels, elapsed)
+    _refresh_pool()
+
+    st = querylog.request_stats()
+    if st and st["queries"]:
+        endpoint = {"endpoint": labels["endpoint"]}
+        inc("zold_db_queries_total", endpoint, st["queries"])
+        inc("zold_db_time_seconds_total", endpoint, st["time_ms"] / 1000)
+    return response
+
+
+def metrics_view():
+    # a kiszolgáló worker saját pool értékei frissen
+    _refresh_pool(force=True)
+    return Response(render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app) -> None:
+    if not ENABLED:
+        return
+    app.before_request(_start)
+    app.after_request(_finish)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
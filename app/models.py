@@ -6,12 +6,15 @@ from datetime import datetime
 from sqlalchemy import (
     CheckConstraint,
     Column,
+    Date,
     DateTime,
     DECIMAL,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    text,
 )
 from sqlalchemy.orm import declarative_base, relationship
 
@@ -46,9 +49,29 @@ class Bejelentes(Base):
     cim = Column(String(255), nullable=True)
     koord_szel = Column(DECIMAL(9, 6), nullable=True)
     koord_hossz = Column(DECIMAL(9, 6), nullable=True)
+    # térbeli index (app/geo.py), koordináta nélküli sornál NULL
+    geohash = Column(String(12), nullable=True)
 
     leiras = Column(Text, nullable=True)
+    # normalizált cím + leírás a kereséshez (app/search.py)
+    kereso_szoveg = Column(Text, nullable=True)
     foto_url = Column(String(500), nullable=True)
+    # háttérben készülő származékok (app/images.py), addig NULL
+    foto_thumb_url = Column(String(500), nullable=True)
+    foto_webp_url = Column(String(500), nullable=True)
+    foto_avif_url = Column(String(500), nullable=True)
+
+    # beküldési azonosító a sorbanálló (spool) feldolgozáshoz (app/ingest.py)
+    ingest_token = Column(String(36), nullable=True)
+
+    # duplikátum-felismerés (app/duplicates.py): normalizált cím, és ha a
+    # bejelentés egy másik duplikátuma, annak azonosítója
+    cim_kulcs = Column(String(255), nullable=True)
+    kanonikusID = Column(Integer, ForeignKey("Bejelentes.bejelentesID"), nullable=True)
+
+    # ha a koordináták a címből, a helyi címjegyzékből származnak
+    # (app/geocode.py): azok pontossága ("pontos", "becsult", "utca", "telepules")
+    geokod = Column(String(10), nullable=True)
 
     statusz = Column(String(15), nullable=False, default="beérkezett")
     prioritas = Column(String(15), nullable=True)
@@ -76,6 +99,36 @@ class Bejelentes(Base):
             "(cim IS NOT NULL) OR (koord_szel IS NOT NULL AND koord_hossz IS NOT NULL)",
             name="CK_Bejelentes_check_location",
         ),
+        # lapozás: ORDER BY datum_ido DESC, bejelentesID DESC
+        Index("IX_Bejelentes_datum_ido_id", "datum_ido", "bejelentesID"),
+        # dashboard: statusz == ... + dátum tartomány / lapozás
+        Index("IX_Bejelentes_statusz_datum_ido", "statusz", "datum_ido", "bejelentesID"),
+        # dashboard: lat/lng doboz
+        Index("IX_Bejelentes_koord", "koord_szel", "koord_hossz"),
+        # sugaras / viewport keresés geohash prefix tartományokkal
+        Index("IX_Bejelentes_geohash", "geohash"),
+        # szabadszavas keresés PostgreSQL-en (pg_trgm); máshol a KeresesiIndex tábla
+        Index(
+            "IX_Bejelentes_kereso_trgm",
+            "kereso_szoveg",
+            postgresql_using="gin",
+            postgresql_ops={"kereso_szoveg": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        # spool újrajátszásnál ne legyen dupla beírás: egy párhuzamos writer
+        # (lejárt kölcsön) második INSERT-je IntegrityError-t kap; szűrt index,
+        # mert az MSSQL a NULL-t is csak egyszer engedné egy egyedi indexben
+        Index(
+            "IX_Bejelentes_ingest_token",
+            "ingest_token",
+            unique=True,
+            mssql_where=text("ingest_token IS NOT NULL"),
+            postgresql_where=text("ingest_token IS NOT NULL"),
+            sqlite_where=text("ingest_token IS NOT NULL"),
+        ),
+        # duplikátum-keresés azonos (normalizált) címre, időablakon belül
+        Index("IX_Bejelentes_cim_kulcs_datum_ido", "cim_kulcs", "datum_ido"),
+        # egy bejelentés duplikátumai
+        Index("IX_Bejelentes_kanonikusID", "kanonikusID"),
     )
 
     modositasok = relationship("Modositas", back_populates="bejelentes")
@@ -100,7 +153,126 @@ class Modositas(Base):
             "mezo IN ('státusz', 'prioritás', 'hulladék tipus', 'mennyiség')",
             name="CK_Modositas_mezo",
         ),
+        # egy bejelentés története időrendben
+        Index("IX_Modositas_bejelentesID_datum_ido", "bejelentesID", "datum_ido"),
+        # módosítás-napló lapozása
+        Index("IX_Modositas_datum_ido_id", "datum_ido", "modositasiID"),
+        # SQLite-on AUTOINCREMENT nélkül a legnagyobb ID az archiválás
+        # (app/archive.py) után újra kiosztható, és az archívumba másolás
+        # elsődleges kulcs ütközést adna; a többi adatbázis nem oszt ki újra
+        {"sqlite_autoincrement": True},
     )
 
     bejelentes = relationship("Bejelentes", back_populates="modositasok")
     adminisztrator = relationship("Adminisztrator", back_populates="modositasok")
+
+
+class ModositasArchiv(Base):
+    """
+    A régi módosítások (app/archive.py): ugyanazok az oszlopok és azonosítók,
+    mint a Modositas táblában, idegen kulcs és CHECK nélkül.
+    """
+
+    __tablename__ = "ModositasArchiv"
+
+    modositasiID = Column(Integer, primary_key=True, autoincrement=False)
+    bejelentesID = Column(Integer, nullable=False)
+    adminID = Column(Integer, nullable=False)
+    datum_ido = Column(DateTime, nullable=False)
+    mezo = Column(String(20), nullable=False)
+    regi_ertek = Column(String(200), nullable=True)
+    uj_ertek = Column(String(200), nullable=False)
+
+    __table_args__ = (
+        Index("IX_ModositasArchiv_bejelentesID_datum_ido", "bejelentesID", "datum_ido"),
+        Index("IX_ModositasArchiv_datum_ido_id", "datum_ido", "modositasiID"),
+    )
+
+
+class Valtozas(Base):
+    """
+    Változásnapló a dashboard élő frissítéséhez (app/changefeed.py): minden
+    commitolt bejelentés-létrehozás / -módosítás egy sor. Rövid ideig őrizzük.
+    """
+
+    __tablename__ = "Valtozas"
+
+    valtozasID = Column(Integer, primary_key=True, autoincrement=True)
+    bejelentesID = Column(Integer, nullable=False)
+    datum_ido = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("IX_Valtozas_datum_ido", "datum_ido"),
+    )
+
+
+class KeresesiIndex(Base):
+    """Invertált index (szó -> bejelentés) a nem PostgreSQL adatbázisokhoz."""
+
+    __tablename__ = "KeresesiIndex"
+
+    szo = Column(String(64), primary_key=True)
+    bejelentesID = Column(Integer, ForeignKey("Bejelentes.bejelentesID"), primary_key=True)
+    gyakorisag = Column(Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        Index("IX_KeresesiIndex_bejelentesID", "bejelentesID"),
+    )
+
+
+class CacheVerzio(Base):
+    """Válasz-cache verziószámok (app/cache.py, RESPONSE_CACHE=db módban)."""
+
+    __tablename__ = "CacheVerzio"
+
+    nev = Column(String(50), primary_key=True)
+    verzio = Column(Integer, nullable=False, default=0)
+
+
+class Statisztika(Base):
+    """
+    Előre összesített darabszámok (app/stats.py): a bejelentés napja és
+    jelenlegi státusz / prioritás / hulladéktípus szerint. A NULL értéket ""
+    jelöli, mert elsődleges kulcs része.
+    """
+
+    __tablename__ = "Statisztika"
+
+    nap = Column(Date, primary_key=True)
+    statusz = Column(String(15), primary_key=True)
+    prioritas = Column(String(15), primary_key=True)
+    hulladek_tipus = Column(String(50), primary_key=True)
+    darab = Column(Integer, nullable=False, default=0)
+
+
+class Cimjegyzek(Base):
+    """
+    A helyi címjegyzék (gazetteer) a geokódoláshoz (app/geocode.py), normalizált
+    kulcsokkal. Utca nélküli sor: a település, házszám nélküli: az utca pontja.
+    """
+
+    __tablename__ = "Cimjegyzek"
+
+    cimjegyzekID = Column(Integer, primary_key=True, autoincrement=True)
+    telepules = Column(String(100), nullable=False)
+    utca = Column(String(150), nullable=True)
+    hazszam = Column(Integer, nullable=True)
+    koord_szel = Column(DECIMAL(9, 6), nullable=False)
+    koord_hossz = Column(DECIMAL(9, 6), nullable=False)
+
+    __table_args__ = (
+        # pontos cím, házszám-tartomány (becslés) és utca / település prefix
+        Index("IX_Cimjegyzek_cim", "telepules", "utca", "hazszam"),
+    )
+
+
+class GeokodCache(Base):
+    """Normalizált cím -> koordináta (NULL: a címjegyzékben nem található)."""
+
+    __tablename__ = "GeokodCache"
+
+    kulcs = Column(String(255), primary_key=True)
+    koord_szel = Column(DECIMAL(9, 6), nullable=True)
+    koord_hossz = Column(DECIMAL(9, 6), nullable=True)
+    pontossag = Column(String(10), nullable=True)
+    datum_ido = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,80 @@
+# app/pagination.py
+"""
+Keyset (cursor) pagination a (datum_ido, id) páron.
+
+A kliens egy átlátszatlan `next` tokent kap, amit a következő kérésben
+`cursor` paraméterként küld vissza. OFFSET nincs: minden oldal egy
+indexelhető "kisebb mint az utolsó sor" feltétel, így a 100. oldal
+ugyanannyiba kerül, mint az első.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(datum_ido: datetime | str, row_id: int) -> str:
+    # szöveg: a driver nyers értéke (app/serialize.py), ISO alakú
+    ts = datum_ido if isinstance(datum_ido, str) else datum_ido.isoformat()
+    raw = json.dumps([ts, int(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[datetime, int]:
+    """ValueError-t dob, ha a token sérült vagy nem tőlünk származik."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        ts, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+
+def parse_page_size(raw: str | None, default: int, maximum: int = MAX_PAGE_SIZE) -> int:
+    if not raw:
+        return default
+    try:
+        n = int(raw)
+    except ValueError:
+        return default
+    return max(1, min(n, maximum))
+
+
+def keyset_page(query, ts_col, id_col, cursor: str | None, limit: int, session=None):
+    """
+    Egy oldal a (ts_col DESC, id_col DESC) sorrendben.
+
+    `query` egy ORM query, vagy – `session` megadásakor – egy Core select(),
+    amit a session kapcsolata futtat (oszlop-projekciós listák, app/serialize.py).
+
+    Visszatérés: (sorok, next_token) – next_token None, ha nincs több sor.
+    A sorokból a ts/id értékeket attribútumnévvel olvassuk ki, így ORM
+    objektumokra és Core sorokra is működik.
+    """
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            ts_col < ts,
+            and_(ts_col == ts, id_col < row_id),
+        ))
+
+    query = query.order_by(ts_col.desc(), id_col.desc()).limit(limit + 1)
+    if session is not None:
+        # Core végrehajtás a session kapcsolatán: az ORM betöltő réteg nélkül
+        rows = session.connection().execute(query).all()
+    else:
+        rows = query.all()
+
+    next_token = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_token = encode_cursor(getattr(last, ts_col.key), getattr(last, id_col.key))
+
+    return rows, next_token
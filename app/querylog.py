@@ -0,0 +1,176 @@
+# app/querylog.py
+"""
+Kérésenkénti SQL mérés és pool állapot.
+
+Az engine cursor-eseményeiből kérésenként gyűjtjük:
+- a lefutott utasítások számát,
+- az összes adatbázisidőt,
+- a leglassabb utasítást,
+- a pool-ból való kapcsolatszerzésre várt időt (TimedQueuePool).
+
+Kimenetek:
+- debug módban (vagy DB_QUERY_HEADERS=1) X-DB-* válaszfejlécek (X-DB-Route:
+  elsődleges vagy replika),
+- DB_SLOW_QUERY_MS feletti utasítások WARNING szintű logja (háttérszálakban is),
+- pool_status(): a pool mérete, foglalt / túlcsordult kapcsolatok, várakozás,
+  a /admin/db/allapot végponton; ugyanezek workerenként a /metrics-en is
+  (pool_metrics, app/metrics.py).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.database import TimedQueuePool, get_engine
+
+
+log = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.environ.get("DB_SLOW_QUERY_MS", "500"))
+HEADERS = os.environ.get("DB_QUERY_HEADERS") == "1"
+MAX_LOGGED_SQL = 500
+
+_totals = {"queries": 0, "db_time_s": 0.0, "slow_queries": 0}
+_totals_lock = threading.Lock()
+
+
+def _short(statement: str) -> str:
+    s = " ".join(statement.split())
+    return s if len(s) <= MAX_LOGGED_SQL else s[:MAX_LOGGED_SQL] + "…"
+
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    slow = elapsed * 1000 >= SLOW_QUERY_MS
+
+    with _totals_lock:
+        _totals["queries"] += 1
+        _totals["db_time_s"] += elapsed
+        if slow:
+            _totals["slow_queries"] += 1
+
+    if slow:
+        log.warning("Lassú SQL (%.0f ms): %s", elapsed * 1000, _short(statement))
+
+    if has_request_context():
+        st = g.get("db_stats")
+        if st is not None:
+            st["queries"] += 1
+            st["time_s"] += elapsed
+            if elapsed > st["slowest_s"]:
+                st["slowest_s"] = elapsed
+                st["slowest_sql"] = statement
+
+
+def _error(ctx):
+    # hibás utasításnál nincs after_cursor_execute; a kezdőidőt el kell dobni
+    conn = ctx.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+# minden engine-re: az elsődleges lustán jön létre (app/database.py), és a
+# replikák (app/replica.py) is mérve vannak
+event.listen(Engine, "before_cursor_execute", _before)
+event.listen(Engine, "after_cursor_execute", _after)
+event.listen(Engine, "handle_error", _error)
+
+
+def _pool_wait_s() -> float:
+    pool = get_engine().pool
+    return getattr(pool.local, "wait_s", 0.0) if isinstance(pool, TimedQueuePool) else 0.0
+
+
+def _begin_request():
+    g.db_stats = {"queries": 0, "time_s": 0.0, "slowest_s": 0.0, "slowest_sql": None}
+    g.db_pool_wait_start = _pool_wait_s()
+
+
+def request_stats() -> dict | None:
+    """Az aktuális kérés mérései (None, ha nincs mérés)."""
+    st = g.get("db_stats")
+    if st is None:
+        return None
+    return {
+        "queries": st["queries"],
+        "time_ms": round(st["time_s"] * 1000, 2),
+        "slowest_ms": round(st["slowest_s"] * 1000, 2),
+        "slowest_sql": st["slowest_sql"],
+        "pool_wait_ms": round((_pool_wait_s() - g.db_pool_wait_start) * 1000, 2),
+    }
+
+
+def pool_status() -> dict:
+    pool = get_engine().pool
+    status = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, TimedQueuePool):
+        wait = pool.wait_snapshot()
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+            "timeout_s": pool.timeout(),
+            "checkouts": wait["checkouts"],
+            "max_checked_out": wait["max_checkedout"],
+            "wait_total_ms": round(wait["wait_s"] * 1000, 2),
+            "wait_max_ms": round(wait["max_wait_s"] * 1000, 2),
+            "timeouts": wait["timeouts"],
+        })
+    with _totals_lock:
+        status.update({
+            "queries": _totals["queries"],
+            "db_time_ms": round(_totals["db_time_s"] * 1000, 2),
+            "slow_queries": _totals["slow_queries"],
+            "slow_query_ms": SLOW_QUERY_MS,
+        })
+    status["pid"] = os.getpid()
+    return status
+
+
+def pool_metrics() -> dict:
+    """A worker poolja a /metrics-hez: metrika név -> érték (üres, ha nem TimedQueuePool)."""
+    pool = get_engine().pool
+    if not isinstance(pool, TimedQueuePool):
+        return {}
+    wait = pool.wait_snapshot()
+    return {
+        "zold_db_pool_size": pool.size(),
+        "zold_db_pool_checked_out": pool.checkedout(),
+        # a QueuePool a ki nem használt alapméretet negatív túlcsordulásként számolja
+        "zold_db_pool_overflow": max(pool.overflow(), 0),
+        "zold_db_pool_checkouts_total": wait["checkouts"],
+        "zold_db_pool_wait_seconds_total": wait["wait_s"],
+        "zold_db_pool_timeouts_total": wait["timeouts"],
+    }
+
+
+def init_app(app) -> None:
+    app.before_request(_begin_request)
+
+    @app.after_request
+    def _add_headers(response):
+        if not (app.debug or HEADERS):
+            return response
+        st = request_stats()
+        if st is None:
+            return response
+        # streamelt válasznál (export) ez csak a fejlécek elküldéséig mért érték
+        response.headers["X-DB-Queries"] = str(st["queries"])
+        response.headers["X-DB-Time-ms"] = f'{st["time_ms"]:.2f}'
+        response.headers["X-DB-Slowest-ms"] = f'{st["slowest_ms"]:.2f}'
+        response.headers["X-DB-Pool-Wait-ms"] = f'{st["pool_wait_ms"]:.2f}'
+        # olvasási replika használatakor annak neve (app/replica.py)
+        response.headers["X-DB-Route"] = g.get("db_replica") or "primary"
+        return response
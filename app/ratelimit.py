@@ -0,0 +1,264 @@
+# app/ratelimit.py
+"""
+Belépési kísérletek korlátozása (token bucket) IP-cím és felhasználónév szerint.
+
+A check_password_hash szándékosan drága; ha valaki sok névvel / sok
+kéréssel próbálkozik, a hash-elés minden worker CPU-ját lefoglalhatja.
+A korlátozó ezért még az adatbázis-lekérdezés és a hash-elés előtt dönt:
+
+- forrásonként ("ip:<cím>", "nev:<név>") egy vödör, LIMIT tokennel, amely
+  WINDOW_S másodperc alatt töltődik fel teljesen
+- minden kísérlet mindkét vödörből egy tokent fogyaszt; ha bármelyik üres,
+  a kérés 429-et kap (Retry-After), és egyik vödör sem fogy
+- sikeres belépés után a név vödre újra megtelik
+
+Az állapot egy mmap-elt, fix méretű hash táblában van (SLOTS bejegyzés),
+így a gunicorn workerek egy gépen közösen látják; az írás fcntl zár alatt
+történik. Ha a tábla megtelt, a legrégebben használt bejegyzés íródik felül.
+Több gépes telepítésnél a korlátot a proxy előtt is érdemes beállítani.
+
+Beállítások:
+- LOGIN_RATE_LIMIT=off: kikapcsolja a korlátozást
+- LOGIN_LIMIT_IP (20), LOGIN_LIMIT_USER (10): kísérletek ablakonként
+- LOGIN_LIMIT_WINDOW_S (300): a vödör feltöltési ideje
+- LOGIN_PROXY_HOPS (0): ennyi megbízható proxy áll előttünk; ilyenkor az
+  ügyfél címe az X-Forwarded-For lista megfelelő eleme
+- LOGIN_LIMIT_SLOTS (4096), LOGIN_LIMIT_FILE: a tábla mérete, helye
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from flask import request
+
+from app import metrics
+from app.database import local_state_path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+ENABLED = os.environ.get("LOGIN_RATE_LIMIT", "on") != "off"
+WINDOW_S = float(os.environ.get("LOGIN_LIMIT_WINDOW_S", "300"))
+PROXY_HOPS = int(os.environ.get("LOGIN_PROXY_HOPS", "0"))
+SLOTS = int(os.environ.get("LOGIN_LIMIT_SLOTS", "4096"))
+
+# kulcs előtag -> vödör mérete
+LIMITS = {
+    "ip": int(os.environ.get("LOGIN_LIMIT_IP", "20")),
+    "nev": int(os.environ.get("LOGIN_LIMIT_USER", "10")),
+}
+
+# bejegyzés: kulcs hash, tokenek, utolsó frissítés, elutasítások, kulcs hossza,
+# utolsó elutasítás ideje, kulcs (utf-8)
+SLOT = struct.Struct("<QddIId88s")
+PROBE = 16
+
+
+def _hash(key: bytes) -> int:
+    # a 0 az üres bejegyzést jelöli
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") | 1
+
+
+def _capacity(key: str) -> int:
+    return LIMITS.get(key.split(":", 1)[0], LIMITS["ip"])
+
+
+def _refilled(tokens: float, updated: float, capacity: int, now: float) -> float:
+    return min(float(capacity), tokens + (now - updated) * capacity / WINDOW_S)
+
+
+class BucketTable:
+    """Token bucketek egy folyamatok között megosztott mmap-elt fájlban."""
+
+    def __init__(self, path: str, slots: int):
+        self.path = path
+        self.slots = slots
+        self._fd = None
+        self._mm = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _map(self):
+        # fork után újranyitjuk, hogy ne örököljünk fájlleírót a mastertől
+        if self._mm is None or self._pid != os.getpid():
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            size = SLOT.size * self.slots
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._fd = fd
+            self._mm = mmap.mmap(fd, size)
+            self._pid = os.getpid()
+        return self._mm
+
+    def _locked(self, fn):
+        mm = self._map()
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                return fn(mm)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _find(self, mm, key: str, now: float) -> tuple[int, tuple | None]:
+        """(offset, bejegyzés) – a bejegyzés None, ha a kulcs még nincs a táblában."""
+        h = _hash(key.encode("utf-8"))
+        start = h % self.slots
+        victim = None
+        victim_age = None
+        for i in range(PROBE):
+            offset = SLOT.size * ((start + i) % self.slots)
+            entry = SLOT.unpack_from(mm, offset)
+            if entry[0] == h:
+                return offset, entry
+            if entry[0] == 0:
+                return offset, None
+            # a teljesen feltöltött vödör ugyanaz, mintha nem is lenne
+            stored = entry[6][:entry[4]].decode("utf-8", "replace")
+            if _refilled(entry[1], entry[2], _capacity(stored), now) >= _capacity(stored):
+                if victim_age != -1:
+                    victim, victim_age = offset, -1
+            elif victim_age != -1 and (victim_age is None or entry[2] < victim_age):
+                victim, victim_age = offset, entry[2]
+        return victim, None
+
+    def hit(self, keys: list[str], now: float | None = None) -> tuple[float, list[str]]:
+        """
+        Egy kísérlet: ha minden vödörben van token, mindből levon egyet és
+        (0, []) a válasz; különben semmit nem von le, és (várakozás mp, az üres
+        vödrök kulcsai).
+        """
+        now = time.time() if now is None else now
+
+        def apply(mm):
+            found = []
+            for key in keys:
+                offset, entry = self._find(mm, key, now)
+                capacity = _capacity(key)
+                if entry is None:
+                    tokens, rejected, last_rejected = float(capacity), 0, 0.0
+                    # a helyet lefoglaljuk, hogy a következő kulcs ne ugyanide kerüljön
+                    self._write(mm, offset, key, tokens, now, rejected, last_rejected)
+                else:
+                    tokens = _refilled(entry[1], entry[2], capacity, now)
+                    rejected, last_rejected = entry[3], entry[5]
+                found.append((key, offset, capacity, tokens, rejected, last_rejected))
+
+            empty = [f for f in found if f[3] < 1.0]
+            wait = 0.0
+            for key, offset, capacity, tokens, rejected, last_rejected in found:
+                if empty:
+                    if tokens < 1.0:
+                        rejected += 1
+                        last_rejected = now
+                        wait = max(wait, (1.0 - tokens) * WINDOW_S / capacity)
+                else:
+                    tokens -= 1.0
+                self._write(mm, offset, key, tokens, now, rejected, last_rejected)
+            return wait, [f[0] for f in empty]
+
+        return self._locked(apply)
+
+    def reset(self, key: str) -> None:
+        def apply(mm):
+            now = time.time()
+            offset, entry = self._find(mm, key, now)
+            # nem nullázzuk a bejegyzést: az üres hely megszakítaná a próbasort
+            if entry is not None:
+                self._write(mm, offset, key, float(_capacity(key)), now, entry[3], entry[5])
+        self._locked(apply)
+
+    @staticmethod
+    def _write(mm, offset, key, tokens, now, rejected, last_rejected) -> None:
+        raw = key.encode("utf-8")[:SLOT.size - 40]
+        SLOT.pack_into(mm, offset, _hash(key.encode("utf-8")), tokens, now,
+                       rejected, len(raw), last_rejected, raw)
+
+    def entries(self, now: float | None = None) -> list[dict]:
+        now = time.time() if now is None else now
+        mm = self._map()
+        out = []
+        for i in range(self.slots):
+            entry = SLOT.unpack_from(mm, SLOT.size * i)
+            if entry[0] == 0:
+                continue
+            key = entry[6][:entry[4]].decode("utf-8", "replace")
+            capacity = _capacity(key)
+            tokens = _refilled(entry[1], entry[2], capacity, now)
+            out.append({
+                "kulcs": key,
+                "tokenek": round(tokens, 2),
+                "limit": capacity,
+                "korlatozva": tokens < 1.0,
+                "varakozas_s": math.ceil((1.0 - tokens) * WINDOW_S / capacity) if tokens < 1.0 else 0,
+                "elutasitva": entry[3],
+                "utolso_elutasitas": (
+                    time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(entry[5])) if entry[5] else None
+                ),
+            })
+        return out
+
+
+_table = BucketTable(os.environ.get("LOGIN_LIMIT_FILE") or local_state_path("login-limit"), SLOTS)
+
+
+def client_ip() -> str:
+    if PROXY_HOPS > 0:
+        route = request.access_route
+        if len(route) >= PROXY_HOPS:
+            return route[-PROXY_HOPS]
+    return request.remote_addr or "ismeretlen"
+
+
+def _keys(nev: str) -> list[str]:
+    keys = [f"ip:{client_ip()}"]
+    nev = nev.strip().lower()
+    if nev:
+        keys.append(f"nev:{nev}")
+    return keys
+
+
+def check_login(nev: str) -> float:
+    """
+    Belépési (vagy jelszócsere) kísérlet a jelenlegi kéréshez. 0, ha mehet;
+    különben a Retry-After másodpercben.
+    """
+    if not ENABLED:
+        return 0.0
+    wait, empty = _table.hit(_keys(nev))
+    for key in empty:
+        metrics.inc("zold_login_rejected_total", {"kulcs": key.split(":", 1)[0]})
+    return wait
+
+
+def login_succeeded(nev: str) -> None:
+    if ENABLED and nev.strip():
+        _table.reset(f"nev:{nev.strip().lower()}")
+
+
+def throttled_sources(only_limited: bool = False) -> dict:
+    """Az admin nézethez: a korlátozott / elutasított források, legtöbb elutasítás elöl."""
+    if not ENABLED:
+        return {"bekapcsolva": False, "forrasok": []}
+    rows = [
+        e for e in _table.entries()
+        if e["korlatozva"] or (not only_limited and e["elutasitva"])
+    ]
+    rows.sort(key=lambda e: (not e["korlatozva"], -e["elutasitva"], e["kulcs"]))
+    return {
+        "bekapcsolva": True,
+        "ablak_s": WINDOW_S,
+        "limitek": LIMITS,
+        "korlatozva": sum(1 for e in rows if e["korlatozva"]),
+        "forrasok": rows,
+    }
@@ -0,0 +1,170 @@
+# app/replica.py
+"""
+Olvasási replikák használata a nehéz GET végpontokhoz.
+
+DATABASE_REPLICA_URLS (vesszővel elválasztva) megadásakor a `read_session()`
+a csak olvasó kéréseket (GET / HEAD) egy egészséges replikára köti
+(körbeforgó választással), minden mást az elsődleges adatbázisra. Replika
+nélkül ugyanaz, mint a SessionLocal().
+
+- read-your-writes: egy sikeres író kérés (POST, ...) után az ügyfél
+  sütijében eltároljuk az időpontot, és REPLICA_STICKY_S másodpercig az ő
+  olvasásai is az elsődlegesre mennek, így látja a saját módosítását
+- egészség-ellenőrzés: replikánként legfeljebb HEALTH_INTERVAL_S-enként egy
+  apró lekérdezés (PostgreSQL-en a replikációs késés is; REPLICA_MAX_LAG_S
+  felett a replika kimarad); kapcsolati hiba esetén a replika azonnal kiesik,
+  és a következő sikeres ellenőrzésig minden az elsődlegesre megy
+- a válasz-cache (app/cache.py) egy adatváltozás után REPLICA_MAX_LAG_S-ig
+  nem tárol replikáról olvasott választ, hogy ne rögzüljön régi állapot
+
+Helyben két adatbázissal kipróbálható (tools/replica_status.py --sync
+SQLite esetén átmásolja az elsődlegest a replikára).
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request, session
+from sqlalchemy import create_engine, event, exc, select
+
+from app.database import SessionLocal, _pool_options, dispose_after_fork, get_engine
+from app.models import Bejelentes
+
+
+log = logging.getLogger(__name__)
+
+REPLICA_URLS = [u.strip() for u in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+STICKY_S = float(os.environ.get("REPLICA_STICKY_S", "10"))
+MAX_LAG_S = float(os.environ.get("REPLICA_MAX_LAG_S", "10"))
+HEALTH_INTERVAL_S = float(os.environ.get("REPLICA_HEALTH_INTERVAL_S", "5"))
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+STICKY_KEY = "db_iras"
+
+# PostgreSQL standby: 0, ha minden beérkezett WAL-t lejátszott, különben az
+# utolsó lejátszott tranzakció kora; nem standby szerveren NULL
+_PG_LAG_SQL = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    def __init__(self, url: str):
+        if url.startswith("postgres://"):
+            url = url.replace("postgres://", "postgresql://", 1)
+        self.engine = create_engine(url, pool_pre_ping=True, **_pool_options(url))
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.healthy = True
+        self.lag_s = None
+        self.error = None
+        self.checked_at = 0.0
+        self._check_lock = threading.Lock()
+        dispose_after_fork(self.engine)
+        event.listen(self.engine, "handle_error", self._on_error)
+
+    def _on_error(self, ctx) -> None:
+        # kapcsolat megszakadt, vagy a replika nem használható (pl. hiányzó tábla)
+        if ctx.is_disconnect or isinstance(ctx.sqlalchemy_exception, exc.OperationalError):
+            self._mark(False, None, str(ctx.original_exception))
+
+    def _mark(self, healthy: bool, lag_s, error) -> None:
+        if self.healthy and not healthy:
+            log.warning("Replika kiesett (%s): %s", self.name, error)
+        elif healthy and not self.healthy:
+            log.info("Replika újra elérhető (%s)", self.name)
+        self.healthy, self.lag_s, self.error = healthy, lag_s, error
+        self.checked_at = time.monotonic()
+
+    def check(self) -> None:
+        try:
+            with self.engine.connect() as conn:
+                # a séma is olvasható-e (egy üres / félkész replika nem jó)
+                conn.execute(select(Bejelentes.bejelentesID).limit(1)).all()
+                lag = None
+                if self.engine.dialect.name == "postgresql":
+                    lag = conn.exec_driver_sql(_PG_LAG_SQL).scalar()
+                    lag = float(lag) if lag is not None else None
+        except exc.DBAPIError as e:
+            self._mark(False, None, str(e.orig))
+            return
+        if lag is not None and lag > MAX_LAG_S:
+            self._mark(False, lag, f"replikációs késés: {lag:.1f} mp")
+        else:
+            self._mark(True, lag, None)
+
+    def is_usable(self) -> bool:
+        # egyszerre egy szál ellenőriz; a többi az utolsó eredményt használja
+        if time.monotonic() - self.checked_at >= HEALTH_INTERVAL_S and self._check_lock.acquire(blocking=False):
+            try:
+                self.check()
+            finally:
+                self._check_lock.release()
+        return self.healthy
+
+    def status(self) -> dict:
+        return {
+            "replika": self.name,
+            "egeszseges": self.healthy,
+            "keses_s": self.lag_s,
+            "hiba": self.error,
+            "ellenorizve_s": round(time.monotonic() - self.checked_at, 1) if self.checked_at else None,
+        }
+
+
+replicas = [Replica(url) for url in REPLICA_URLS]
+_next = itertools.count()
+
+
+def _sticky() -> bool:
+    return time.time() - session.get(STICKY_KEY, 0) < STICKY_S
+
+
+def pick():
+    """Egészséges replika az aktuális kéréshez, vagy None (-> elsődleges)."""
+    if not replicas or not has_request_context():
+        return None
+    if request.method not in SAFE_METHODS or _sticky():
+        return None
+    start = next(_next)
+    for i in range(len(replicas)):
+        r = replicas[(start + i) % len(replicas)]
+        if r.is_usable():
+            return r
+    return None
+
+
+def read_session():
+    """Session csak olvasó munkára: replikán, ha lehet, különben az elsődlegesen."""
+    r = pick()
+    if r is None:
+        return SessionLocal()
+    g.db_replica = r.name
+    return SessionLocal(bind=r.engine)
+
+
+def read_engine():
+    """Engine csak olvasó munkára (pl. export folyam)."""
+    r = pick()
+    if r is None:
+        return get_engine()
+    g.db_replica = r.name
+    return r.engine
+
+
+def status() -> list[dict]:
+    return [r.status() for r in replicas]
+
+
+def _after_request(resp):
+    if replicas and request.method not in SAFE_METHODS and resp.status_code < 400:
+        session[STICKY_KEY] = time.time()
+    return resp
+
+
+def init_app(app) -> None:
+    app.after_request(_after_request)
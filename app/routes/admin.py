@@ -1,15 +1,20 @@
 # app/routes/admin.py
 from __future__ import annotations
 
+import math
 from datetime import datetime
 from functools import wraps
 
-from flask import Blueprint, render_template, request, redirect, flash, url_for, session
+from flask import Blueprint, Response, render_template, request, redirect, flash, url_for, session, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import or_, and_
+from sqlalchemy import and_, func, insert, literal, or_, select, update
 
+from app import archive, cache, changefeed, duplicates, export, ingest, querylog, ratelimit, replica, search, serialize, startup, stats
 from app.database import SessionLocal
-from app.models import Adminisztrator, Bejelentes, Modositas
+from app.filters import dashboard_filters, parse_date
+from app.models import Adminisztrator, Bejelentes, Modositas, ModositasArchiv
+from app.pagination import keyset_page, parse_page_size
+from app.routes.public import bejelentes_to_dict
 from flask import jsonify
 
 
@@ -30,11 +35,21 @@ def admin_page():
     return render_template("admin_login.html")
 
 
+def _throttled(wait: float):
+    flash(f"Túl sok belépési kísérlet. Próbáld újra {math.ceil(wait)} másodperc múlva.", "error")
+    return render_template("admin_login.html"), 429, {"Retry-After": str(math.ceil(wait))}
+
+
 @admin_bp.post("/admin/login")
 def admin_login():
     nev = (request.form.get("nev") or "").strip()
     jelszo = request.form.get("jelszo") or ""
 
+    # még a lekérdezés és a hash-elés előtt
+    wait = ratelimit.check_login(nev)
+    if wait:
+        return _throttled(wait)
+
     db = SessionLocal()
     try:
         admin = db.query(Adminisztrator).filter(Adminisztrator.nev == nev).first()
@@ -65,6 +80,7 @@ def admin_login():
         # siker
         admin.hiba_probalkozasok = 0
         db.commit()
+        ratelimit.login_succeeded(nev)
 
         session["admin_id"] = admin.adminID
         session["admin_nev"] = admin.nev
@@ -83,6 +99,10 @@ def admin_change_password():
     jelszo = request.form.get("jelszo") or ""
     uj_jelszo = request.form.get("uj_jelszo") or ""
 
+    wait = ratelimit.check_login(nev)
+    if wait:
+        return _throttled(wait)
+
     if len(uj_jelszo.strip()) < 8:
         flash("Az új jelszó legyen legalább 8 karakter.", "error")
         return redirect(url_for("admin.admin_page"))
@@ -134,76 +154,176 @@ def admin_logout():
 def dashboard():
     statusz = (request.args.get("statusz") or "").strip()
     hely = (request.args.get("hely") or "").strip()
+    sugar = (request.args.get("sugar") or "").strip()    # méter, "lat,lng" helynél
     date_from = (request.args.get("date_from") or "").strip()  # YYYY-MM-DD
     date_to = (request.args.get("date_to") or "").strip()      # YYYY-MM-DD
+    duplikatumok = (request.args.get("duplikatumok") or "").strip()  # "1": a duplikátumok is
+    cursor = (request.args.get("cursor") or "").strip() or None
+    limit = parse_page_size(request.args.get("limit"), default=300)
 
-    filters = []
+    filters, hibak, post_filter = dashboard_filters(statusz, hely, date_from, date_to, sugar, duplikatumok)
+    for hiba in hibak:
+        flash(hiba, "error")
 
-    if statusz:
-        filters.append(Bejelentes.statusz == statusz)
+    db = replica.read_session()
+    try:
+        # a lekérdezés ELŐTT: az élő frissítés innen folytatja, így ami a
+        # lekérdezés közben változik, az is megérkezik
+        valtozas_cursor = changefeed.head(db)
 
-    # időpont szűrés (nap pontossággal)
-    def parse_date(s):
-        return datetime.strptime(s, "%Y-%m-%d")
+        q = db.query(Bejelentes)
+        if filters:
+            q = q.filter(*filters)
 
-    if date_from:
         try:
-            dtf = parse_date(date_from)
-            filters.append(Bejelentes.datum_ido >= dtf)
+            bejelentesek, next_token = keyset_page(
+                q, Bejelentes.datum_ido, Bejelentes.bejelentesID, cursor, limit
+            )
         except ValueError:
-            flash("Hibás 'date_from' formátum (YYYY-MM-DD).", "error")
+            flash("Érvénytelen lapozási cursor, az első oldalt mutatjuk.", "error")
+            bejelentesek, next_token = keyset_page(
+                q, Bejelentes.datum_ido, Bejelentes.bejelentesID, None, limit
+            )
 
-    if date_to:
-        try:
-            # date_to nap vége: +1 nap, < következő nap
-            dtt = parse_date(date_to)
-            filters.append(Bejelentes.datum_ido < (dtt.replace(hour=0, minute=0, second=0, microsecond=0) ))
-            # (ha akarod, később napvége-logicát finomítjuk)
-        except ValueError:
-            flash("Hibás 'date_to' formátum (YYYY-MM-DD).", "error")
-
-    # helyszín szűrés:
-    # - ha "lat,lng" formátum, akkor koordinátára szűrünk kb. egyezéssel
-    # - különben cím LIKE
-    if hely:
-        if "," in hely:
-            try:
-                lat_s, lng_s = [x.strip() for x in hely.split(",", 1)]
-                lat = float(lat_s)
-                lng = float(lng_s)
-                eps = 0.0005  # ~50m körül (nagyságrend)
-                filters.append(and_(
-                    Bejelentes.koord_szel != None,
-                    Bejelentes.koord_hossz != None,
-                    Bejelentes.koord_szel.between(lat - eps, lat + eps),
-                    Bejelentes.koord_hossz.between(lng - eps, lng + eps),
-                ))
-            except ValueError:
-                filters.append(Bejelentes.cim.ilike(f"%{hely}%"))
-        else:
-            filters.append(Bejelentes.cim.ilike(f"%{hely}%"))
+        # pontos távolság-ellenőrzés; a next_token a szűretlen oldal végéről
+        # jön, így a lapozás ettől nem csúszik el
+        if post_filter:
+            bejelentesek = [b for b in bejelentesek if post_filter(b)]
+
+        page_filters = {
+            "statusz": statusz,
+            "hely": hely,
+            "sugar": sugar,
+            "date_from": date_from,
+            "date_to": date_to,
+            "duplikatumok": duplikatumok,
+        }
+        next_url = None
+        if next_token:
+            next_url = url_for(
+                "admin.dashboard",
+                **{k: v for k, v in page_filters.items() if v},
+                limit=limit,
+                cursor=next_token,
+            )
 
-    db = SessionLocal()
-    try:
-        q = db.query(Bejelentes).order_by(Bejelentes.datum_ido.desc())
-        if filters:
-            q = q.filter(*filters)
+        statisztika = stats.summary(db)
+        dup_counts = duplicates.duplicate_counts(db, [b.bejelentesID for b in bejelentesek])
 
-        bejelentesek = q.limit(300).all()
         return render_template(
             "admin_dashboard.html",
             bejelentesek=bejelentesek,
+            statisztika=statisztika,
+            dup_counts=dup_counts,
             admin_nev=session.get("admin_nev"),
-            filters={
-                "statusz": statusz,
-                "hely": hely,
-                "date_from": date_from,
-                "date_to": date_to,
-            }
+            filters=page_filters,
+            next_url=next_url,
+            export_args={k: v for k, v in page_filters.items() if v},
+            valtozas_cursor=valtozas_cursor,
+            elso_oldal=cursor is None,
+            sse_enabled=changefeed.SSE_ENABLED,
+            poll_s=changefeed.POLL_S,
         )
     finally:
         db.close()
 
+def _feed_filters():
+    """A dashboard szűrői a változásfolyamhoz (a hibás mezőket itt is kihagyjuk)."""
+    args = {
+        k: (request.args.get(k) or "").strip()
+        for k in ("statusz", "hely", "sugar", "date_from", "date_to", "duplikatumok")
+    }
+    filters, _, post_filter = dashboard_filters(
+        args["statusz"], args["hely"], args["date_from"], args["date_to"], args["sugar"], args["duplikatumok"]
+    )
+    return filters, post_filter
+
+
+def _render_changes(db, valtozasok: dict, filters, post_filter, html: bool) -> dict:
+    """
+    A változott bejelentések közül a szűrőknek megfelelők (html=True esetén a
+    dashboard sorával együtt), a többi az "eltavolitott" listába kerül.
+    """
+    ids = valtozasok["bejelentesIDk"]
+    rows = []
+    if ids:
+        rows = (
+            db.query(Bejelentes)
+            .filter(Bejelentes.bejelentesID.in_(ids), *filters)
+            .order_by(Bejelentes.datum_ido, Bejelentes.bejelentesID)
+            .all()
+        )
+        if post_filter:
+            rows = [b for b in rows if post_filter(b)]
+    dup_counts = duplicates.duplicate_counts(db, [b.bejelentesID for b in rows])
+
+    items = []
+    for b in rows:
+        item = bejelentes_to_dict(b)
+        item["kanonikusID"] = b.kanonikusID
+        if html:
+            item["html"] = render_template("_bejelentes_sor.html", b=b, dup_counts=dup_counts)
+        items.append(item)
+    matched = {b.bejelentesID for b in rows}
+    return {
+        "cursor": valtozasok["cursor"],
+        "ujratoltes": valtozasok["ujratoltes"],
+        "tobb": valtozasok["tobb"],
+        "bejelentesek": items,
+        "eltavolitott": [i for i in ids if i not in matched],
+        "modositasok": [_modositas_json(m) for m in valtozasok["modositasok"]],
+    }
+
+
+@admin_bp.get("/admin/valtozasok")
+@login_required
+def list_valtozasok():
+    """
+    ?cursor=&html=1 és a dashboard szűrői: a cursor óta változott bejelentések
+    és új módosítások. Cursor nélkül csak a jelenlegi cursort adja vissza.
+    """
+    cursor = (request.args.get("cursor") or "").strip()
+    db = SessionLocal()
+    try:
+        if not cursor:
+            return jsonify({"cursor": changefeed.head(db)})
+        try:
+            valtozasok = changefeed.fetch(db, cursor)
+        except ValueError:
+            return jsonify({"error": "Érvénytelen cursor."}), 400
+        filters, post_filter = _feed_filters()
+        return jsonify(_render_changes(db, valtozasok, filters, post_filter, request.args.get("html") == "1"))
+    finally:
+        db.close()
+
+
+@admin_bp.get("/admin/valtozasok/stream")
+@login_required
+def stream_valtozasok():
+    """Ugyanez Server-Sent Events folyamként; újracsatlakozáskor a Last-Event-ID-tól."""
+    if not changefeed.SSE_ENABLED:
+        # 204-re az EventSource nem csatlakozik újra
+        return Response(status=204)
+    cursor = (request.headers.get("Last-Event-ID") or request.args.get("cursor") or "").strip()
+    try:
+        changefeed.decode_cursor(cursor)
+    except ValueError:
+        return jsonify({"error": "Érvénytelen cursor."}), 400
+
+    filters, post_filter = _feed_filters()
+    html = request.args.get("html") == "1"
+    resp = Response(
+        stream_with_context(changefeed.stream(
+            cursor, lambda db, valtozasok: _render_changes(db, valtozasok, filters, post_filter, html)
+        )),
+        mimetype="text/event-stream",
+    )
+    resp.headers["Cache-Control"] = "no-cache"
+    # nginx ne pufferelje a folyamot
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+
 @admin_bp.post("/admin/bejelentes/<int:bejelentes_id>/update")
 @login_required
 def update_bejelentes(bejelentes_id: int):
@@ -231,6 +351,7 @@ def update_bejelentes(bejelentes_id: int):
         add_change("prioritás", b.prioritas, uj_prioritas)
         add_change("hulladék tipus", b.hulladek_tipus, uj_tipus)
         add_change("mennyiség", b.mennyiseg, uj_menny)
+        regi_kulcs = stats.key_for(b)
 
         # alkalmazzuk a változásokat
         if uj_statusz:
@@ -256,6 +377,10 @@ def update_bejelentes(bejelentes_id: int):
             )
             db.add(m)
 
+        if changes:
+            stats.record_change(db, regi_kulcs, stats.key_for(b))
+            changefeed.record(db, [b.bejelentesID])
+            cache.invalidate(db)
         db.commit()
 
         if changes:
@@ -272,30 +397,370 @@ def update_bejelentes(bejelentes_id: int):
     finally:
         db.close()
 
+STATUSZOK = ("beérkezett", "folyamatban", "lezárt")
+PRIORITASOK = ("alacsony", "közepes", "magas")
+MAX_BULK_IDS = 1000
+
+# (Modositas.mezo címke, oszlop, űrlapmező)
+BULK_FIELDS = (
+    ("státusz", Bejelentes.statusz, "statusz"),
+    ("prioritás", Bejelentes.prioritas, "prioritas"),
+    ("hulladék tipus", Bejelentes.hulladek_tipus, "hulladek_tipus"),
+    ("mennyiség", Bejelentes.mennyiseg, "mennyiseg"),
+)
+
+
+def bulk_update(db, ids: list[int], admin_id: int, values: dict) -> tuple[int, list[int]]:
+    """
+    Halmazalapú módosítás: egy SELECT a ténylegesen változó sorokra, mezőnként
+    egy INSERT ... SELECT a naplóba (csak azokra a sorokra, ahol a régi érték
+    eltér – mint az add_change-nél), majd egyetlen UPDATE a változó sorokra.
+    Bejelentésenkénti lekérdezés nincs.
+    Visszatérés: (a naplózott változások száma, a változott bejelentések ID-i).
+    A commit a hívó dolga.
+    """
+    now = datetime.utcnow()
+    fields = [
+        (mezo, col, values[form_name])
+        for mezo, col, form_name in BULK_FIELDS
+        if values.get(form_name) is not None
+    ]
+    if not fields:
+        return 0, []
+    valtozott = list(db.scalars(
+        select(Bejelentes.bejelentesID)
+        .where(
+            Bejelentes.bejelentesID.in_(ids),
+            or_(*[func.coalesce(col, "") != uj for _, col, uj in fields]),
+        )
+        .order_by(Bejelentes.bejelentesID)
+    ))
+    if not valtozott:
+        return 0, []
+
+    naplozott = 0
+    if any(values.get(k) is not None for k in ("statusz", "prioritas", "hulladek_tipus")):
+        stats.record_bulk_change(db, valtozott, values)
+    for mezo, col, uj in fields:
+        changed = and_(
+            Bejelentes.bejelentesID.in_(valtozott),
+            func.coalesce(col, "") != uj,
+        )
+        res = db.execute(
+            insert(Modositas).from_select(
+                ["bejelentesID", "adminID", "datum_ido", "mezo", "regi_ertek", "uj_ertek"],
+                select(
+                    Bejelentes.bejelentesID,
+                    literal(admin_id),
+                    literal(now),
+                    literal(mezo),
+                    col,
+                    literal(uj),
+                ).where(changed),
+            )
+        )
+        naplozott += max(res.rowcount or 0, 0)
+
+    db.execute(
+        update(Bejelentes)
+        .where(Bejelentes.bejelentesID.in_(valtozott))
+        .values({col: uj for _, col, uj in fields})
+        .execution_options(synchronize_session=False)
+    )
+    return naplozott, valtozott
+
+
+@admin_bp.post("/admin/bejelentesek/tomeges")
+@login_required
+def bulk_update_bejelentesek():
+    admin_id = int(session["admin_id"])
+
+    try:
+        ids = sorted({int(x) for x in request.form.getlist("ids")})
+    except ValueError:
+        flash("Hibás bejelentés azonosító.", "error")
+        return redirect(url_for("admin.dashboard"))
+    if not ids:
+        flash("Nincs kijelölt bejelentés.", "error")
+        return redirect(url_for("admin.dashboard"))
+    if len(ids) > MAX_BULK_IDS:
+        flash(f"Egyszerre legfeljebb {MAX_BULK_IDS} bejelentés módosítható.", "error")
+        return redirect(url_for("admin.dashboard"))
+
+    # üres mező = nem változik (tömegesen nem törlünk értéket)
+    values = {
+        form_name: (request.form.get(form_name) or "").strip() or None
+        for _, _, form_name in BULK_FIELDS
+    }
+    if values["statusz"] and values["statusz"] not in STATUSZOK:
+        flash("Ismeretlen státusz.", "error")
+        return redirect(url_for("admin.dashboard"))
+    if values["prioritas"] and values["prioritas"] not in PRIORITASOK:
+        flash("Ismeretlen prioritás.", "error")
+        return redirect(url_for("admin.dashboard"))
+    if not any(values.values()):
+        flash("Nem történt változás.", "success")
+        return redirect(url_for("admin.dashboard"))
+
+    db = SessionLocal()
+    try:
+        naplozott, valtozott = bulk_update(db, ids, admin_id, values)
+        if valtozott:
+            # a változásnaplóba csak a ténylegesen módosult bejelentések
+            changefeed.record(db, valtozott)
+            cache.invalidate(db)
+        db.commit()
+
+        if valtozott:
+            flash(f"{len(ids)} bejelentés feldolgozva, {len(valtozott)} módosult, {naplozott} változás naplózva.", "success")
+        else:
+            flash("Nem történt változás.", "success")
+        return redirect(url_for("admin.dashboard"))
+
+    except Exception:
+        db.rollback()
+        flash("Hiba mentés közben.", "error")
+        return redirect(url_for("admin.dashboard"))
+    finally:
+        db.close()
+
+
+def _modositas_json(m) -> dict:
+    return {
+        "modositasID": m.modositasiID,
+        "bejelentesID": m.bejelentesID,
+        "adminID": m.adminID,
+        "datum_ido": m.datum_ido.isoformat(sep=" ", timespec="seconds") if m.datum_ido else None,
+        "mezo": m.mezo,
+        "regi_ertek": m.regi_ertek,
+        "uj_ertek": m.uj_ertek,
+    }
+
+
+@admin_bp.post("/admin/bejelentesek/osszevonas")
+@login_required
+def merge_bejelentesek():
+    """A kijelölt bejelentések a `kanonikus` (alapértelmezés: a legrégebbi) duplikátumai lesznek."""
+    try:
+        ids = sorted({int(x) for x in request.form.getlist("ids")})
+        kanonikus = int(request.form.get("kanonikus") or (ids[0] if ids else 0))
+    except ValueError:
+        flash("Hibás bejelentés azonosító.", "error")
+        return redirect(url_for("admin.dashboard"))
+    if len(set(ids) | {kanonikus}) < 2:
+        flash("Az összevonáshoz legalább két bejelentés kell.", "error")
+        return redirect(url_for("admin.dashboard"))
+    if len(ids) > MAX_BULK_IDS:
+        flash(f"Egyszerre legfeljebb {MAX_BULK_IDS} bejelentés vonható össze.", "error")
+        return redirect(url_for("admin.dashboard"))
+
+    db = SessionLocal()
+    try:
+        if db.get(Bejelentes, kanonikus) is None:
+            flash("Nincs ilyen bejelentés.", "error")
+            return redirect(url_for("admin.dashboard"))
+        affected = duplicates.merge(db, kanonikus, ids)
+        # az összevont bejelentések korábbi duplikátumai is új kanonikusID-t kaptak
+        changefeed.record(db, [kanonikus, *affected])
+        db.commit()
+        flash(f"{len(affected)} bejelentés összevonva a #{kanonikus} bejelentéssel.", "success")
+        return redirect(url_for("admin.dashboard"))
+    except Exception:
+        db.rollback()
+        flash("Hiba mentés közben.", "error")
+        return redirect(url_for("admin.dashboard"))
+    finally:
+        db.close()
+
+
+@admin_bp.post("/admin/bejelentes/<int:bejelentes_id>/szetvalasztas")
+@login_required
+def split_bejelentes(bejelentes_id: int):
+    """Egy duplikátumként megjelölt bejelentés újra önálló lesz."""
+    db = SessionLocal()
+    try:
+        if duplicates.split(db, bejelentes_id):
+            changefeed.record(db, [bejelentes_id])
+            db.commit()
+            flash(f"A #{bejelentes_id} bejelentés újra önálló.", "success")
+        else:
+            flash("A bejelentés nem duplikátum.", "error")
+        return redirect(url_for("admin.dashboard"))
+    except Exception:
+        db.rollback()
+        flash("Hiba mentés közben.", "error")
+        return redirect(url_for("admin.dashboard"))
+    finally:
+        db.close()
+
+
 @admin_bp.get("/admin/modositasok")
 @login_required
 def list_modositasok():
-    db = SessionLocal()
+    """A friss napló lapozása; ?archiv=1: az archivált sorok (app/archive.py)."""
+    limit = parse_page_size(request.args.get("limit"), default=500)
+    cursor = (request.args.get("cursor") or "").strip() or None
+    model = ModositasArchiv if request.args.get("archiv") == "1" else Modositas
+
+    db = replica.read_session()
     try:
-        items = (
-            db.query(Modositas)
-            .order_by(Modositas.datum_ido.desc())
-            .limit(500)
-            .all()
-        )
+        try:
+            rows, next_token = keyset_page(
+                select(*serialize.MODOSITAS[model].columns),
+                model.datum_ido,
+                model.modositasiID,
+                cursor,
+                limit,
+                session=db,
+            )
+        except ValueError:
+            return jsonify({"error": "Érvénytelen cursor."}), 400
 
+        return serialize.json_response({"items": serialize.MODOSITAS[model].dicts(rows), "next": next_token})
+    finally:
+        db.close()
+
+
+@admin_bp.get("/admin/bejelentes/<int:bejelentes_id>/modositasok")
+@login_required
+def bejelentes_modositasok(bejelentes_id: int):
+    """Egy bejelentés teljes története, a friss és az archivált sorokkal együtt."""
+    db = replica.read_session()
+    try:
+        items = []
+        for m in archive.history(db, bejelentes_id):
+            item = _modositas_json(m)
+            item["archiv"] = bool(m.archiv)
+            items.append(item)
+        return jsonify({"items": items})
+    finally:
+        db.close()
+
+
+@admin_bp.get("/admin/modositasok/archivum")
+@login_required
+def modositas_archive_status():
+    """A friss és az archív napló mérete és időtartománya."""
+    db = replica.read_session()
+    try:
+        return jsonify(archive.status(db))
+    finally:
+        db.close()
+
+
+@admin_bp.get("/admin/kereses")
+@login_required
+def search_bejelentesek():
+    """?q=&limit= – rangsorolt találatok címre és leírásra."""
+    q = (request.args.get("q") or "").strip()
+    limit = parse_page_size(request.args.get("limit"), default=50, maximum=500)
+    if not q:
+        return jsonify({"error": "A q paraméter kötelező."}), 400
+
+    db = replica.read_session()
+    try:
         result = []
-        for m in items:
+        for b, pont in search.search(db, q, limit=limit):
             result.append({
-                "modositasID": m.modositasiID,
-                "bejelentesID": m.bejelentesID,
-                "adminID": m.adminID,
-                "datum_ido": m.datum_ido.isoformat(sep=" ", timespec="seconds") if m.datum_ido else None,
-                "mezo": m.mezo,
-                "regi_ertek": m.regi_ertek,
-                "uj_ertek": m.uj_ertek,
+                "bejelentesID": b.bejelentesID,
+                "datum_ido": b.datum_ido.isoformat(sep=" ", timespec="seconds") if b.datum_ido else None,
+                "cim": b.cim,
+                "leiras": b.leiras,
+                "statusz": b.statusz,
+                "pont": round(pont, 3),
             })
+        return jsonify({"items": result})
+    finally:
+        db.close()
+
+
+@admin_bp.get("/admin/belepes/korlatozas")
+@login_required
+def login_throttling():
+    """A belépési korlátozó forrásai (IP / név); ?csak_aktiv=1: csak a most korlátozottak."""
+    return jsonify(ratelimit.throttled_sources(only_limited=request.args.get("csak_aktiv") == "1"))
+
+
+@admin_bp.get("/admin/ingest/allapot")
+@login_required
+def ingest_status():
+    """A beírási sor állapota: mélység, késés (mp), kötegek, sikertelen tételek."""
+    return jsonify(ingest.queue_stats())
+
 
-        return jsonify(result)
+def _export_response(rows, fmt: str, columns, filename: str) -> Response:
+    resp = Response(
+        stream_with_context(export.render(rows, fmt, columns)),
+        mimetype=export.FORMATS[fmt],
+    )
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    resp.headers["Content-Disposition"] = f'attachment; filename="{filename}-{stamp}.{fmt}"'
+    return resp
+
+
+@admin_bp.get("/admin/db/allapot")
+@login_required
+def db_status():
+    """A worker kapcsolat-poolja és SQL számlálói (a gunicorn workerek méretezéséhez)."""
+    status = querylog.pool_status()
+    status["indulas"] = startup.status()
+    if replica.replicas:
+        status["replikak"] = replica.status()
+    return jsonify(status)
+
+@admin_bp.get("/admin/export/bejelentesek")
+@login_required
+def export_bejelentesek():
+    """?format=ndjson|csv és a dashboard szűrői (statusz, hely, sugar, date_from, date_to, duplikatumok)."""
+    fmt = (request.args.get("format") or "ndjson").strip()
+    if fmt not in export.FORMATS:
+        return jsonify({"error": "A format értéke ndjson vagy csv lehet."}), 400
+
+    hibak, rows = export.bejelentes_rows(
+        (request.args.get("statusz") or "").strip(),
+        (request.args.get("hely") or "").strip(),
+        (request.args.get("date_from") or "").strip(),
+        (request.args.get("date_to") or "").strip(),
+        (request.args.get("sugar") or "").strip(),
+        # a dashboardhoz hasonlóan alapból a duplikátumok nélkül
+        (request.args.get("duplikatumok") or "").strip(),
+    )
+    if hibak:
+        return jsonify({"error": " ".join(hibak)}), 400
+    return _export_response(rows, fmt, export.BEJELENTES_COLUMNS, "bejelentesek")
+
+
+@admin_bp.get("/admin/export/modositasok")
+@login_required
+def export_modositasok():
+    """?format=ndjson|csv&date_from=&date_to=&bejelentesID="""
+    fmt = (request.args.get("format") or "ndjson").strip()
+    if fmt not in export.FORMATS:
+        return jsonify({"error": "A format értéke ndjson vagy csv lehet."}), 400
+    bejelentes_id = request.args.get("bejelentesID", type=int)
+
+    hibak, rows = export.modositas_rows(
+        (request.args.get("date_from") or "").strip(),
+        (request.args.get("date_to") or "").strip(),
+        bejelentes_id,
+    )
+    if hibak:
+        return jsonify({"error": " ".join(hibak)}), 400
+    return _export_response(rows, fmt, export.MODOSITAS_COLUMNS, "modositasok")
+
+
+@admin_bp.get("/admin/statisztika")
+@login_required
+def statisztika():
+    """?date_from=&date_to= (YYYY-MM-DD) – a napi bontás tartománya, alapértelmezés: utolsó 30 nap."""
+    try:
+        date_from = parse_date(request.args["date_from"]).date() if request.args.get("date_from") else None
+        date_to = parse_date(request.args["date_to"]).date() if request.args.get("date_to") else None
+    except ValueError:
+        return jsonify({"error": "Hibás dátum formátum (YYYY-MM-DD)."}), 400
+
+    db = replica.read_session()
+    try:
+        return jsonify(stats.summary(db, date_from, date_to))
     finally:
         db.close()
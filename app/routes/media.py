@@ -0,0 +1,115 @@
+# app/routes/media.py
+"""
+Feltöltött fotók kiszolgálása (helyi háttértár, app/storage.py).
+
+A Flask static kezelője helyett, mert
+- a tartalom-címzett kulcsok (ab/cd/<sha256>.jpg, és a belőlük képzett
+  _thumb.webp / _1280.webp / _1280.avif) a tartalommal együtt változnak –
+  egy kulcs alá írt fájlt sosem írunk felül, a metaadatok a hash előtt
+  kerülnek le (app/images.py) –, ezért ezek
+  "Cache-Control: public, max-age=<UPLOAD_MAX_AGE>, immutable" fejlécet
+  kapnak: a böngésző a dashboard újratöltésekor sem kérdez rá újra;
+  a régi, időbélyeges nevű fájlok rövid (UPLOAD_LEGACY_MAX_AGE) cache-t
+- az ETag a tartalom hash-e (minden workerben / gépen ugyanaz);
+  If-None-Match / If-Modified-Since -> 304, Range / If-Range -> 206
+- UPLOAD_OFFLOAD=nginx: a törzset nem a gunicorn worker küldi, hanem az
+  nginx (X-Accel-Redirect: UPLOAD_ACCEL_PREFIX + kulcs); a Range-et és a
+  fájl küldését az nginx végzi, pl.:
+
+      location /_uploads/ {
+          internal;
+          alias /srv/zold-lovag/app/static/uploads/;
+      }
+
+  UPLOAD_OFFLOAD=sendfile: X-Sendfile fejléc (Apache mod_xsendfile, lighttpd)
+
+Az S3 háttértár fotói a tároló nyilvános URL-jéről jönnek, nem innen.
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import re
+from datetime import datetime, timezone
+
+from flask import Blueprint, Response, abort, request, send_file
+from werkzeug.security import safe_join
+
+from app.storage import LEGACY_URL_PREFIX, LocalStorage, get_storage
+
+
+media_bp = Blueprint("media", __name__)
+
+OFFLOAD = os.environ.get("UPLOAD_OFFLOAD", "off")
+ACCEL_PREFIX = os.environ.get("UPLOAD_ACCEL_PREFIX", "/_uploads/")
+MAX_AGE = int(os.environ.get("UPLOAD_MAX_AGE", str(365 * 24 * 3600)))
+LEGACY_MAX_AGE = int(os.environ.get("UPLOAD_LEGACY_MAX_AGE", "3600"))
+
+if OFFLOAD not in ("off", "nginx", "sendfile"):
+    raise RuntimeError(f"Ismeretlen UPLOAD_OFFLOAD: {OFFLOAD}")
+
+# <sha256> vagy <sha256>_<származtatott>, kiterjesztéssel
+_CONTENT_NAME = re.compile(r"^([0-9a-f]{64})(_[a-z0-9]+)?\.[a-z0-9]+$")
+
+
+def _content_etag(key: str) -> str | None:
+    m = _CONTENT_NAME.match(key.rsplit("/", 1)[-1])
+    if m is None:
+        return None
+    return m.group(1) + (m.group(2) or "")
+
+
+def _cache_control(resp: Response, immutable: bool) -> Response:
+    if immutable:
+        resp.headers["Cache-Control"] = f"public, max-age={MAX_AGE}, immutable"
+    else:
+        resp.headers["Cache-Control"] = f"public, max-age={LEGACY_MAX_AGE}"
+    return resp
+
+
+def _offload(path: str, key: str, etag: str | None, stat) -> Response:
+    """A törzs nélküli válasz; a fájlt a front proxy küldi el."""
+    last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+    resp = Response(mimetype=mimetypes.guess_type(path)[0] or "application/octet-stream")
+    if etag is not None:
+        resp.set_etag(etag)
+    resp.last_modified = last_modified
+    resp.make_conditional(request.environ)
+    if resp.status_code == 304:
+        return resp
+    if OFFLOAD == "nginx":
+        resp.headers["X-Accel-Redirect"] = ACCEL_PREFIX + key
+    else:
+        resp.headers["X-Sendfile"] = path
+    return resp
+
+
+@media_bp.get("/uploads/<path:key>")
+@media_bp.get(LEGACY_URL_PREFIX + "<path:key>")
+def upload(key: str):
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        abort(404)
+    # ideiglenes (.tmp) és rejtett fájlok nem szolgálhatók ki
+    if any(part.startswith(".") for part in key.split("/")):
+        abort(404)
+    path = safe_join(str(storage.root), key)
+    if path is None:
+        abort(404)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        abort(404)
+
+    etag = _content_etag(key)
+    if OFFLOAD != "off":
+        resp = _offload(path, key, etag, stat)
+    else:
+        resp = send_file(
+            path,
+            conditional=True,
+            etag=etag if etag is not None else True,
+            last_modified=stat.st_mtime,
+            max_age=None,
+        )
+    return _cache_control(resp, immutable=etag is not None)
@@ -1,21 +1,21 @@
 # app/routes/public.py
 from __future__ import annotations
 
-from datetime import datetime
-from pathlib import Path
-
 from flask import Blueprint, render_template, request, redirect, flash, url_for, jsonify
+from sqlalchemy import select
 
+from app import cache, clustering, geo, images, ingest, metrics, replica, serialize
 from app.database import SessionLocal
+from app.filters import parse_radius
 from app.models import Bejelentes
+from app.pagination import keyset_page, parse_page_size
+from app.storage import get_storage
+import io
 import os
 
 
 public_bp = Blueprint("public", __name__)
 
-UPLOAD_DIR = Path(__file__).resolve().parents[1] / "static" / "uploads"
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
 
 @public_bp.get("/")
 def index():
@@ -34,22 +34,22 @@ def create_bejelentes():
     koord_szel_raw = (request.form.get("koord_szel") or "").strip()
     koord_hossz_raw = (request.form.get("koord_hossz") or "").strip()
 
-    koord_szel = None
-    koord_hossz = None
+    # ugyanaz az ellenőrzés, mint a spoolnál és az importernél (app/ingest.py)
+    try:
+        koord_szel = ingest.parse_coordinate(koord_szel_raw, "koord_szel")
+    except ValueError:
+        flash("A szélességi koordináta -90 és 90 közötti szám legyen.", "error")
+        return redirect(url_for("public.index"))
 
-    if koord_szel_raw:
-        try:
-            koord_szel = float(koord_szel_raw)
-        except ValueError:
-            flash("A szélességi koordináta nem szám.", "error")
-            return redirect(url_for("public.index"))
+    try:
+        koord_hossz = ingest.parse_coordinate(koord_hossz_raw, "koord_hossz")
+    except ValueError:
+        flash("A hosszúsági koordináta -180 és 180 közötti szám legyen.", "error")
+        return redirect(url_for("public.index"))
 
-    if koord_hossz_raw:
-        try:
-            koord_hossz = float(koord_hossz_raw)
-        except ValueError:
-            flash("A hosszúsági koordináta nem szám.", "error")
-            return redirect(url_for("public.index"))
+    if len(cim) > ingest.CIM_MAX_LEN:
+        flash(f"A cím legfeljebb {ingest.CIM_MAX_LEN} karakter lehet.", "error")
+        return redirect(url_for("public.index"))
 
     has_cim = bool(cim)
     has_coords = (koord_szel is not None and koord_hossz is not None)
@@ -61,25 +61,34 @@ def create_bejelentes():
     foto_url = None
     foto = request.files.get("foto")
     if foto and foto.filename:
-        safe_name = f"{int(datetime.utcnow().timestamp())}_{foto.filename}".replace(" ", "_")
-        save_path = UPLOAD_DIR / safe_name
-        foto.save(save_path)
-        foto_url = f"/static/uploads/{safe_name}"
+        if not images.is_allowed_filename(foto.filename):
+            flash("Csak képfájl tölthető fel.", "error")
+            return redirect(url_for("public.index"))
+        # tartalom-címzett tárolás: ugyanaz a fotó csak egyszer kerül lemezre
+        storage = get_storage()
+        key, is_new = images.save_upload(storage, foto.stream, images.extension_for(foto.filename))
+        foto_url = storage.url(key)
+        # a feltöltés mérete (a metaadatok eltávolítása előtt)
+        metrics.count_upload(foto.stream.seek(0, io.SEEK_END), is_new)
+
+    payload = ingest.new_payload(cim, koord_szel, koord_hossz, leiras, foto_url)
+    if ingest.MODE == "queue":
+        # a spool tartós: a beírást a háttér writer kötegelve végzi
+        ingest.enqueue(payload)
+        flash("Bejelentés sikeresen rögzítve!", "success")
+        return redirect(url_for("public.index"))
 
     db = SessionLocal()
     try:
-        bej = Bejelentes(
-            datum_ido=datetime.utcnow(),
-            cim=cim if cim else None,
-            koord_szel=koord_szel,
-            koord_hossz=koord_hossz,
-            leiras=leiras if leiras else None,
-            foto_url=foto_url,
-            statusz="beérkezett",
-        )
-        db.add(bej)
-        db.commit()
-        flash("Bejelentés sikeresen rögzítve!", "success")
+        items = ingest.insert_batch(db, [payload])
+        if items and items[0].kanonikusID:
+            flash(
+                f"Köszönjük! Ezt a helyet már bejelentették (#{items[0].kanonikusID}), "
+                "a bejelentésedet hozzá csatoltuk.",
+                "success",
+            )
+        else:
+            flash("Bejelentés sikeresen rögzítve!", "success")
     except Exception:
         db.rollback()
         flash("Hiba történt mentés közben. Próbáld újra.", "error")
@@ -89,31 +98,131 @@ def create_bejelentes():
     return redirect(url_for("public.index"))
 
 
+def bejelentes_to_dict(b) -> dict:
+    return {
+        "bejelentesID": b.bejelentesID,
+        "datum_ido": b.datum_ido.isoformat(sep=" ", timespec="seconds") if b.datum_ido else None,
+        "cim": b.cim,
+        "koord_szel": float(b.koord_szel) if b.koord_szel is not None else None,
+        "koord_hossz": float(b.koord_hossz) if b.koord_hossz is not None else None,
+        "statusz": b.statusz,
+        "prioritas": b.prioritas,
+        "hulladek_tipus": b.hulladek_tipus,
+        "mennyiseg": b.mennyiseg,
+        "foto_url": b.foto_url,
+        "foto_thumb_url": b.foto_thumb_url,
+    }
+
+
+def _float_args(*names):
+    """A megadott query paraméterek float-ként; ValueError, ha hiányzik vagy hibás."""
+    values = []
+    for name in names:
+        raw = (request.args.get(name) or "").strip()
+        if not raw:
+            raise ValueError(name)
+        values.append(float(raw))
+    return values
+
+
 @public_bp.get("/bejelentesek")
+@cache.cached_json()
 def list_bejelentesek():
+    limit = parse_page_size(request.args.get("limit"), default=200)
+    cursor = (request.args.get("cursor") or "").strip() or None
+
+    db = replica.read_session()
+    try:
+        try:
+            rows, next_token = keyset_page(
+                select(*serialize.BEJELENTES.columns),
+                Bejelentes.datum_ido,
+                Bejelentes.bejelentesID,
+                cursor,
+                limit,
+                session=db,
+            )
+        except ValueError:
+            return jsonify({"error": "Érvénytelen cursor."}), 400
+
+        return serialize.json_response({"items": serialize.BEJELENTES.dicts(rows), "next": next_token})
+    finally:
+        db.close()
+
+
+@public_bp.get("/bejelentesek/kozel")
+@cache.cached_json()
+def list_bejelentesek_kozel():
+    """?lat=&lng=&r= (méter) – távolság szerint növekvő sorrendben."""
+    try:
+        lat, lng = _float_args("lat", "lng")
+    except ValueError:
+        return jsonify({"error": "A lat és lng paraméter kötelező szám."}), 400
+    radius_m = parse_radius(request.args.get("r"))
+    limit = parse_page_size(request.args.get("limit"), default=200)
+
+    db = replica.read_session()
+    try:
+        found = geo.within_radius(db.query(*serialize.BEJELENTES.columns), lat, lng, radius_m, limit=limit)
+        result = serialize.BEJELENTES.dicts([row for row, _ in found])
+        for item, (_, d) in zip(result, found):
+            item["tavolsag_m"] = round(d, 1)
+        return serialize.json_response({"items": result})
+    finally:
+        db.close()
+
+
+@public_bp.get("/bejelentesek/terulet")
+@cache.cached_json()
+def list_bejelentesek_terulet():
+    """?south=&west=&north=&east= – a térkép látható területe, lapozva."""
+    try:
+        south, west, north, east = _float_args("south", "west", "north", "east")
+    except ValueError:
+        return jsonify({"error": "A south, west, north, east paraméter kötelező szám."}), 400
+    if south > north:
+        return jsonify({"error": "south > north"}), 400
+
+    limit = parse_page_size(request.args.get("limit"), default=200)
+    cursor = (request.args.get("cursor") or "").strip() or None
+
+    db = replica.read_session()
+    try:
+        try:
+            rows, next_token = keyset_page(
+                select(*serialize.BEJELENTES.columns).where(geo.bbox_filter(south, west, north, east)),
+                Bejelentes.datum_ido,
+                Bejelentes.bejelentesID,
+                cursor,
+                limit,
+                session=db,
+            )
+        except ValueError:
+            return jsonify({"error": "Érvénytelen cursor."}), 400
+
+        return serialize.json_response({"items": serialize.BEJELENTES.dicts(rows), "next": next_token})
+    finally:
+        db.close()
+
+
+@public_bp.get("/terkep/klaszterek")
+def map_clusters():
+    """?south=&west=&north=&east=&zoom= – klaszterek / pontok a térkép nézetéhez."""
+    # az elsődlegesről: a csempe-cache (app/clustering.py) nem tudja, mikor
+    # naprakész egy replika
+    try:
+        south, west, north, east = _float_args("south", "west", "north", "east")
+        zoom = int(request.args.get("zoom") or "")
+    except ValueError:
+        return jsonify({"error": "A south, west, north, east és zoom paraméter kötelező szám."}), 400
+    if south > north:
+        return jsonify({"error": "south > north"}), 400
+
     db = SessionLocal()
     try:
-        items = (
-            db.query(Bejelentes)
-            .order_by(Bejelentes.datum_ido.desc())
-            .limit(200)
-            .all()
-        )
-
-        result = []
-        for b in items:
-            result.append({
-                "bejelentesID": b.bejelentesID,
-                "datum_ido": b.datum_ido.isoformat(sep=" ", timespec="seconds") if b.datum_ido else None,
-                "cim": b.cim,
-                "koord_szel": float(b.koord_szel) if b.koord_szel is not None else None,
-                "koord_hossz": float(b.koord_hossz) if b.koord_hossz is not None else None,
-                "statusz": b.statusz,
-                "prioritas": b.prioritas,
-                "hulladek_tipus": b.hulladek_tipus,
-                "mennyiseg": b.mennyiseg,
-            })
-
-        return jsonify(result)
+        try:
+            return jsonify(clustering.clusters_for_viewport(db, south, west, north, east, zoom))
+        except ValueError:
+            return jsonify({"error": "Túl nagy terület ehhez a nagyításhoz."}), 400
     finally:
         db.close()
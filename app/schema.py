@@ -0,0 +1,190 @@
+# app/schema.py
+"""
+Séma bootstrap meglévő adatbázisokhoz.
+
+`create_all` csak a hiányzó táblákat hozza létre, a már létező táblákhoz
+utólag felvett oszlopokat és indexeket nem. Az `ensure_schema` ezt pótolja:
+adatot nem módosít, csak hiányzó táblát / (NULL-ozható) oszlopot / indexet
+hoz létre, és a modellben azóta egyedivé tett indexet újraépíti.
+
+Az `explain_dashboard_filters` a dashboard összes szűrő-kombinációjára
+lefuttatja az adatbázis EXPLAIN-jét, és megmondja, hogy indexet használ-e.
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+
+from sqlalchemy import inspect, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateColumn
+
+from app.filters import dashboard_filters
+from app.models import Base, Bejelentes
+
+
+log = logging.getLogger(__name__)
+
+
+def _add_missing_columns(engine, insp, table) -> list[str]:
+    existing = {c["name"] for c in insp.get_columns(table.name)}
+    added = []
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        if not column.nullable:
+            raise RuntimeError(
+                f"{table.name}.{column.name}: NOT NULL oszlopot nem adunk hozzá automatikusan"
+            )
+        ddl = CreateColumn(column).compile(dialect=engine.dialect)
+        table_name = engine.dialect.identifier_preparer.format_table(table)
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD {ddl}")
+        added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def _applies_to(index, dialect_name: str) -> bool:
+    # .ddl_if(dialect=...) indexek csak a megadott adatbázison jönnek létre
+    ddl_if = getattr(index, "_ddl_if", None)
+    return ddl_if is None or ddl_if.dialect is None or ddl_if.dialect == dialect_name
+
+
+def ensure_schema(engine) -> list[str]:
+    """
+    Létrehozza a hiányzó táblákat, oszlopokat és indexeket.
+    Visszaadja a létrehozott oszlopok / indexek nevét.
+    """
+    if engine.dialect.name == "postgresql":
+        # a kereső trigram indexéhez (app/search.py)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    Base.metadata.create_all(bind=engine)
+
+    created = []
+    insp = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        created.extend(_add_missing_columns(engine, insp, table))
+
+    insp = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = {ix["name"]: ix for ix in insp.get_indexes(table.name)}
+        for index in table.indexes:
+            if not _applies_to(index, engine.dialect.name):
+                continue
+            if index.name not in existing:
+                index.create(bind=engine)
+                created.append(index.name)
+            elif index.unique and not existing[index.name].get("unique"):
+                if _make_unique(engine, index):
+                    created.append(index.name)
+    return created
+
+
+def _make_unique(engine, index) -> bool:
+    """A régi, nem egyedi index cseréje egy tranzakcióban; hibánál a régi marad."""
+    try:
+        with engine.begin() as conn:
+            index.drop(bind=conn)
+            index.create(bind=conn)
+    except SQLAlchemyError as e:
+        log.warning("A(z) %s index nem tehető egyedivé (ismétlődő értékek?): %s", index.name, e)
+        return False
+    return True
+
+
+# ---- EXPLAIN ellenőrzés ----
+
+# dialektusonként: (teljes táblaolvasás jelei, indexhasználat jelei)
+_PLAN_MARKERS = {
+    "sqlite": (("SCAN Bejelentes\n",), ("USING INDEX", "USING COVERING INDEX", "USING INTEGER PRIMARY KEY")),
+    "postgresql": (("Seq Scan",), ("Index Scan", "Index Only Scan", "Bitmap Index Scan")),
+    "mssql": (("Table Scan", "Clustered Index Scan"), ("Index Seek", "Index Scan")),
+}
+
+_FILTER_VALUES = {
+    "statusz": ("", "beérkezett"),
+    "dates": (("", ""), ("2024-01-01", ""), ("2024-01-01", "2024-02-01")),
+    "hely": ("", "47.687,17.650", "Fő utca"),
+    # "": a dashboard alapnézete (duplikátumok nélkül), "1": a duplikátumokkal
+    "duplikatumok": ("", "1"),
+}
+
+
+def _explain(conn, dialect_name: str, sql: str) -> str:
+    if dialect_name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql).fetchall()
+        return "".join(f"{r[-1]}\n" for r in rows)
+
+    if dialect_name == "postgresql":
+        # üres / kicsi táblán a tervező mindig Seq Scan-t választ, ezért
+        # azt kérdezzük, hogy *tud-e* indexet használni
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        rows = conn.exec_driver_sql("EXPLAIN " + sql).fetchall()
+        return "\n".join(r[0] for r in rows)
+
+    if dialect_name == "mssql":
+        conn.exec_driver_sql("SET SHOWPLAN_TEXT ON")
+        try:
+            res = conn.exec_driver_sql(sql)
+            lines = []
+            while True:
+                lines.extend(str(r[0]) for r in res.fetchall())
+                if not res.cursor.nextset():
+                    break
+            return "\n".join(lines)
+        finally:
+            conn.exec_driver_sql("SET SHOWPLAN_TEXT OFF")
+
+
+def explain_dashboard_filters(engine, limit: int = 300) -> list[dict]:
+    """
+    Minden szűrő-kombinációra: {"szurok", "sql", "plan", "uses_index"}.
+    A lekérdezés ugyanaz, mint a dashboardé: a feltételek a
+    filters.dashboard_filters-ből jönnek (a duplikátum-szűrővel együtt), a
+    rendezés a keyset lapozásé. Nem támogatott adatbázison üres lista.
+    """
+    dialect_name = engine.dialect.name
+    if dialect_name not in _PLAN_MARKERS:
+        log.warning("EXPLAIN ellenőrzés kihagyva: nem támogatott adatbázis (%s)", dialect_name)
+        return []
+    scan_markers, index_markers = _PLAN_MARKERS[dialect_name]
+
+    results = []
+    combos = itertools.product(
+        _FILTER_VALUES["statusz"],
+        _FILTER_VALUES["dates"],
+        _FILTER_VALUES["hely"],
+        _FILTER_VALUES["duplikatumok"],
+    )
+    for statusz, (date_from, date_to), hely, duplikatumok in combos:
+        filters, _, _ = dashboard_filters(statusz, hely, date_from, date_to, duplikatumok=duplikatumok)
+        stmt = (
+            select(Bejelentes)
+            .where(*filters)
+            .order_by(Bejelentes.datum_ido.desc(), Bejelentes.bejelentesID.desc())
+            .limit(limit)
+        )
+        sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+        with engine.begin() as conn:
+            plan = _explain(conn, dialect_name, sql)
+
+        uses_index = (
+            not any(m in plan for m in scan_markers)
+            and any(m in plan for m in index_markers)
+        )
+        results.append({
+            "szurok": {
+                "statusz": statusz,
+                "date_from": date_from,
+                "date_to": date_to,
+                "hely": hely,
+                "duplikatumok": duplikatumok,
+            },
+            "sql": sql,
+            "plan": plan,
+            "uses_index": uses_index,
+        })
+    return results
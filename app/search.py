@@ -0,0 +1,199 @@
+# app/search.py
+"""
+Szabadszavas keresés a bejelentések címében és leírásában.
+
+Mindkét mezőt normalizáljuk (kisbetű, ékezetek nélkül, a szokásos magyar
+rövidítések kibontva: "u." -> "utca", "krt." -> "korut", ...), és a
+Bejelentes.kereso_szoveg oszlopba írjuk. A keresőkifejezés ugyanígy
+normalizálódik, így "Fő u. 5" és "fo utca 5" ugyanazt találja.
+
+- PostgreSQL: pg_trgm GIN index a kereso_szoveg oszlopon; a szűrés
+  LIKE '%szó%' (az index kiszolgálja), a rangsor word_similarity(),
+  így az elgépelések is találnak.
+- Más adatbázis (SQLite, SQL Server): saját invertált index a
+  KeresesiIndex táblában (szó -> bejelentés), szó-prefix tartományokkal.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+
+from sqlalchemy import and_, func, literal, literal_column, select, union_all
+
+from app.database import get_engine
+from app.models import Bejelentes, KeresesiIndex
+
+
+MAX_TOKEN_LEN = 64
+
+_ABBREVIATIONS = {
+    "u": "utca",
+    "krt": "korut",
+    "sgt": "sugarut",
+    "stny": "setany",
+    "rkp": "rakpart",
+    "hrsz": "helyrajziszam",
+    "ltp": "lakotelep",
+    "kul": "kulterulet",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _strip_accents(s: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", s)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    tokens = []
+    for tok in _TOKEN_RE.findall(_strip_accents(text.lower())):
+        tok = _ABBREVIATIONS.get(tok, tok)
+        # egybetűs szavak ("a", "s") zajt adnak; a házszámok maradnak
+        if len(tok) < 2 and not tok.isdigit():
+            continue
+        tokens.append(tok[:MAX_TOKEN_LEN])
+    return tokens
+
+
+def normalize(text: str | None) -> str:
+    return " ".join(tokenize(text))
+
+
+def document_text(cim: str | None, leiras: str | None) -> str | None:
+    """A Bejelentes.kereso_szoveg értéke."""
+    doc = normalize(" ".join(x for x in (cim, leiras) if x))
+    return doc or None
+
+
+def _use_trigram() -> bool:
+    return get_engine().dialect.name == "postgresql"
+
+
+# ---- karbantartás ----
+
+def index_bejelentes(db, b, replace: bool = True) -> None:
+    """
+    Beállítja a kereso_szoveg-et és (nem PostgreSQL-en) frissíti az invertált
+    indexet. A bejelentésnek már legyen ID-ja (db.flush() után hívandó).
+    replace=False: új bejelentés, nincs mit törölni az indexből.
+    """
+    b.kereso_szoveg = document_text(b.cim, b.leiras)
+    if _use_trigram():
+        return
+
+    if replace:
+        db.query(KeresesiIndex).filter(KeresesiIndex.bejelentesID == b.bejelentesID).delete(
+            synchronize_session=False
+        )
+    counts = {}
+    for tok in tokenize(b.kereso_szoveg):
+        counts[tok] = counts.get(tok, 0) + 1
+    db.add_all(
+        KeresesiIndex(szo=tok, bejelentesID=b.bejelentesID, gyakorisag=n)
+        for tok, n in counts.items()
+    )
+
+
+def rebuild_index(db, batch_size: int = 1000) -> int:
+    """Minden bejelentés újraindexelése (visszatöltéshez)."""
+    total = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(Bejelentes)
+            .filter(Bejelentes.bejelentesID > last_id)
+            .order_by(Bejelentes.bejelentesID)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return total
+        for b in batch:
+            index_bejelentes(db, b)
+        db.commit()
+        total += len(batch)
+        last_id = batch[-1].bejelentesID
+
+
+# ---- lekérdezés ----
+
+def _prefix_range(tok: str):
+    col = KeresesiIndex.szo
+    return and_(col >= tok, col < tok + "~")
+
+
+def match_filter(text: str):
+    """
+    Szűrőfeltétel: minden szó (prefixként) szerepeljen a címben vagy a
+    leírásban. None, ha a kifejezésből nem maradt kereshető szó.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+
+    if _use_trigram():
+        return and_(*[Bejelentes.kereso_szoveg.like(f"%{tok}%") for tok in tokens])
+
+    return and_(*[
+        Bejelentes.bejelentesID.in_(
+            select(KeresesiIndex.bejelentesID).where(_prefix_range(tok))
+        )
+        for tok in tokens
+    ])
+
+
+def search(db, text: str, limit: int = 50) -> list[tuple]:
+    """
+    Rangsorolt találatok: [(Bejelentes, pontszám 0..1)], csökkenő sorrendben.
+    A legjobb találatok azok, amelyekben a legtöbb keresett szó szerepel.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return []
+
+    if _use_trigram():
+        q = " ".join(tokens)
+        score = func.word_similarity(q, Bejelentes.kereso_szoveg)
+        rows = (
+            db.query(Bejelentes, score.label("pont"))
+            .filter(literal(q).op("<%")(Bejelentes.kereso_szoveg))
+            .order_by(score.desc(), Bejelentes.datum_ido.desc())
+            .limit(limit)
+            .all()
+        )
+        return [(b, float(p)) for b, p in rows]
+
+    # szavanként egy index-tartomány; a bejelentés pontszáma a talált szavak száma
+    per_token = [
+        select(
+            KeresesiIndex.bejelentesID.label("bejelentesID"),
+            literal_column(str(i)).label("szo_sorszam"),
+            func.sum(KeresesiIndex.gyakorisag).label("gyakorisag"),
+        )
+        .where(_prefix_range(tok))
+        .group_by(KeresesiIndex.bejelentesID)
+        for i, tok in enumerate(dict.fromkeys(tokens))
+    ]
+    hits = union_all(*per_token).subquery()
+    talalat = func.count().label("talalat")
+    ranked = (
+        select(hits.c.bejelentesID, talalat, func.sum(hits.c.gyakorisag).label("suly"))
+        .group_by(hits.c.bejelentesID)
+        .order_by(talalat.desc(), func.sum(hits.c.gyakorisag).desc(), hits.c.bejelentesID.desc())
+        .limit(limit)
+    )
+    ranked_rows = db.execute(ranked).all()
+    if not ranked_rows:
+        return []
+
+    by_id = {
+        b.bejelentesID: b
+        for b in db.query(Bejelentes).filter(
+            Bejelentes.bejelentesID.in_([r.bejelentesID for r in ranked_rows])
+        )
+    }
+    n = len(per_token)
+    return [(by_id[r.bejelentesID], r.talalat / n) for r in ranked_rows if r.bejelentesID in by_id]
@@ -0,0 +1,185 @@
+# app/serialize.py
+"""
+Gyors JSON válaszok a lista végpontokhoz.
+
+- oszlop-projekció: csak a kiadott oszlopok kerülnek a SELECT-be, és
+  könnyű Row sorok jönnek vissza (nincs ORM objektum, identity map, és
+  nem olvassuk fel a nagy leiras szöveget)
+- típuskonverzió tömegesen: a Numeric oszlopok már a driver
+  eredményfeldolgozójában float-tá válnak (nincs soronkénti Decimal); a
+  dátumokat nem alakítjuk datetime-má, ha a driver szöveget ad (SQLite),
+  hanem oszloponként egy menetben levágjuk másodpercre
+- kódolás orjson-nal, ha telepítve van, különben a stdlib json-nal
+- JSON_COMPRESS_MIN_BYTES feletti JSON válaszok tömörítése az
+  Accept-Encoding szerint (init_app, minden végpontra): brotli (ha a brotli
+  csomag telepítve van) vagy gzip; a cache-elt válaszok tömörített
+  változata is a cache-ben marad (app/cache.py). JSON_COMPRESSION=off
+  kikapcsolja (pl. ha az nginx tömörít)
+
+Használat egy lista végponton:
+
+    rows = db.query(*BEJELENTES.columns)...all()
+    return json_response({"items": BEJELENTES.dicts(rows)})
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+
+from flask import Response, request
+from sqlalchemy import DateTime, Numeric, String, type_coerce
+from sqlalchemy.types import TypeDecorator
+
+from app.models import Bejelentes, Modositas, ModositasArchiv
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - opcionális függőség
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - opcionális függőség
+    brotli = None
+
+
+COMPRESSION = os.environ.get("JSON_COMPRESSION", "on") != "off"
+COMPRESS_MIN_BYTES = int(os.environ.get("JSON_COMPRESS_MIN_BYTES", "2048"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+MIMETYPE = "application/json"
+
+
+class _DriverValue(TypeDecorator):
+    """A driver értéke feldolgozás nélkül (SQLite: szöveg, PostgreSQL: datetime)."""
+
+    impl = String
+    cache_ok = True
+
+
+class Projection:
+    """Kiadott oszlopok: a SELECT oszloplistája és a sorok -> dict átalakítás."""
+
+    def __init__(self, *columns, rename: dict | None = None):
+        rename = rename or {}
+        self.columns = []
+        self.keys = []
+        self._datetimes = []
+        self._scales = []
+        for i, col in enumerate(columns):
+            if isinstance(col.type, Numeric) and col.type.asdecimal:
+                # float már a drivertől, a címke megtartja a Row attribútumnevet
+                if col.type.scale is not None:
+                    self._scales.append((i, col.type.scale))
+                col = type_coerce(col, Numeric(asdecimal=False)).label(col.key)
+            elif isinstance(col.type, DateTime):
+                # a keyset cursor ebből is képezhető (app/pagination.py)
+                col = type_coerce(col, _DriverValue()).label(col.key)
+                self._datetimes.append(i)
+            self.columns.append(col)
+            self.keys.append(rename.get(col.key, col.key))
+
+    def dicts(self, rows) -> list[dict]:
+        keys = self.keys
+        if not rows:
+            return []
+        if not (self._datetimes or self._scales):
+            return [dict(zip(keys, row)) for row in rows]
+        # oszloponként: a dátumok "ÉÉÉÉ-HH-NN óó:pp:mm" alakban (str() a
+        # datetime-ra és a tárolt szövegre is ezzel kezdődik), a számok az
+        # oszlop skálájára kerekítve (mint a Decimal útvonalon)
+        cols = list(zip(*rows))
+        for i in self._datetimes:
+            cols[i] = [str(v)[:19] if v is not None else None for v in cols[i]]
+        for i, scale in self._scales:
+            cols[i] = [round(v, scale) if v is not None else None for v in cols[i]]
+        return [dict(zip(keys, values)) for values in zip(*cols)]
+
+
+# a nyilvános listák mezői (mint a routes.public.bejelentes_to_dict)
+BEJELENTES = Projection(
+    Bejelentes.bejelentesID,
+    Bejelentes.datum_ido,
+    Bejelentes.cim,
+    Bejelentes.koord_szel,
+    Bejelentes.koord_hossz,
+    Bejelentes.statusz,
+    Bejelentes.prioritas,
+    Bejelentes.hulladek_tipus,
+    Bejelentes.mennyiseg,
+    Bejelentes.foto_url,
+    Bejelentes.foto_thumb_url,
+)
+
+# a módosítás-napló (friss és archív tábla)
+MODOSITAS = {
+    model: Projection(
+        model.modositasiID,
+        model.bejelentesID,
+        model.adminID,
+        model.datum_ido,
+        model.mezo,
+        model.regi_ertek,
+        model.uj_ertek,
+        rename={"modositasiID": "modositasID"},
+    )
+    for model in (Modositas, ModositasArchiv)
+}
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def negotiate(size: int) -> str | None:
+    """A kliens által elfogadott tömörítés ("br" / "gzip"), vagy None."""
+    if not COMPRESSION or size < COMPRESS_MIN_BYTES:
+        return None
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def set_encoding(resp: Response, encoding: str | None) -> Response:
+    if encoding is not None:
+        resp.headers["Content-Encoding"] = encoding
+    if COMPRESSION:
+        resp.vary.add("Accept-Encoding")
+    return resp
+
+
+def json_response(obj, status: int = 200) -> Response:
+    """A jsonify gyors változata (a tömörítés az after_request-ben)."""
+    return Response(dumps(obj), status=status, mimetype=MIMETYPE)
+
+
+def _compress_response(resp: Response) -> Response:
+    if (
+        resp.status_code != 200
+        or resp.mimetype != MIMETYPE
+        or resp.is_streamed
+        or "Content-Encoding" in resp.headers
+    ):
+        return resp
+    body = resp.get_data()
+    encoding = negotiate(len(body))
+    if encoding is not None:
+        resp.set_data(compress(body, encoding))
+    return set_encoding(resp, encoding)
+
+
+def init_app(app) -> None:
+    app.after_request(_compress_response)
@@ -0,0 +1,129 @@
+# app/startup.py
+"""
+Gyors, --preload barát worker indítás (gunicorn.conf.py köti be).
+
+- az adatbázis engine lustán jön létre, fork után a gyermek eldobja az
+  örökölt kapcsolatokat (app/database.py)
+- a séma-ellenőrzés (AUTO_CREATE_TABLES=1) folyamatfánként egyszer fut: a
+  gunicorn mesterében, a workerek a fork után már késznek látják
+- a Jinja sablonok induláskor lefordulnak: preloadnál a mester memóriájában
+  (a workerek fork után készen kapják), és a JINJA_CACHE_DIR bájtkód-cache-be
+  (újrainduló vagy nem preloadolt workereknek nem kell újrafordítani)
+- DB_POOL_WARMUP=n: a worker n kapcsolatot nyit meg, mielőtt forgalmat kap
+- WORKER_STARTUP_BUDGET_MS (1000): a fork -> kész idő kerete; túllépéskor
+  WARNING, a mért idők a zold_worker_startup_seconds metrikában és a
+  /admin/db/allapot végponton
+"""
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+from app import changefeed, ingest, metrics, replica
+from app.database import get_engine
+
+
+log = logging.getLogger(__name__)
+
+JINJA_CACHE_DIR = os.environ.get("JINJA_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "zold-lovag-jinja")
+PRECOMPILE = os.environ.get("JINJA_PRECOMPILE", "on") != "off"
+POOL_WARMUP = int(os.environ.get("DB_POOL_WARMUP", "0"))
+BUDGET_MS = float(os.environ.get("WORKER_STARTUP_BUDGET_MS", "1000"))
+
+# a gunicorn.conf.py beírja a mester pid-jét; a workerek öröklik, de más a pid-jük
+MASTER_ENV = "ZOLD_GUNICORN_MASTER"
+
+_schema_checked = False
+_status: dict = {}
+
+
+def in_master() -> bool:
+    """A gunicorn mesterfolyamatában fut-e (pl. preload alatt)."""
+    return os.environ.get(MASTER_ENV) == str(os.getpid())
+
+
+def check_schema_once() -> None:
+    """ensure_schema egyszer a folyamatfában; utána a kapcsolatok lezárva."""
+    global _schema_checked
+    if _schema_checked:
+        return
+    from app.schema import ensure_schema
+
+    eng = get_engine()
+    ensure_schema(eng)
+    # a mester ne adjon tovább nyitott kapcsolatot a workereknek
+    eng.dispose()
+    _schema_checked = True
+
+
+def configure_templates(app) -> None:
+    os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+
+
+def precompile_templates(app) -> int:
+    """Minden sablon betöltése (a bájtkód-cache-ből, vagy fordítás és mentés)."""
+    names = app.jinja_env.list_templates(extensions=("html",))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def warmup_pool(n: int = POOL_WARMUP) -> int:
+    """n kapcsolat megnyitása az elsődlegesen (és minden replikán), majd vissza a pool-ba."""
+    if n <= 0:
+        return 0
+    opened = 0
+    for eng in [get_engine()] + [r.engine for r in replica.replicas]:
+        conns = []
+        try:
+            for _ in range(n):
+                conns.append(eng.connect())
+        except Exception as e:
+            log.warning("Pool előmelegítés sikertelen (%s): %s", eng.url.render_as_string(hide_password=True), e)
+        finally:
+            opened += len(conns)
+            for c in conns:
+                c.close()
+    return opened
+
+
+def app_created(started: float) -> None:
+    """A create_app() végén: az alkalmazás felépítésének ideje."""
+    _status["app_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    _status["app_pid"] = os.getpid()
+
+
+def worker_ready(forked_at: float, threaded: bool = True) -> dict:
+    """
+    A worker forgalom előtti utolsó lépése (gunicorn post_worker_init):
+    pool előmelegítés, háttér writer, SSE be / ki (threaded: nem szinkron
+    worker), majd a fork óta eltelt idő mérése.
+    """
+    changefeed.configure_sse(threaded)
+    t = time.perf_counter()
+    _status["warmup_connections"] = warmup_pool()
+    _status["warmup_ms"] = round((time.perf_counter() - t) * 1000, 1)
+    ingest.ensure_writer()
+
+    elapsed = time.perf_counter() - forked_at
+    _status.update({
+        "pid": os.getpid(),
+        "startup_ms": round(elapsed * 1000, 1),
+        "budget_ms": BUDGET_MS,
+        "preloaded": _status.get("app_pid") != os.getpid(),
+    })
+    metrics.observe("zold_worker_startup_seconds", {}, elapsed)
+    if elapsed * 1000 > BUDGET_MS:
+        log.warning("A worker indulása %.0f ms, a keret %.0f ms: %s", elapsed * 1000, BUDGET_MS, _status)
+    else:
+        log.info("Worker kész: %.0f ms (keret: %.0f ms)", elapsed * 1000, BUDGET_MS)
+    return dict(_status)
+
+
+def status() -> dict:
+    return dict(_status)
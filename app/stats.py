@@ -0,0 +1,189 @@
+# app/stats.py
+"""
+Inkrementálisan karbantartott statisztika a Statisztika táblában.
+
+Minden (nap, statusz, prioritas, hulladek_tipus) kombinációhoz egy darabszám
+tartozik; a nap a bejelentés napja, a többi a jelenlegi érték. Az írási
+utak (beküldés, egyedi és tömeges admin módosítás) ugyanabban a
+tranzakcióban igazítják a számlálókat, így a lekérdezés mérete a napok és a
+kategóriák számától függ, nem a bejelentésekétől.
+
+rebuild() mindent újraszámol a Bejelentes táblából (visszatöltés, vagy ha a
+számlálók valamiért eltértek).
+"""
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Date, cast, delete, func, insert, literal_column, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.models import Bejelentes, Statisztika
+
+
+NINCS = "nincs megadva"
+NYITOTT_KIVETEL = "lezárt"
+DEFAULT_DAYS = 30
+
+
+def key_of(datum_ido: datetime, statusz, prioritas, hulladek_tipus) -> tuple:
+    return (datum_ido.date(), statusz, prioritas or "", hulladek_tipus or "")
+
+
+def key_for(b) -> tuple:
+    return key_of(b.datum_ido, b.statusz, b.prioritas, b.hulladek_tipus)
+
+
+def apply(db, deltas: Counter) -> None:
+    """
+    A számlálók igazítása a hívó tranzakciójában ({kulcs: +/-n}).
+    A commit a hívó dolga.
+    """
+    for (nap, statusz, prioritas, tipus), n in sorted(deltas.items()):
+        if not n:
+            continue
+        where = (
+            Statisztika.nap == nap,
+            Statisztika.statusz == statusz,
+            Statisztika.prioritas == prioritas,
+            Statisztika.hulladek_tipus == tipus,
+        )
+        bump = update(Statisztika).where(*where).values(darab=Statisztika.darab + n)
+        if db.execute(bump).rowcount:
+            continue
+        try:
+            # új kombináció; egy párhuzamos tranzakció ugyanezt beszúrhatta
+            with db.begin_nested():
+                db.execute(insert(Statisztika).values(
+                    nap=nap, statusz=statusz, prioritas=prioritas, hulladek_tipus=tipus, darab=n,
+                ))
+        except IntegrityError:
+            db.execute(bump)
+
+
+def record_new(db, items) -> None:
+    apply(db, Counter(key_for(b) for b in items))
+
+
+def record_change(db, old_key: tuple, new_key: tuple) -> None:
+    if old_key != new_key:
+        apply(db, Counter({old_key: -1, new_key: 1}))
+
+
+def record_bulk_change(db, ids: list[int], values: dict) -> None:
+    """
+    Tömeges módosítás előtt hívandó (a régi értékek még a táblában vannak).
+    `values`: mezőnév -> új érték (None: nem változik).
+    """
+    rows = db.execute(
+        select(Bejelentes.datum_ido, Bejelentes.statusz, Bejelentes.prioritas, Bejelentes.hulladek_tipus)
+        .where(Bejelentes.bejelentesID.in_(ids))
+    ).all()
+    deltas = Counter()
+    for datum_ido, statusz, prioritas, tipus in rows:
+        deltas[key_of(datum_ido, statusz, prioritas, tipus)] -= 1
+        deltas[key_of(
+            datum_ido,
+            values.get("statusz") or statusz,
+            values["prioritas"] if values.get("prioritas") is not None else prioritas,
+            values["hulladek_tipus"] if values.get("hulladek_tipus") is not None else tipus,
+        )] += 1
+    apply(db, deltas)
+
+
+def _day_expr(dialect_name: str):
+    # SQLite-on a CAST(... AS DATE) számot adna
+    if dialect_name == "sqlite":
+        return func.date(Bejelentes.datum_ido)
+    return cast(Bejelentes.datum_ido, Date)
+
+
+def rebuild(db) -> int:
+    """Teljes újraszámolás egy tranzakcióban. Visszatérés: a kombinációk száma."""
+    nap = _day_expr(db.get_bind().dialect.name)
+    # literal_column: SQL Serveren a SELECT és a GROUP BY kifejezésnek egyeznie kell
+    prioritas = func.coalesce(Bejelentes.prioritas, literal_column("''"))
+    tipus = func.coalesce(Bejelentes.hulladek_tipus, literal_column("''"))
+
+    db.execute(delete(Statisztika))
+    res = db.execute(
+        insert(Statisztika).from_select(
+            ["nap", "statusz", "prioritas", "hulladek_tipus", "darab"],
+            select(nap, Bejelentes.statusz, prioritas, tipus, func.count())
+            .group_by(nap, Bejelentes.statusz, prioritas, tipus),
+        )
+    )
+    db.commit()
+    return max(res.rowcount or 0, 0)
+
+
+def _label(v: str) -> str:
+    return v or NINCS
+
+
+def summary(db, date_from: date | None = None, date_to: date | None = None) -> dict:
+    """
+    Összesítők a dashboardhoz / JSON végponthoz. A napi bontás a
+    [date_from, date_to) tartományra szól (alapértelmezés: az utolsó DEFAULT_DAYS nap).
+    """
+    if date_to is None:
+        date_to = date.today() + timedelta(days=1)
+    if date_from is None:
+        date_from = date_to - timedelta(days=DEFAULT_DAYS)
+
+    osszes = Counter()
+    by_statusz = Counter()
+    by_prioritas = Counter()
+    by_tipus = Counter()
+    nyitott_by_tipus = Counter()
+    nyitott_by_prioritas = Counter()
+
+    totals = db.execute(
+        select(
+            Statisztika.statusz,
+            Statisztika.prioritas,
+            Statisztika.hulladek_tipus,
+            func.sum(Statisztika.darab),
+        ).group_by(Statisztika.statusz, Statisztika.prioritas, Statisztika.hulladek_tipus)
+    ).all()
+    for statusz, prioritas, tipus, n in totals:
+        n = int(n or 0)
+        osszes["osszesen"] += n
+        by_statusz[statusz] += n
+        by_prioritas[_label(prioritas)] += n
+        by_tipus[_label(tipus)] += n
+        if statusz != NYITOTT_KIVETEL:
+            nyitott_by_tipus[_label(tipus)] += n
+            nyitott_by_prioritas[_label(prioritas)] += n
+
+    napi = {}
+    daily = db.execute(
+        select(Statisztika.nap, Statisztika.statusz, func.sum(Statisztika.darab))
+        .where(Statisztika.nap >= date_from, Statisztika.nap < date_to)
+        .group_by(Statisztika.nap, Statisztika.statusz)
+        .order_by(Statisztika.nap)
+    ).all()
+    for nap, statusz, n in daily:
+        n = int(n or 0)
+        if not n:
+            continue
+        entry = napi.setdefault(nap, {"nap": nap.isoformat(), "darab": 0, "statusz": {}})
+        entry["darab"] += n
+        entry["statusz"][statusz] = n
+
+    def clean(c: Counter) -> dict:
+        return {k: v for k, v in sorted(c.items()) if v}
+
+    return {
+        "osszesen": osszes["osszesen"],
+        "statusz": clean(by_statusz),
+        "prioritas": clean(by_prioritas),
+        "hulladek_tipus": clean(by_tipus),
+        "nyitott": {
+            "osszesen": sum(nyitott_by_tipus.values()),
+            "hulladek_tipus": clean(nyitott_by_tipus),
+            "prioritas": clean(nyitott_by_prioritas),
+        },
+        "napi": list(napi.values()),
+    }
@@ -0,0 +1,217 @@
+# app/storage.py
+"""
+Tartalom-címzett (content-addressed) fotótár.
+
+A feltöltést darabonként (CHUNK_SIZE) írjuk egy ideiglenes fájlba, közben
+SHA-256-ot számolunk; a végleges kulcs a hash-ből képzett, két szinten
+shardolt útvonal:
+
+    ab/cd/abcdef...0123.jpg
+
+Ha a kulcs már létezik (ugyanazt a fotót már feltöltötték), az ideiglenes
+fájlt eldobjuk – nincs újabb írás. Az ideiglenes fájlok egyedi nevűek, és a
+végleges helyre atomikusan kerülnek, így párhuzamos gunicorn workerek sem
+írhatják felül egymás feltöltését.
+
+Háttértárak (STORAGE_BACKEND):
+- "local" (alapértelmezett): app/static/uploads alatt, a /uploads/<kulcs>
+  URL-en az app/routes/media.py szolgálja ki (hosszú cache, Range, nginx offload)
+- "s3": S3-kompatibilis tároló (pl. helyi MinIO), boto3 szükséges
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path, PurePosixPath
+
+try:
+    import boto3
+except ImportError:  # pragma: no cover - opcionális függőség
+    boto3 = None
+
+
+CHUNK_SIZE = 64 * 1024
+
+LOCAL_ROOT = Path(__file__).resolve().parent / "static" / "uploads"
+LOCAL_URL_PREFIX = "/uploads/"
+# a korábbi feltöltések URL-je (a Flask static alatt); ezeket is a media route szolgálja ki
+LEGACY_URL_PREFIX = "/static/uploads/"
+
+
+def content_key(digest: str, ext: str) -> str:
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}"
+
+
+def derived_key(key: str, suffix: str) -> str:
+    """ab/cd/<hash>.jpg + "thumb.webp" -> ab/cd/<hash>_thumb.webp"""
+    p = PurePosixPath(key)
+    return str(p.with_name(f"{p.stem}_{suffix}"))
+
+
+class Storage(ABC):
+    """Közös rész: streamelés + hash egy helyi ideiglenes fájlba."""
+
+    tmp_dir: Path
+
+    @abstractmethod
+    def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def put_file(self, local_path: Path, key: str) -> None:
+        """A helyi fájlt a kulcs alá teszi (a local_path utána nem használható)."""
+
+    @abstractmethod
+    def open(self, key: str): ...
+
+    @abstractmethod
+    def url(self, key: str) -> str: ...
+
+    @abstractmethod
+    def key_for_url(self, url: str) -> str | None: ...
+
+    def save_stream(self, stream, ext: str) -> tuple[str, bool]:
+        """
+        Visszatérés: (kulcs, új_e). Ha a tartalom már megvolt, új_e False,
+        és semmit nem írtunk a tárba.
+        """
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        h = hashlib.sha256()
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir, prefix="upload-")
+        tmp = Path(tmp_name)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    h.update(chunk)
+                    out.write(chunk)
+
+            key = content_key(h.hexdigest(), ext)
+            if self.exists(key):
+                return key, False
+            self.put_file(tmp, key)
+            return key, True
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir, prefix="put-")
+        tmp = Path(tmp_name)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(data)
+            self.put_file(tmp, key)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: Path = LOCAL_ROOT, url_prefix: str = LOCAL_URL_PREFIX):
+        self.root = root
+        self.url_prefix = url_prefix
+        # ugyanazon a fájlrendszeren, hogy az os.replace atomikus legyen
+        self.tmp_dir = root / ".tmp"
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    def put_file(self, local_path: Path, key: str) -> None:
+        dest = self.path(key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(local_path, dest)
+
+    def open(self, key: str):
+        return open(self.path(key), "rb")
+
+    def url(self, key: str) -> str:
+        return self.url_prefix + key
+
+    def key_for_url(self, url: str) -> str | None:
+        # a régi, /static/uploads/ alatti és időbélyeges nevű feltöltéseket is kezeli
+        for prefix in (self.url_prefix, LEGACY_URL_PREFIX):
+            if url and url.startswith(prefix):
+                return url[len(prefix):]
+        return None
+
+
+class S3Storage(Storage):
+    def __init__(self, bucket: str, public_url: str, endpoint_url: str | None = None, prefix: str = ""):
+        if boto3 is None:
+            raise RuntimeError("Az S3 háttértárhoz a boto3 csomag szükséges.")
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/") + "/"
+        self.prefix = prefix
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.tmp_dir = Path(tempfile.gettempdir()) / "zold-lovag-uploads"
+
+    def _object_key(self, key: str) -> str:
+        return self.prefix + key
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except self.client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_file(self, local_path: Path, key: str) -> None:
+        self.client.upload_file(str(local_path), self.bucket, self._object_key(key))
+
+    def open(self, key: str):
+        buf = io.BytesIO()
+        self.client.download_fileobj(self.bucket, self._object_key(key), buf)
+        buf.seek(0)
+        return buf
+
+    def url(self, key: str) -> str:
+        return self.public_url + self._object_key(key)
+
+    def key_for_url(self, url: str) -> str | None:
+        start = self.public_url + self.prefix
+        if not url or not url.startswith(start):
+            return None
+        return url[len(start):]
+
+
+_storage: Storage | None = None
+_storage_lock = threading.Lock()
+
+
+def _from_env() -> Storage:
+    backend = os.environ.get("STORAGE_BACKEND", "local")
+    if backend == "local":
+        return LocalStorage()
+    if backend == "s3":
+        return S3Storage(
+            bucket=os.environ["S3_BUCKET"],
+            public_url=os.environ["S3_PUBLIC_URL"],
+            endpoint_url=os.environ.get("S3_ENDPOINT_URL"),
+            prefix=os.environ.get("S3_PREFIX", ""),
+        )
+    raise RuntimeError(f"Ismeretlen STORAGE_BACKEND: {backend}")
+
+
+def get_storage() -> Storage:
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = _from_env()
+        return _storage
+
+
+def set_storage(storage: Storage | None) -> None:
+    """Háttértár csere (pl. eszközökben, vagy None: újraolvasás env-ből)."""
+    global _storage
+    with _storage_lock:
+        _storage = storage
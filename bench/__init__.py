@@ -0,0 +1,19 @@
+# bench/__init__.py
+"""
+Reproducible benchmarks for the main routes.
+
+  python -m bench seed --database-url sqlite:///bench.db --reports 100000
+  python -m bench run  --database-url sqlite:///bench.db --out results.json
+  python -m bench run  --database-url ... --gunicorn --workers 4 --concurrency 8
+  python -m bench compare baseline.json results.json --threshold 0.15
+
+`seed` fills a database with synthetic Hungarian reports, modification
+histories and (if Pillow is installed) photos; the same --seed always gives
+the same data. `run` drives every scenario (bench/scenarios.py) through the
+Flask test client, or through a real gunicorn instance, and records
+p50/p95/p99 latency, throughput and DB queries per request as JSON. With
+--baseline (or `compare`), a p95 regression beyond --threshold exits with 1.
+
+DATABASE_URL is read by app/database.py at import time, so the app is only
+imported after the command line has been parsed.
+"""
@@ -0,0 +1,145 @@
+# bench/__main__.py
+"""Command line: python -m bench {seed,run,serialize,compare} --help"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path so "import app.*" works reliably
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def _configure_env(args) -> None:
+    # app/database.py reads these at import time
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    if not os.environ.get("DATABASE_URL"):
+        raise SystemExit("Set DATABASE_URL or pass --database-url.")
+    # measure the routes, not the response cache (unless asked to)
+    if not getattr(args, "cache", False):
+        os.environ["RESPONSE_CACHE"] = "off"
+    os.environ.setdefault("INGEST_MODE", "sync")
+
+
+def cmd_seed(args) -> int:
+    _configure_env(args)
+    from bench.seed import seed
+
+    summary = seed(
+        reports=args.reports, days=args.days, photos=args.photos,
+        photo_ratio=args.photo_ratio, seed_value=args.seed, batch_size=args.batch_size,
+    )
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+def cmd_run(args) -> int:
+    _configure_env(args)
+    from bench.runner import run, save
+
+    result = run(
+        scenario_names=args.scenario, requests=args.requests, warmup=args.warmup,
+        seed_value=args.seed, gunicorn=args.gunicorn, workers=args.workers,
+        threads=args.threads, concurrency=args.concurrency,
+    )
+    if args.out:
+        save(result, args.out)
+        print(f"Results saved to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        return _report(baseline, result, args)
+    return 0
+
+
+def cmd_serialize(args) -> int:
+    _configure_env(args)
+    from bench.runner import run_serialize, save
+
+    result = run_serialize(requests=args.requests, warmup=args.warmup, limit=args.limit)
+    if args.out:
+        save(result, args.out)
+        print(f"Results saved to {args.out}")
+    return 0
+
+
+def cmd_compare(args) -> int:
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    return _report(baseline, current, args)
+
+
+def _report(baseline: dict, current: dict, args) -> int:
+    from bench.runner import compare, meta_differences
+
+    for diff in meta_differences(baseline, current):
+        print(f"Warning: runs differ in {diff}")
+    regressions = compare(baseline, current, args.threshold, args.metric)
+    if regressions:
+        print("Regressions:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("No regression beyond the threshold.")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Zöld Lovag benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("seed", help="fill a database with synthetic data")
+    p.add_argument("--database-url")
+    p.add_argument("--reports", type=int, default=10_000)
+    p.add_argument("--days", type=int, default=365)
+    p.add_argument("--photos", type=int, default=20, help="distinct photos (needs Pillow)")
+    p.add_argument("--photo-ratio", type=float, default=0.3)
+    p.add_argument("--batch-size", type=int, default=2000)
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=cmd_seed)
+
+    p = sub.add_parser("run", help="benchmark the routes")
+    p.add_argument("--database-url")
+    p.add_argument("--scenario", action="append", help="repeatable; default: all")
+    p.add_argument("--requests", type=int, default=200)
+    p.add_argument("--warmup", type=int, default=20)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--cache", action="store_true", help="keep the response cache enabled")
+    p.add_argument("--gunicorn", action="store_true", help="drive a real gunicorn over HTTP")
+    p.add_argument("--workers", type=int, default=2)
+    p.add_argument("--threads", type=int, default=4)
+    p.add_argument("--concurrency", type=int, default=4, help="client threads (gunicorn only)")
+    p.add_argument("--out", help="write the results as JSON")
+    p.add_argument("--baseline", help="fail if slower than this earlier result")
+    p.add_argument("--threshold", type=float, default=0.15)
+    p.add_argument("--metric", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"])
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("serialize", help="list serialization: ORM + dict vs column projection")
+    p.add_argument("--database-url")
+    p.add_argument("--requests", type=int, default=200)
+    p.add_argument("--warmup", type=int, default=20)
+    p.add_argument("--limit", type=int, default=200, help="rows per page")
+    p.add_argument("--out", help="write the results as JSON")
+    p.set_defaults(func=cmd_serialize)
+
+    p = sub.add_parser("compare", help="compare two result files")
+    p.add_argument("baseline")
+    p.add_argument("current")
+    p.add_argument("--threshold", type=float, default=0.15)
+    p.add_argument("--metric", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"])
+    p.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+# bench/runner.py
+"""
+Drivers (Flask test client, gunicorn over HTTP), latency statistics, JSON
+results and baseline comparison.
+"""
+
+from __future__ import annotations
+
+import http.cookiejar
+import io
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench.scenarios import SCENARIOS, Request
+from bench.seed import ADMIN_JELSZO, ADMIN_NEV
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+# ---- drivers ----
+
+class TestClientDriver:
+    """In-process: no network, one request at a time. Queries are counted on this thread only."""
+
+    name = "flask-test-client"
+
+    def __init__(self):
+        from sqlalchemy import event
+
+        from app.database import engine
+        from app.main import app
+
+        self.client = app.test_client()
+        self._logged_in = False
+        self._queries = 0
+        self._thread = threading.get_ident()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _count(*args):
+            # background threads (photo processing, spool writer) are not counted
+            if threading.get_ident() == self._thread:
+                self._queries += 1
+
+    def _ensure_login(self) -> None:
+        if self._logged_in:
+            return
+        r = self.client.post("/admin/login", data={"nev": ADMIN_NEV, "jelszo": ADMIN_JELSZO})
+        if "/admin/dashboard" not in (r.headers.get("Location") or ""):
+            raise SystemExit("Admin login failed – was the database seeded with `python -m bench seed`?")
+        self._logged_in = True
+
+    def send(self, req: Request, admin: bool = False) -> tuple[int, float, int | None]:
+        if admin:
+            self._ensure_login()
+        data = dict(req.form or {})
+        for name, (filename, content) in req.files.items():
+            data[name] = (io.BytesIO(content), filename)
+        before = self._queries
+        started = time.perf_counter()
+        r = self.client.open(req.path, method=req.method, data=data or None,
+                             content_type="multipart/form-data" if req.files else None)
+        r.get_data()
+        elapsed = time.perf_counter() - started
+        return r.status_code, elapsed, self._queries - before
+
+    def close(self) -> None:
+        pass
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class GunicornDriver:
+    """
+    A real gunicorn on a free local port. Every client thread has its own
+    cookie jar (admin session). Queries per request come from the X-DB-Queries
+    header, which the app sends because DB_QUERY_HEADERS=1 is set for it.
+    """
+
+    name = "gunicorn"
+
+    def __init__(self, workers: int, threads: int, env: dict):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.base = f"http://127.0.0.1:{self.port}"
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-w", str(workers), "--threads", str(threads),
+             "-b", f"127.0.0.1:{self.port}", "--log-level", "warning", "app.main:app"],
+            cwd=PROJECT_ROOT,
+            env={**os.environ, **env, "DB_QUERY_HEADERS": "1"},
+        )
+        self._local = threading.local()
+        self._wait_ready()
+
+    def _wait_ready(self, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise SystemExit("gunicorn exited during startup")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        self.close()
+        raise SystemExit("gunicorn did not start in time")
+
+    def _opener(self):
+        opener = getattr(self._local, "opener", None)
+        if opener is None:
+            jar = http.cookiejar.CookieJar()
+            opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar), _NoRedirect)
+            self._local.opener = opener
+            self._local.logged_in = False
+        return opener
+
+    def _ensure_login(self) -> None:
+        # per client thread, before its first admin request
+        self._opener()
+        if not self._local.logged_in:
+            status, _, _ = self._raw(Request("POST", "/admin/login", form={"nev": ADMIN_NEV, "jelszo": ADMIN_JELSZO}))
+            if status != 302:
+                raise SystemExit("Admin login failed – was the database seeded with `python -m bench seed`?")
+            self._local.logged_in = True
+
+    def _raw(self, req: Request) -> tuple[int, float, int | None]:
+        body = None
+        headers = {}
+        if req.files:
+            boundary = uuid.uuid4().hex
+            parts = []
+            for k, v in (req.form or {}).items():
+                parts.append(
+                    f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode("utf-8")
+                )
+            for k, (filename, content) in req.files.items():
+                parts.append(
+                    f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"; filename="{filename}"\r\n'
+                    f"Content-Type: application/octet-stream\r\n\r\n".encode("utf-8") + content + b"\r\n"
+                )
+            parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+            body = b"".join(parts)
+            headers["Content-Type"] = f"multipart/form-data; boundary={boundary}"
+        elif req.form is not None:
+            body = urllib.parse.urlencode(req.form).encode("utf-8")
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        http_req = urllib.request.Request(self.base + req.path, data=body, headers=headers, method=req.method)
+        started = time.perf_counter()
+        try:
+            with self._opener().open(http_req, timeout=60) as resp:
+                resp.read()
+                status, queries = resp.status, resp.headers.get("X-DB-Queries")
+        except urllib.error.HTTPError as e:
+            e.read()
+            status, queries = e.code, e.headers.get("X-DB-Queries")
+        elapsed = time.perf_counter() - started
+        return status, elapsed, int(queries) if queries is not None else None
+
+    def send(self, req: Request, admin: bool = False) -> tuple[int, float, int | None]:
+        if admin:
+            self._ensure_login()
+        return self._raw(req)
+
+    def close(self) -> None:
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+# ---- statistics ----
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def summarize(samples: list[tuple[int, float, int | None]], wall_s: float) -> dict:
+    latencies = sorted(s[1] * 1000 for s in samples)
+    queries = [s[2] for s in samples if s[2] is not None]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if s[0] >= 400),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+        "throughput_rps": round(len(samples) / wall_s, 1) if wall_s else 0.0,
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+# ---- running ----
+
+def run_scenario(driver, ctx, name: str, requests: int, warmup: int, concurrency: int, seed_value: int) -> dict:
+    build, admin = SCENARIOS[name]
+    rng = random.Random(f"{seed_value}:{name}")
+    reqs = [build(rng, ctx) for _ in range(warmup + requests)]
+
+    def send(req):
+        return driver.send(req, admin=admin)
+
+    for req in reqs[:warmup]:
+        send(req)
+
+    timed = reqs[warmup:]
+    started = time.perf_counter()
+    if concurrency > 1 and isinstance(driver, GunicornDriver):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(send, timed))
+    else:
+        samples = [send(req) for req in timed]
+    wall = time.perf_counter() - started
+    return summarize(samples, wall)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scenario_names: list[str], requests: int, warmup: int, seed_value: int,
+        gunicorn: bool = False, workers: int = 2, threads: int = 4, concurrency: int = 1,
+        log=print) -> dict:
+    import sqlalchemy
+    from sqlalchemy import func, select
+
+    from app.database import SessionLocal, engine
+    from app.models import Bejelentes, Modositas
+
+    from bench.scenarios import available, load_context
+
+    ctx = load_context(seed_value=seed_value)
+    names = scenario_names or available(ctx)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(unknown)}")
+
+    db = SessionLocal()
+    try:
+        rows = db.scalar(select(func.count()).select_from(Bejelentes))
+        mods = db.scalar(select(func.count()).select_from(Modositas))
+    finally:
+        db.close()
+
+    driver = GunicornDriver(workers, threads, env={}) if gunicorn else TestClientDriver()
+
+    results = {}
+    try:
+        for name in names:
+            results[name] = run_scenario(driver, ctx, name, requests, warmup, concurrency, seed_value)
+            r = results[name]
+            log(f"{name:28s} p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+                f"p99 {r['p99_ms']:8.2f} ms  {r['throughput_rps']:8.1f} req/s  "
+                f"q/req {r['queries_per_request']}  errors {r['errors']}")
+    finally:
+        driver.close()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "driver": driver.name,
+            "workers": workers if gunicorn else None,
+            "threads": threads if gunicorn else None,
+            "concurrency": concurrency if gunicorn else 1,
+            "requests": requests,
+            "warmup": warmup,
+            "seed": seed_value,
+            "dialect": engine.dialect.name,
+            "bejelentes_rows": rows,
+            "modositas_rows": mods,
+            "response_cache": os.environ.get("RESPONSE_CACHE"),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+# ---- serialization ----
+
+def run_serialize(requests: int, warmup: int, limit: int = 200, log=print) -> dict:
+    """
+    One page of the public list serialized without Flask: the old path (ORM
+    objects, bejelentes_to_dict, stdlib json) against app/serialize.py
+    (column projection, Projection.dicts, dumps). Both read the same rows;
+    every sample uses a new session, so the identity map is never reused.
+    """
+    import sqlalchemy
+    from sqlalchemy import func, select
+
+    from app import serialize
+    from app.database import SessionLocal, engine
+    from app.models import Bejelentes
+    from app.routes.public import bejelentes_to_dict
+
+    order = (Bejelentes.datum_ido.desc(), Bejelentes.bejelentesID.desc())
+
+    def orm_dicts(db) -> bytes:
+        rows = db.query(Bejelentes).order_by(*order).limit(limit).all()
+        items = [bejelentes_to_dict(b) for b in rows]
+        return json.dumps({"items": items}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def projection(db) -> bytes:
+        rows = db.connection().execute(select(*serialize.BEJELENTES.columns).order_by(*order).limit(limit)).all()
+        return serialize.dumps({"items": serialize.BEJELENTES.dicts(rows)})
+
+    paths = {"serialize_orm_dict": orm_dicts, "serialize_projection": projection}
+    db = SessionLocal()
+    try:
+        rows = db.scalar(select(func.count()).select_from(Bejelentes))
+        if not rows:
+            raise SystemExit("The database is empty – run `python -m bench seed` first.")
+        bodies = [json.loads(fn(db)) for fn in paths.values()]
+    finally:
+        db.close()
+    if bodies[0] != bodies[1]:
+        log("Warning: the two paths return different JSON")
+
+    results = {}
+    for name, fn in paths.items():
+        samples = []
+        for i in range(warmup + requests):
+            db = SessionLocal()
+            try:
+                started = time.perf_counter()
+                fn(db)
+                elapsed = time.perf_counter() - started
+            finally:
+                db.close()
+            if i >= warmup:
+                samples.append((200, elapsed, 1))
+        results[name] = r = summarize(samples, sum(s[1] for s in samples))
+        log(f"{name:28s} p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+            f"p99 {r['p99_ms']:8.2f} ms  {r['throughput_rps']:8.1f} pages/s")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "driver": "in-process",
+            "requests": requests,
+            "warmup": warmup,
+            "page_size": limit,
+            "dialect": engine.dialect.name,
+            "bejelentes_rows": rows,
+            "orjson": serialize.orjson is not None,
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+# ---- comparison ----
+
+def compare(baseline: dict, current: dict, threshold: float, metric: str = "p95_ms",
+            min_delta_ms: float = 1.0) -> list[str]:
+    """
+    Regressions of `metric` beyond `threshold` (0.15 = 15 %). Differences
+    below min_delta_ms are treated as noise, so sub-millisecond routes do not
+    fail on jitter.
+    """
+    regressions = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        b, c = base[metric], cur[metric]
+        if c > b * (1 + threshold) and c - b >= min_delta_ms:
+            regressions.append(f"{name}: {metric} {b:.2f} -> {c:.2f} ms (+{(c / b - 1) * 100 if b else 100:.0f} %)")
+    return regressions
+
+
+COMPARABLE_META = ("driver", "dialect", "workers", "threads", "concurrency", "response_cache")
+
+
+def meta_differences(baseline: dict, current: dict) -> list[str]:
+    """Settings that differ between two runs (their numbers are not comparable)."""
+    b, c = baseline.get("meta", {}), current.get("meta", {})
+    diffs = [f"{k}: {b.get(k)} vs {c.get(k)}" for k in COMPARABLE_META if b.get(k) != c.get(k)]
+    # the create_* scenarios add rows, so only a large difference matters
+    rb, rc = b.get("bejelentes_rows") or 0, c.get("bejelentes_rows") or 0
+    if abs(rc - rb) > 0.1 * max(rb, 1):
+        diffs.append(f"bejelentes_rows: {rb} vs {rc}")
+    return diffs
+
+
+def save(result: dict, path: str) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,166 @@
+# bench/scenarios.py
+"""
+The requests each benchmark scenario sends. A scenario builds one request
+from a seeded RNG and a context sampled from the database once per run
+(existing ids, cursors, coordinates), so runs against the same data send
+the same requests.
+"""
+
+from __future__ import annotations
+
+import io
+import random
+from dataclasses import dataclass, field
+from urllib.parse import quote
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    form: dict | None = None
+    files: dict = field(default_factory=dict)   # name -> (filename, bytes)
+
+
+@dataclass
+class Context:
+    cursors: list[str]
+    points: list[tuple[float, float]]
+    search_terms: list[str]
+    photo: bytes | None
+
+
+def load_context(sample: int = 200, seed_value: int = 1) -> Context:
+    from sqlalchemy import func, select
+
+    from app.database import SessionLocal
+    from app.models import Bejelentes
+    from app.pagination import encode_cursor
+
+    rng = random.Random(seed_value)
+    db = SessionLocal()
+    try:
+        total = db.scalar(select(func.count()).select_from(Bejelentes)) or 0
+        if not total:
+            raise SystemExit("The database is empty – run `python -m bench seed` first.")
+        rows = db.execute(
+            select(Bejelentes.bejelentesID, Bejelentes.datum_ido, Bejelentes.koord_szel, Bejelentes.koord_hossz)
+            .where(Bejelentes.bejelentesID.in_(
+                [rng.randint(1, max(total, 1)) for _ in range(sample)]
+            ))
+        ).all()
+    finally:
+        db.close()
+
+    photo = None
+    try:
+        from PIL import Image
+        buf = io.BytesIO()
+        Image.new("RGB", (1200, 900), (120, 160, 90)).save(buf, "JPEG", quality=85)
+        photo = buf.getvalue()
+    except ImportError:
+        pass
+
+    return Context(
+        cursors=[encode_cursor(r.datum_ido, r.bejelentesID) for r in rows] or [""],
+        points=[(float(r.koord_szel), float(r.koord_hossz)) for r in rows if r.koord_szel is not None]
+        or [(47.4979, 19.0402)],
+        search_terms=["kossuth", "fo utca", "petofi 12", "lom", "gumiabroncs", "budapest rakoczi"],
+        photo=photo,
+    )
+
+
+def _bbox(lat: float, lng: float, half: float) -> str:
+    return f"south={lat - half}&west={lng - half}&north={lat + half}&east={lng + half}"
+
+
+def _list(rng, ctx):
+    return Request("GET", "/bejelentesek?limit=200")
+
+
+def _list_deep(rng, ctx):
+    return Request("GET", f"/bejelentesek?limit=200&cursor={rng.choice(ctx.cursors)}")
+
+
+def _kozel(rng, ctx):
+    lat, lng = rng.choice(ctx.points)
+    return Request("GET", f"/bejelentesek/kozel?lat={lat}&lng={lng}&r=500")
+
+
+def _terulet(rng, ctx):
+    lat, lng = rng.choice(ctx.points)
+    return Request("GET", f"/bejelentesek/terulet?{_bbox(lat, lng, 0.02)}")
+
+
+def _klaszterek(rng, ctx):
+    lat, lng = rng.choice(ctx.points)
+    return Request("GET", f"/terkep/klaszterek?{_bbox(lat, lng, 0.15)}&zoom=12")
+
+
+def _dashboard(rng, ctx):
+    return Request("GET", "/admin/dashboard")
+
+
+def _dashboard_statusz(rng, ctx):
+    statusz = rng.choice(["beérkezett", "folyamatban", "lezárt"])
+    return Request("GET", f"/admin/dashboard?statusz={quote(statusz)}")
+
+
+def _dashboard_kereses(rng, ctx):
+    return Request("GET", f"/admin/dashboard?hely={quote(rng.choice(ctx.search_terms))}")
+
+
+def _dashboard_kozel(rng, ctx):
+    lat, lng = rng.choice(ctx.points)
+    return Request("GET", f"/admin/dashboard?hely={lat}%2C{lng}&sugar=500")
+
+
+def _modositasok(rng, ctx):
+    return Request("GET", "/admin/modositasok")
+
+
+def _statisztika(rng, ctx):
+    return Request("GET", "/admin/statisztika")
+
+
+def _create(rng, ctx):
+    lat, lng = rng.choice(ctx.points)
+    return Request("POST", "/bejelentes", form={
+        "cim": f"Budapest, Kossuth Lajos u. {rng.randint(1, 120)}.",
+        "leiras": "Benchmark bejelentés",
+        "koord_szel": str(lat),
+        "koord_hossz": str(lng),
+    })
+
+
+def _create_foto(rng, ctx):
+    req = _create(rng, ctx)
+    # bytes after the JPEG end marker are ignored by decoders, but give every
+    # upload a new content hash, so this measures the "new photo" path
+    req.files = {"foto": ("bench.jpg", ctx.photo + rng.randbytes(16))}
+    return req
+
+
+# name -> (request builder, needs an admin login)
+SCENARIOS = {
+    "list_bejelentesek": (_list, False),
+    "list_bejelentesek_deep": (_list_deep, False),
+    "kozel": (_kozel, False),
+    "terulet": (_terulet, False),
+    "klaszterek": (_klaszterek, False),
+    "dashboard": (_dashboard, True),
+    "dashboard_statusz": (_dashboard_statusz, True),
+    "dashboard_kereses": (_dashboard_kereses, True),
+    "dashboard_kozel": (_dashboard_kozel, True),
+    "modositasok": (_modositasok, True),
+    "statisztika": (_statisztika, True),
+    "create_bejelentes": (_create, False),
+    "create_bejelentes_foto": (_create_foto, False),
+}
+
+
+def available(ctx: Context) -> list[str]:
+    names = list(SCENARIOS)
+    if ctx.photo is None:
+        names.remove("create_bejelentes_foto")
+    return names
@@ -0,0 +1,191 @@
+# bench/seed.py
+"""
+Synthetic data for the benchmarks: reports spread over Hungarian cities,
+consistent modification histories, and a pool of photos shared between
+reports (the photo store is content-addressed, so this mirrors real
+duplicate uploads).
+"""
+
+from __future__ import annotations
+
+import io
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+ADMIN_NEV = "bench"
+ADMIN_JELSZO = "bench-jelszo"
+
+# (city, centre latitude, longitude, spread in degrees)
+CITIES = [
+    ("Budapest", 47.4979, 19.0402, 0.08),
+    ("Győr", 47.6875, 17.6504, 0.03),
+    ("Debrecen", 47.5316, 21.6273, 0.04),
+    ("Szeged", 46.2530, 20.1414, 0.03),
+    ("Pécs", 46.0727, 18.2323, 0.03),
+    ("Miskolc", 48.1035, 20.7784, 0.03),
+    ("Kecskemét", 46.8964, 19.6897, 0.03),
+    ("Székesfehérvár", 47.1860, 18.4221, 0.03),
+]
+STREETS = [
+    "Kossuth Lajos u.", "Petőfi Sándor utca", "Rákóczi út", "Ady Endre u.",
+    "Fő utca", "Dózsa György út", "Széchenyi tér", "Arany János utca",
+    "Bajcsy-Zsilinszky út", "Béke ltp.", "Szent István krt.", "Duna stny.",
+]
+LEIRASOK = [
+    "Illegálisan lerakott építési törmelék az út szélén.",
+    "Kidobott bútorok és lom a járdán.",
+    "Gumiabroncsok a patakparton.",
+    "Háztartási szemét zsákokban az erdő szélén.",
+    "Elszórt palackok és műanyag hulladék a parkban.",
+    "Festékes vödrök a garázssor mögött.",
+    "Zöldhulladék a buszmegálló mellett.",
+    None,
+]
+TIPUSOK = ["építési törmelék", "lom", "gumiabroncs", "háztartási", "műanyag", "veszélyes", "zöld"]
+MENNYISEGEK = ["kevés", "1-2 zsák", "egy utánfutónyi", "több m³"]
+PRIORITASOK = ["alacsony", "közepes", "magas"]
+
+
+def _report(rng: random.Random, now: datetime, days: int) -> dict:
+    city, lat0, lng0, spread = rng.choice(CITIES)
+    has_cim = rng.random() < 0.85
+    has_coords = not has_cim or rng.random() < 0.7
+    r = rng.random()
+    statusz = "beérkezett" if r < 0.5 else "folyamatban" if r < 0.8 else "lezárt"
+    touched = statusz != "beérkezett" or rng.random() < 0.2
+    return {
+        "datum_ido": now - timedelta(seconds=rng.randint(0, days * 86400)),
+        "cim": f"{city}, {rng.choice(STREETS)} {rng.randint(1, 120)}." if has_cim else None,
+        "koord_szel": round(rng.gauss(lat0, spread), 6) if has_coords else None,
+        "koord_hossz": round(rng.gauss(lng0, spread), 6) if has_coords else None,
+        "leiras": rng.choice(LEIRASOK),
+        "statusz": statusz,
+        "prioritas": rng.choice(PRIORITASOK) if touched and rng.random() < 0.7 else None,
+        "hulladek_tipus": rng.choice(TIPUSOK) if touched and rng.random() < 0.8 else None,
+        "mennyiseg": rng.choice(MENNYISEGEK) if touched and rng.random() < 0.5 else None,
+        # executemany: every row needs the same keys
+        "foto_url": None,
+        "foto_thumb_url": None,
+        "foto_webp_url": None,
+        "foto_avif_url": None,
+    }
+
+
+def _history(rng: random.Random, bejelentes_id: int, row: dict, admin_id: int) -> list[dict]:
+    """The admin changes that led to the row's current state."""
+    steps = []
+    if row["statusz"] in ("folyamatban", "lezárt"):
+        steps.append(("státusz", "beérkezett", "folyamatban"))
+    if row["statusz"] == "lezárt":
+        steps.append(("státusz", "folyamatban", "lezárt"))
+    for mezo, key in (("prioritás", "prioritas"), ("hulladék tipus", "hulladek_tipus"), ("mennyiség", "mennyiseg")):
+        if row[key] is not None:
+            steps.insert(rng.randint(0, len(steps)), (mezo, None, row[key]))
+
+    t = row["datum_ido"]
+    out = []
+    for mezo, regi, uj in steps:
+        t = t + timedelta(minutes=rng.randint(5, 3 * 24 * 60))
+        out.append({
+            "bejelentesID": bejelentes_id, "adminID": admin_id, "datum_ido": t,
+            "mezo": mezo, "regi_ertek": regi, "uj_ertek": uj,
+        })
+    return out
+
+
+def _photos(rng: random.Random, count: int) -> list[dict]:
+    """Generated JPEGs in the photo store, with processed derivatives."""
+    from app import images
+    from app.storage import get_storage
+
+    if images.Image is None or count <= 0:
+        return []
+    storage = get_storage()
+    result = []
+    for _ in range(count):
+        img = images.Image.new("RGB", (1600, 1200), tuple(rng.randint(0, 255) for _ in range(3)))
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=85)
+        buf.seek(0)
+        key, _ = storage.save_stream(buf, ".jpg")
+        values = {"foto_url": storage.url(key)}
+        values.update(images.process_photo(values["foto_url"]))
+        result.append(values)
+    return result
+
+
+def seed(reports: int, days: int = 365, photos: int = 20, photo_ratio: float = 0.3,
+         seed_value: int = 1, batch_size: int = 2000, log=print) -> dict:
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+
+    from app import geo, search, stats
+    from app.database import SessionLocal, engine
+    from app.models import Adminisztrator, Bejelentes, KeresesiIndex, Modositas
+    from app.schema import ensure_schema
+
+    started = time.monotonic()
+    rng = random.Random(seed_value)
+    ensure_schema(engine)
+    use_inverted_index = engine.dialect.name != "postgresql"
+
+    db = SessionLocal()
+    try:
+        admin = db.query(Adminisztrator).filter(Adminisztrator.nev == ADMIN_NEV).first()
+        if admin is None:
+            admin = Adminisztrator(
+                nev=ADMIN_NEV,
+                jelszo_hash=generate_password_hash(ADMIN_JELSZO),
+                fiok_allapot="nyitott",
+                hiba_probalkozasok=0,
+            )
+            db.add(admin)
+            db.commit()
+        admin_id = admin.adminID
+
+        photo_pool = _photos(rng, photos)
+        log(f"{len(photo_pool)} photos in the store")
+
+        # fix "now", so the same --seed always gives the same data
+        now = datetime(2025, 1, 1)
+        returning = insert(Bejelentes).returning(Bejelentes.bejelentesID, sort_by_parameter_order=True)
+        counts = Counter()
+        done = 0
+        while done < reports:
+            rows = [_report(rng, now, days) for _ in range(min(batch_size, reports - done))]
+            for row in rows:
+                row["geohash"] = geo.geohash_for(row["koord_szel"], row["koord_hossz"])
+                row["kereso_szoveg"] = search.document_text(row["cim"], row["leiras"])
+                if photo_pool and rng.random() < photo_ratio:
+                    row.update(rng.choice(photo_pool))
+            ids = db.execute(returning, rows).scalars().all()
+
+            histories = []
+            terms = []
+            for bejelentes_id, row in zip(ids, rows):
+                histories.extend(_history(rng, bejelentes_id, row, admin_id))
+                if use_inverted_index:
+                    for szo, n in Counter(search.tokenize(row["kereso_szoveg"])).items():
+                        terms.append({"szo": szo, "bejelentesID": bejelentes_id, "gyakorisag": n})
+            if histories:
+                db.execute(insert(Modositas), histories)
+            if terms:
+                db.execute(insert(KeresesiIndex), terms)
+            db.commit()
+
+            done += len(rows)
+            counts["modositas"] += len(histories)
+            log(f"{done}/{reports} reports")
+
+        stats.rebuild(db)
+    finally:
+        db.close()
+
+    return {
+        "reports": reports,
+        "modifications": counts["modositas"],
+        "photos": len(photo_pool),
+        "seconds": round(time.monotonic() - started, 1),
+    }
@@ -0,0 +1,53 @@
+# gunicorn.conf.py
+"""
+gunicorn settings for a fast, fork-safe worker startup (see app/startup.py).
+gunicorn reads this file automatically when started from the project root:
+
+  gunicorn -w 4 app.main:app
+  GUNICORN_PRELOAD=0 gunicorn -w 4 app.main:app     # load the app in each worker
+
+With preload the master builds the app once (schema check, precompiled
+templates) and the workers fork from it; the database engine is created
+lazily and every worker opens its own connections after the fork.
+
+Workers are threaded (gthread, GUNICORN_THREADS per worker) by default: the
+dashboard's live feed (app/changefeed.py) holds one request open per browser
+tab, which would pin a whole sync worker and be killed by its `timeout`.
+With a sync worker class (-k sync / GUNICORN_WORKER_CLASS=sync) the feed is
+switched off in that worker (VALTOZAS_SSE=auto) and the dashboard polls.
+"""
+
+import os
+import time
+
+# app/startup.py: in_master()
+os.environ["ZOLD_GUNICORN_MASTER"] = str(os.getpid())
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+# gunicorn silently switches a sync worker with threads > 1 to gthread
+threads = int(os.environ.get("GUNICORN_THREADS", "8" if worker_class == "gthread" else "1"))
+# gthread: heartbeat timeout of the worker process, not a per-request limit,
+# so long-lived SSE responses are not killed
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+
+
+def on_starting(server):
+    # preload nélkül is a mester ellenőrzi a sémát; a workerek ezt öröklik
+    if os.environ.get("AUTO_CREATE_TABLES") == "1":
+        from app import startup
+
+        startup.check_schema_once()
+
+
+def post_fork(server, worker):
+    worker.zold_forked_at = time.perf_counter()
+
+
+def post_worker_init(worker):
+    from gunicorn.workers.sync import SyncWorker
+
+    from app import startup
+
+    startup.worker_ready(worker.zold_forked_at, threaded=not isinstance(worker, SyncWorker))
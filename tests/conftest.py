@@ -0,0 +1,51 @@
+# tests/conftest.py
+"""
+Közös fixture-ök. A tesztek egy ideiglenes SQLite adatbázison futnak: a
+DATABASE_URL-t még az app importálása előtt felülírjuk, így egy beállított
+éles / fejlesztői adatbázist sosem érintenek.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+_TMP = tempfile.mkdtemp(prefix="zold-lovag-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/test.db"
+os.environ["INGEST_SPOOL"] = os.path.join(_TMP, "spool.sqlite")
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Üres séma minden tesztnek, és egy session hozzá."""
+    from app.database import SessionLocal, get_engine
+    from app.models import Base
+    from app.schema import ensure_schema
+
+    eng = get_engine()
+    Base.metadata.drop_all(eng)
+    ensure_schema(eng)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Helyi fotótár egy ideiglenes könyvtárban."""
+    from app.storage import LocalStorage, set_storage
+
+    st = LocalStorage(root=tmp_path / "uploads")
+    set_storage(st)
+    try:
+        yield st
+    finally:
+        set_storage(None)
@@ -0,0 +1,72 @@
+from sqlalchemy import select
+
+from app import changefeed
+from app.models import Bejelentes, Modositas, Valtozas
+from app.routes.admin import bulk_update
+
+
+def _reports(db, *statuszok):
+    items = [Bejelentes(cim=f"Fő utca {i}", statusz=s) for i, s in enumerate(statuszok)]
+    db.add_all(items)
+    db.commit()
+    return [b.bejelentesID for b in items]
+
+
+def test_bulk_update_reports_only_changed_rows(db):
+    ids = _reports(db, "beérkezett", "lezárt", "beérkezett")
+
+    naplozott, valtozott = bulk_update(db, ids, 1, {"statusz": "lezárt", "prioritas": None})
+    assert valtozott == [ids[0], ids[2]]
+    assert naplozott == 2
+    changefeed.record(db, valtozott)
+    db.commit()
+
+    assert set(db.scalars(select(Valtozas.bejelentesID))) == {ids[0], ids[2]}
+    assert set(db.scalars(select(Modositas.bejelentesID))) == {ids[0], ids[2]}
+    assert {b.statusz for b in db.query(Bejelentes)} == {"lezárt"}
+
+
+def test_bulk_update_without_change(db):
+    ids = _reports(db, "lezárt", "lezárt")
+    assert bulk_update(db, ids, 1, {"statusz": "lezárt"}) == (0, [])
+    assert bulk_update(db, ids, 1, {"statusz": None}) == (0, [])
+    assert db.query(Modositas).count() == 0
+
+
+def test_split_rolls_back_on_error(db, monkeypatch):
+    from app.main import app
+
+    ids = _reports(db, "beérkezett", "beérkezett")
+    db.get(Bejelentes, ids[1]).kanonikusID = ids[0]
+    db.commit()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("changefeed")
+
+    monkeypatch.setattr(changefeed, "record", fail)
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["admin_id"] = 1
+    r = client.post(f"/admin/bejelentes/{ids[1]}/szetvalasztas")
+    assert r.status_code == 302
+
+    db.expire_all()
+    assert db.get(Bejelentes, ids[1]).kanonikusID == ids[0]
+
+
+def test_merge_records_repointed_duplicates(db):
+    from app.main import app
+
+    ids = _reports(db, "beérkezett", "beérkezett", "beérkezett", "beérkezett")
+    # ids[3] az ids[1] duplikátuma: az összevonással ő is új kanonikusID-t kap
+    db.get(Bejelentes, ids[3]).kanonikusID = ids[1]
+    db.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["admin_id"] = 1
+    client.post("/admin/bejelentesek/osszevonas", data={"ids": [ids[1], ids[2]], "kanonikus": ids[0]})
+
+    db.expire_all()
+    assert [db.get(Bejelentes, i).kanonikusID for i in ids] == [None, ids[0], ids[0], ids[0]]
+    assert set(db.scalars(select(Valtozas.bejelentesID))) == set(ids)
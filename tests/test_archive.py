@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+
+from app import archive
+from app.models import Bejelentes, Modositas, ModositasArchiv
+
+
+def _change(db, b, when):
+    m = Modositas(bejelentesID=b.bejelentesID, adminID=1, datum_ido=when,
+                  mezo="státusz", regi_ertek="beérkezett", uj_ertek="lezárt")
+    db.add(m)
+    db.commit()
+    return m.modositasiID
+
+
+def test_ids_not_reused_after_archiving_everything(db):
+    b = Bejelentes(cim="Fő utca 3")
+    db.add(b)
+    db.commit()
+    old = datetime(2020, 1, 1)
+    first = [_change(db, b, old + timedelta(days=i)) for i in range(3)]
+
+    assert archive.archive(db, datetime(2021, 1, 1)) == 3
+    assert db.query(Modositas).count() == 0
+
+    # az üres táblában sem kezdődik újra a számozás
+    again = _change(db, b, old + timedelta(days=10))
+    assert again > max(first)
+    assert archive.archive(db, datetime(2021, 1, 1)) == 1
+    assert [m.modositasiID for m in archive.history(db, b.bejelentesID)] == first + [again]
+    assert db.query(ModositasArchiv).count() == 4
@@ -0,0 +1,65 @@
+import pytest
+
+from app import cache
+from app.models import Bejelentes
+
+pytestmark = pytest.mark.skipif(cache._counter is None, reason="RESPONSE_CACHE=off")
+
+
+def _add(db, cim="Győr, Fő utca 3"):
+    db.add(Bejelentes(cim=cim))
+    cache.invalidate(db)
+    db.commit()
+
+
+def test_version_bumped_after_commit(db):
+    v = cache.current_version()
+    db.add(Bejelentes(cim="x"))
+    cache.invalidate(db)
+    db.flush()
+    assert cache.current_version() == v
+    db.commit()
+    assert cache.current_version() == v + 1
+
+
+def test_rolled_back_invalidation_forgotten(db):
+    v = cache.current_version()
+    db.add(Bejelentes(cim="x"))
+    cache.invalidate(db)
+    db.rollback()
+    assert cache.current_version() == v
+
+    # a következő, invalidálás nélküli commit nem növel
+    db.add(Bejelentes(cim="y"))
+    db.commit()
+    assert cache.current_version() == v
+
+
+def test_savepoint_commit_waits_for_outer_commit(db):
+    v = cache.current_version()
+    with db.begin_nested():
+        db.add(Bejelentes(cim="x"))
+        cache.invalidate(db)
+    assert cache.current_version() == v
+    db.commit()
+    assert cache.current_version() == v + 1
+
+
+def test_etag_round_trip(db):
+    from app.main import app
+
+    _add(db)
+    client = app.test_client()
+    first = client.get("/bejelentesek")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag
+
+    again = client.get("/bejelentesek", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.get_data() == b""
+    assert again.headers["ETag"] == etag
+
+    # egy új bejelentés commitja után a régi ETag már nem érvényes
+    _add(db, "Győr, Fő utca 5")
+    changed = client.get("/bejelentesek", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert len(changed.get_json()["items"]) == 2
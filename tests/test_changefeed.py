@@ -0,0 +1,20 @@
+import pytest
+
+from app import changefeed
+
+
+def test_cursor_roundtrip():
+    assert changefeed.decode_cursor(changefeed.encode_cursor(12, 345)) == (12, 345)
+
+
+@pytest.mark.parametrize("mode, threaded, enabled", [
+    ("auto", False, False),
+    ("auto", True, True),
+    ("on", False, True),
+    ("off", True, False),
+])
+def test_sse_follows_worker_class(monkeypatch, mode, threaded, enabled):
+    monkeypatch.setattr(changefeed, "SSE_MODE", mode)
+    monkeypatch.setattr(changefeed, "SSE_ENABLED", mode != "off")
+    changefeed.configure_sse(threaded)
+    assert changefeed.SSE_ENABLED is enabled
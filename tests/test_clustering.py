@@ -0,0 +1,93 @@
+import pytest
+
+from app import cache, clustering, geo
+from app.models import Bejelentes
+
+
+@pytest.fixture(autouse=True)
+def _empty_tile_cache():
+    # a db fixture minden tesztnél újra kiosztja az azonosítókat, a verzió viszont marad
+    clustering._cache.clear()
+    yield
+    clustering._cache.clear()
+
+
+def _add(db, *coords):
+    for lat, lng in coords:
+        db.add(Bejelentes(cim="x", koord_szel=lat, koord_hossz=lng, geohash=geo.geohash_for(lat, lng)))
+    cache.invalidate(db)
+    db.commit()
+
+
+def _objects(res):
+    return sum(c["count"] for c in res["clusters"]) + len(res["points"])
+
+
+def test_tiles_cover_the_viewport():
+    tiles = clustering.tiles_for_bbox(-0.001, -0.001, 0.001, 0.001, 17)
+    assert len(tiles) == 4
+    with pytest.raises(ValueError):
+        clustering.tiles_for_bbox(40.0, 10.0, 50.0, 30.0, 17)
+
+
+@pytest.mark.parametrize("zoom", [10, 17])
+def test_point_on_tile_edge_counted_once(db, zoom):
+    # a (0, 0) pont négy csempe közös sarka
+    _add(db, (0.0, 0.0))
+    res = clustering.clusters_for_viewport(db, -0.001, -0.001, 0.001, 0.001, zoom)
+    assert _objects(res) == 1
+
+
+def test_new_report_visible_after_version_bump(db):
+    _add(db, (47.68, 17.65))
+    box = (47.67, 17.64, 47.69, 17.66, 12)
+    assert _objects(clustering.clusters_for_viewport(db, *box)) == 1
+
+    # egy másik worker / az importer commitja csak a közös verziót növeli
+    _add(db, (47.681, 17.651))
+    assert _objects(clustering.clusters_for_viewport(db, *box)) == 2
+
+
+def test_response_capped_in_total(db, monkeypatch):
+    _add(db, *[(0.0005, 0.0005 + i * 0.00001) for i in range(4)], (0.0005, -0.001), (0.0006, -0.001))
+    box = (0.0001, -0.002, 0.001, 0.002, 17)
+
+    res = clustering.clusters_for_viewport(db, *box)
+    assert len(res["points"]) == 6 and not res["clusters"]
+
+    clustering._cache.clear()
+    monkeypatch.setattr(clustering, "MAX_OBJECTS", 3)
+    res = clustering.clusters_for_viewport(db, *box)
+    # a legtöbb pontot adó csempe klaszterként megy, a másik pontokként
+    assert len(res["clusters"]) + len(res["points"]) <= 3
+    assert [c["count"] for c in res["clusters"]] == [4]
+    assert len(res["points"]) == 2
+
+
+def test_dense_viewport_stays_under_cap(db):
+    assert clustering.MAX_TILES * clustering.COARSE_GRID ** 2 <= clustering.MAX_OBJECTS
+
+    # 8x8 csempe pont-nagyításon, csempénként minden rácscellában egy pont
+    z = clustering.POINT_ZOOM
+    n = 1 << z
+    x0 = int((17.65 + 180.0) / 360.0 * n)
+    y0 = clustering._lat_to_tile_y(47.68, n)
+    grid = clustering.CLUSTER_GRID
+    coords = []
+    for x in range(x0, x0 + 8):
+        for y in range(y0, y0 + 8):
+            south, west, north, east = clustering.tile_bounds(z, x, y)
+            for i in range(grid):
+                for j in range(grid):
+                    coords.append((
+                        round(south + (north - south) * (i + 0.5) / grid, 6),
+                        round(west + (east - west) * (j + 0.5) / grid, 6),
+                    ))
+    _add(db, *coords)
+
+    south, west, _, _ = clustering.tile_bounds(z, x0, y0 + 7)
+    _, _, north, east = clustering.tile_bounds(z, x0 + 7, y0)
+    pad = 1e-7
+    res = clustering.clusters_for_viewport(db, south + pad, west + pad, north - pad, east - pad, z)
+    assert len(res["clusters"]) + len(res["points"]) <= clustering.MAX_OBJECTS
+    assert _objects(res) == len(coords)
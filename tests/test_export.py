@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from app import archive
+from app.models import Bejelentes, Modositas
+
+
+@pytest.fixture
+def client(db):
+    from app.main import app
+
+    c = app.test_client()
+    with c.session_transaction() as s:
+        s["admin_id"] = 1
+    return c
+
+
+def _reports(db):
+    first = Bejelentes(cim="Győr, Fő utca 3", koord_szel=47.68, koord_hossz=17.65,
+                       datum_ido=datetime(2025, 3, 4, 5, 6, 7, 891011), leiras="lom")
+    db.add(first)
+    db.commit()
+    dup = Bejelentes(cim="Győr, Fő u. 3.", kanonikusID=first.bejelentesID, datum_ido=datetime(2025, 3, 5))
+    db.add(dup)
+    db.commit()
+    return first, dup
+
+
+def _ndjson(resp):
+    assert resp.status_code == 200 and resp.mimetype == "application/x-ndjson"
+    return [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+
+
+def test_ndjson_export_follows_duplicate_filter(db, client):
+    first, dup = _reports(db)
+
+    [item] = _ndjson(client.get("/admin/export/bejelentesek"))
+    assert item["bejelentesID"] == first.bejelentesID
+    assert item["datum_ido"] == "2025-03-04 05:06:07"
+    assert item["koord_szel"] == 47.68 and item["leiras"] == "lom"
+
+    items = _ndjson(client.get("/admin/export/bejelentesek?duplikatumok=1"))
+    assert [i["bejelentesID"] for i in items] == [first.bejelentesID, dup.bejelentesID]
+
+
+def test_csv_export(db, client):
+    first, _ = _reports(db)
+    resp = client.get("/admin/export/bejelentesek?format=csv&duplikatumok=1")
+    assert resp.status_code == 200 and resp.mimetype == "text/csv"
+    assert "attachment" in resp.headers["Content-Disposition"]
+
+    rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+    assert rows[0][:3] == ["bejelentesID", "datum_ido", "cim"]
+    assert len(rows) == 3
+    assert rows[1][:5] == [str(first.bejelentesID), "2025-03-04 05:06:07", "Győr, Fő utca 3", "47.68", "17.65"]
+
+
+def test_audit_export_includes_archived_rows(db, client):
+    first, _ = _reports(db)
+    for day in (1, 2, 3):
+        db.add(Modositas(bejelentesID=first.bejelentesID, adminID=1, datum_ido=datetime(2024, 1, day),
+                         mezo="státusz", regi_ertek="beérkezett", uj_ertek="lezárt"))
+    db.commit()
+    assert archive.archive(db, datetime(2024, 1, 3)) == 2
+
+    items = _ndjson(client.get("/admin/export/modositasok"))
+    assert [i["datum_ido"][:10] for i in items] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+
+    resp = client.get("/admin/export/modositasok?format=csv&date_from=2024-01-02")
+    rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+    assert rows[0][0] == "modositasiID" and len(rows) == 3
@@ -0,0 +1,110 @@
+import math
+import random
+
+import pytest
+
+from app import geo
+from app.models import Bejelentes
+
+
+def test_encode_known_values():
+    # a geohash.org / Wikipedia példája
+    assert geo.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geo.encode(42.6, -5.6, 5) == "ezs42"
+
+
+def test_geohash_for_needs_both_coordinates():
+    assert geo.geohash_for(None, 17.6) is None
+    assert geo.geohash_for(47.6, None) is None
+    assert geo.geohash_for("47.6875", "17.6504") == geo.encode(47.6875, 17.6504)
+
+
+def test_cell_size():
+    h, w = geo.cell_size_deg(1)
+    assert (h, w) == (45.0, 45.0)
+    h, w = geo.cell_size_deg(2)
+    assert (h, w) == (45.0 / 8, 45.0 / 4)
+
+
+def _offset(lat, lng, dist_m, bearing):
+    dlat = math.degrees(dist_m * math.cos(bearing) / geo.EARTH_RADIUS_M)
+    dlng = math.degrees(dist_m * math.sin(bearing) / geo.EARTH_RADIUS_M) / math.cos(math.radians(lat))
+    return lat + dlat, lng + dlng
+
+
+@pytest.mark.parametrize("lat,lng,radius_m", [
+    (47.6875, 17.6504, 50), (47.6875, 17.6504, 5000), (0.0, 179.9999, 300), (-33.9, 18.4, 1200),
+])
+def test_radius_cells_cover_the_circle(lat, lng, radius_m):
+    cells = geo._radius_cells(lat, lng, radius_m)
+    precision = len(next(iter(cells)))
+    rnd = random.Random(1)
+    for _ in range(500):
+        p = _offset(lat, lng, radius_m * rnd.random(), rnd.random() * 2 * math.pi)
+        assert geo.encode(geo._clamp_lat(p[0]), geo._wrap_lng(p[1]), precision) in cells
+
+
+@pytest.mark.parametrize("box", [
+    (47.60, 17.55, 47.75, 17.75), (47.6870, 17.6500, 47.6880, 17.6510), (-10.0, -20.0, 10.0, 20.0),
+])
+def test_bbox_cells_cover_the_box(box):
+    south, west, north, east = box
+    cells = geo._bbox_cells(*box)
+    assert 0 < len(cells) <= geo.MAX_BBOX_CELLS
+    rnd = random.Random(2)
+    for _ in range(500):
+        lat = south + (north - south) * rnd.random()
+        lng = west + (east - west) * rnd.random()
+        h = geo.encode(lat, lng)
+        assert any(h.startswith(c) for c in cells)
+
+
+def test_filters_match_brute_force(db):
+    rnd = random.Random(3)
+    for _ in range(300):
+        lat, lng = 47.68 + rnd.uniform(-0.02, 0.02), 17.65 + rnd.uniform(-0.02, 0.02)
+        db.add(Bejelentes(cim="x", koord_szel=round(lat, 6), koord_hossz=round(lng, 6),
+                          geohash=geo.geohash_for(round(lat, 6), round(lng, 6))))
+    db.commit()
+    rows = db.query(Bejelentes).all()
+
+    near = {b.bejelentesID for b, _ in geo.within_radius(db.query(Bejelentes), 47.68, 17.65, 800)}
+    expected = {b.bejelentesID for b in rows if geo.is_within(b, 47.68, 17.65, 800)}
+    assert near == expected and expected
+
+    box = (47.675, 17.645, 47.69, 17.66)
+    found = {b.bejelentesID for b in db.query(Bejelentes).filter(geo.bbox_filter(*box))}
+    expected = {
+        b.bejelentesID for b in rows
+        if box[0] <= float(b.koord_szel) <= box[2] and box[1] <= float(b.koord_hossz) <= box[3]
+    }
+    assert found == expected and expected
+
+
+def test_nearest_found_with_widening_search(db, monkeypatch):
+    rnd = random.Random(5)
+    for _ in range(300):
+        lat, lng = round(47.68 + rnd.uniform(-0.1, 0.1), 6), round(17.65 + rnd.uniform(-0.1, 0.1), 6)
+        db.add(Bejelentes(cim="x", koord_szel=lat, koord_hossz=lng, geohash=geo.geohash_for(lat, lng)))
+    db.commit()
+    rows = db.query(Bejelentes).all()
+    expected = sorted(
+        (geo.haversine_m(47.68, 17.65, float(b.koord_szel), float(b.koord_hossz)), b.bejelentesID) for b in rows
+    )
+
+    fetched = []
+    query_cls = type(db.query(Bejelentes))
+    query_all = query_cls.all
+
+    def counting_all(q):
+        result = query_all(q)
+        fetched.append(len(result))
+        return result
+
+    monkeypatch.setattr(query_cls, "all", counting_all)
+
+    found = geo.within_radius(db.query(Bejelentes), 47.68, 17.65, 50_000, limit=10)
+    assert [b.bejelentesID for b, _ in found] == [i for _, i in expected[:10]]
+    assert [round(d, 3) for _, d in found] == [round(d, 3) for d, _ in expected[:10]]
+    # lépésenként legfeljebb limit + CANDIDATE_MARGIN sor jön az adatbázisból
+    assert fetched and max(fetched) <= 10 + geo.CANDIDATE_MARGIN
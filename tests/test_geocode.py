@@ -0,0 +1,95 @@
+import pytest
+
+from app import geocode, ingest
+from app.database import SessionLocal
+from app.duplicates import address_key
+from app.models import Bejelentes, GeokodCache
+
+GAZETTEER = """telepules;utca;hazszam;lat;lng
+Győr;Fő utca;;47.687200;17.635100
+Győr;Kossuth utca;1;47.680000;17.640000
+Győr;Kossuth utca;9;47.681000;17.641000
+Győr;;;47.687471;17.650397
+"""
+
+
+@pytest.fixture
+def gazetteer(db, tmp_path):
+    path = tmp_path / "cimjegyzek.csv"
+    path.write_text(GAZETTEER, encoding="utf-8")
+    geocode.load_gazetteer(db, str(path))
+    return db
+
+
+@pytest.mark.parametrize("cim, expected", [
+    ("9021 Győr, Fő u. 5.", [("gyor", "fo utca", 5)]),
+    ("Fő utca 5, Győr", [("gyor", "fo utca", 5)]),
+    ("Győr Fő utca 5", [("gyor", "fo utca", 5)]),
+    ("Budapest XI. kerület, Bartók Béla út 12/A", [
+        ("budapest xi", "bartok bela ut", 12),
+        ("budapest", "bartok bela ut", 12),
+        ("bartok", "bela ut", 12),
+    ]),
+    ("Győr", [("gyor", None, None)]),
+    ("", []),
+    (None, []),
+])
+def test_parse_address(cim, expected):
+    assert geocode.parse_address(cim) == expected
+
+
+def test_lookup_precisions(gazetteer):
+    db = gazetteer
+    assert geocode.lookup(db, "Győr, Kossuth u. 1.")[1] == "pontos"
+    (lat, lng), pontossag = geocode.lookup(db, "Győr, Kossuth utca 5")
+    assert pontossag == "becsult" and lat == pytest.approx(47.6805) and lng == pytest.approx(17.6405)
+    assert geocode.lookup(db, "Győr, Fő utca 187") == ((47.6872, 17.6351), "utca")
+    assert geocode.lookup(db, "Pécs, Fő utca 1") is None
+
+
+def test_street_level_geocodes_are_not_duplicates(gazetteer):
+    db = gazetteer
+    first = ingest.insert_batch(db, [ingest.new_payload("Győr, Fő utca 3", None, None, "lom", None)])
+    later = ingest.insert_batch(db, [
+        ingest.new_payload("Fő utca 187, Győr", None, None, "gumi", None),
+        ingest.new_payload("Győr, Fő utca 9", None, None, "sitt", None),
+        ingest.new_payload("Győr, Fő u. 3.", None, None, "lom", None),
+    ])
+    # ugyanaz az utcapont, de más házszám: külön munkatétel
+    assert all(b.geokod == "utca" for b in first + later)
+    assert [b.kanonikusID for b in later] == [None, None, first[0].bejelentesID]
+
+
+def test_house_level_geocode_matches_nearby_report(gazetteer):
+    db = gazetteer
+    [sent] = ingest.insert_batch(db, [ingest.new_payload(None, 47.680010, 17.640010, "lom", None)])
+    [coded] = ingest.insert_batch(db, [ingest.new_payload("Győr, Kossuth utca 1", None, None, "lom", None)])
+    assert coded.geokod == "pontos"
+    assert coded.kanonikusID == sent.bejelentesID
+
+
+def test_cache_write_race_keeps_the_report(gazetteer, monkeypatch):
+    db = gazetteer
+    cim = "Győr, Kossuth utca 9"
+    lookup = geocode.lookup
+
+    def concurrent_submission(session, c, streets=None):
+        # egy másik beküldés közben ugyanezt a címet már a cache-be írta
+        found = lookup(session, c, streets)
+        other = SessionLocal()
+        try:
+            (lat, lng), pontossag = found
+            other.add(GeokodCache(kulcs=address_key(c), koord_szel=lat, koord_hossz=lng, pontossag=pontossag))
+            other.commit()
+        finally:
+            other.close()
+        return found
+
+    monkeypatch.setattr(geocode, "lookup", concurrent_submission)
+    b = Bejelentes(cim=cim, statusz="beérkezett")
+    assert geocode.fill_missing(db, [b]) == 1
+    db.add(b)
+    db.commit()
+    assert b.geokod == "pontos"
+    assert db.query(Bejelentes).count() == 1
+    assert db.query(GeokodCache).filter(GeokodCache.kulcs == address_key(cim)).count() == 1
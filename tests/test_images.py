@@ -0,0 +1,109 @@
+import hashlib
+import io
+from pathlib import Path
+
+import pytest
+
+from app import images
+
+Image = pytest.importorskip("PIL.Image")
+ImageCms = pytest.importorskip("PIL.ImageCms")
+
+
+def _with_gps(fmt="JPEG", orientation=None, **params) -> bytes:
+    img = Image.new("RGB", (64, 48), (40, 160, 60))
+    exif = Image.Exif()
+    exif[0x010F] = "Telefon"   # Make
+    exif[0x8825] = {2: (47.0, 41.0, 0.0)}   # GPSInfo / GPSLatitude
+    if orientation:
+        exif[0x0112] = orientation
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, exif=exif, **params)
+    return buf.getvalue()
+
+
+def _jpeg_with_gps() -> bytes:
+    return _with_gps()
+
+
+def _scan_data(jpeg: bytes) -> bytes:
+    return jpeg[jpeg.index(b"\xff\xda"):]
+
+
+def _read(storage, key) -> bytes:
+    with storage.open(key) as f:
+        return f.read()
+
+
+def _assert_content_addressed(storage, key):
+    assert hashlib.sha256(_read(storage, key)).hexdigest() == Path(key).stem
+
+
+def test_upload_stripped_before_hashing(storage):
+    key, is_new = images.save_upload(storage, io.BytesIO(_jpeg_with_gps()), ".jpg")
+    assert is_new
+    _assert_content_addressed(storage, key)
+    with Image.open(io.BytesIO(_read(storage, key))) as img:
+        assert not img.getexif()
+
+    stored = _read(storage, key)
+    result = images.process_photo(storage.url(key))
+    assert "foto_thumb_url" in result and "foto_url" not in result
+    # az eredeti kulcs alatti bájtok nem változtak
+    assert _read(storage, key) == stored
+    _assert_content_addressed(storage, key)
+
+
+def test_same_photo_stored_once(storage):
+    data = _jpeg_with_gps()
+    first, _ = images.save_upload(storage, io.BytesIO(data), ".jpg")
+    second, is_new = images.save_upload(storage, io.BytesIO(data), ".jpg")
+    assert second == first and not is_new
+
+
+def test_non_image_stored_as_is(storage):
+    key, _ = images.save_upload(storage, io.BytesIO(b"nem kep"), ".jpg")
+    assert _read(storage, key) == b"nem kep"
+
+
+def test_legacy_original_not_overwritten(storage):
+    # a tárolás előtti tisztítás bevezetése előtt feltöltött, metaadatos fotó
+    data = _jpeg_with_gps()
+    old_key, _ = storage.save_stream(io.BytesIO(data), ".jpg")
+
+    result = images.process_photo(storage.url(old_key))
+    assert _read(storage, old_key) == data
+    _assert_content_addressed(storage, old_key)
+
+    new_key = storage.key_for_url(result["foto_url"])
+    assert new_key != old_key
+    _assert_content_addressed(storage, new_key)
+    assert Path(new_key).stem in result["foto_thumb_url"]
+
+
+def test_jpeg_stripped_without_reencoding(storage):
+    icc = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+    data = _with_gps(orientation=6, icc_profile=icc, quality=75)
+    key, _ = images.save_upload(storage, io.BytesIO(data), ".jpg")
+    stored = _read(storage, key)
+
+    # a képadat bájtra azonos, az ICC profil és a tájolás marad, a GPS nem
+    assert _scan_data(stored) == _scan_data(data)
+    with Image.open(io.BytesIO(stored)) as img:
+        assert img.info["icc_profile"] == icc
+        assert dict(img.getexif()) == {0x0112: 6}
+
+    # a származékok már elforgatva készülnek
+    result = images.process_photo(storage.url(key))
+    with storage.open(storage.key_for_url(result["foto_webp_url"])) as f, Image.open(f) as img:
+        assert img.size == (48, 64)
+        assert img.info["icc_profile"] == icc
+
+
+def test_png_metadata_chunks_dropped(storage):
+    data = _with_gps("PNG")
+    key, _ = images.save_upload(storage, io.BytesIO(data), ".png")
+    stored = _read(storage, key)
+    assert b"eXIf" not in stored and len(stored) < len(data)
+    with Image.open(io.BytesIO(stored)) as a, Image.open(io.BytesIO(data)) as b:
+        assert a.tobytes() == b.tobytes()
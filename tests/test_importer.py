@@ -0,0 +1,67 @@
+import hashlib
+import io
+from pathlib import Path
+
+import pytest
+
+from app import importer
+from app.models import Bejelentes
+
+SOURCE = """datum_ido;cim;koord_szel;koord_hossz;leiras;statusz
+2023-05-10 09:00;Győr, Fő utca 3;;;lom;beérkezett
+2023-05-02 08:00;Győr, Fő u. 3.;;;lom a járdán;beérkezett
+2023-05-04 10:00;;47.680000;17.640000;gumi;beérkezett
+2023-05-05 10:00;;47.680100;17.640100;gumiabroncsok;beérkezett
+2023-07-01 10:00;Győr, Fő utca 3;;;megint lom;beérkezett
+2023-05-03 10:00;Győr, Fő utca 3;;;régi, lezárt;lezárt
+"""
+
+
+def _import(db, tmp_path, text, **kwargs):
+    src = tmp_path / "regi.csv"
+    src.write_text(text, encoding="utf-8")
+    job = importer.Importer(
+        db, importer.Source(str(src)), str(tmp_path / "regi.checkpoint.json"),
+        str(tmp_path / "regi.rejected.jsonl"), workers=1, **kwargs,
+    )
+    return job.run()
+
+
+def test_historical_duplicates_linked(db, tmp_path):
+    state = _import(db, tmp_path, SOURCE, batch_size=4)
+    assert state["beirt"] == 6
+
+    rows = {(b.leiras): b for b in db.query(Bejelentes)}
+    # a kötegen belül és a kötegek között is a korábbi, nyitott az eredeti
+    # (a lezárt 05-03-i nem lehet az)
+    assert rows["lom a járdán"].kanonikusID is None
+    assert rows["lom"].kanonikusID == rows["lom a járdán"].bejelentesID
+    assert rows["gumi"].kanonikusID is None
+    assert rows["gumiabroncsok"].kanonikusID == rows["gumi"].bejelentesID
+    # NAPOK időablakon kívül
+    assert rows["megint lom"].kanonikusID is None
+    assert rows["régi, lezárt"].kanonikusID == rows["lom a járdán"].bejelentesID
+
+
+def test_rerun_skips_imported_records(db, tmp_path):
+    _import(db, tmp_path, SOURCE)
+    (tmp_path / "regi.checkpoint.json").unlink()
+    state = _import(db, tmp_path, SOURCE)
+    assert state["beirt"] == 0 and state["mar_megvolt"] == 6
+    assert db.query(Bejelentes).count() == 6
+
+
+def test_photo_stored_under_its_clean_hash(storage, tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    exif = Image.Exif()
+    exif[0x010F] = "Telefon"
+    buf = io.BytesIO()
+    Image.new("RGB", (40, 30), (90, 90, 90)).save(buf, format="JPEG", exif=exif)
+    (tmp_path / "regi.jpg").write_bytes(buf.getvalue())
+
+    fields, error = importer.store_photo("regi.jpg", str(tmp_path), derivatives=True)
+    assert error is None
+    key = storage.key_for_url(fields["foto_url"])
+    with storage.open(key) as f:
+        assert hashlib.sha256(f.read()).hexdigest() == Path(key).stem
+    assert fields["foto_thumb_url"]
@@ -0,0 +1,144 @@
+import json
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import geo, geocode, ingest
+from app.database import SessionLocal
+from app.models import Bejelentes
+
+
+@pytest.fixture
+def spool(db):
+    conn = ingest._spool()
+    conn.execute("DELETE FROM spool")
+    conn.execute("DELETE FROM spool_dead")
+    ingest._stats["beirt"] = 0
+    ingest._stats["hibas_kotegek"] = 0
+    yield conn
+
+
+def _payload(cim="Győr, Fő utca 3"):
+    return ingest.new_payload(cim, None, None, "lom", None)
+
+
+def test_token_is_unique(db):
+    db.add(Bejelentes(cim="a", ingest_token="t1"))
+    db.add(Bejelentes(cim="b", ingest_token="t1"))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+    # NULL token (nem spoolból jött sor) akárhány lehet
+    db.add_all([Bejelentes(cim="a"), Bejelentes(cim="b")])
+    db.commit()
+
+
+def test_replayed_batch_not_written_twice(db):
+    p = _payload()
+    assert len(ingest.insert_batch(db, [p])) == 1
+    assert ingest.insert_batch(db, [p]) == []
+    assert db.query(Bejelentes).count() == 1
+
+
+def test_concurrent_writer_counts_as_written(db, monkeypatch):
+    first, second = _payload("Fő utca 3"), _payload("Fő utca 5")
+    fill_missing = geocode.fill_missing
+
+    def other_writer_commits_first(session, items):
+        # a tokenek ellenőrzése után egy másik writer beírja az első tételt
+        monkeypatch.setattr(geocode, "fill_missing", fill_missing)
+        other = SessionLocal()
+        try:
+            other.add(Bejelentes(cim=first["cim"], ingest_token=first["token"]))
+            other.commit()
+        finally:
+            other.close()
+        return fill_missing(session, items)
+
+    monkeypatch.setattr(geocode, "fill_missing", other_writer_commits_first)
+    written = ingest.insert_batch(db, [first, second])
+    assert [b.ingest_token for b in written] == [second["token"]]
+    assert db.query(Bejelentes).count() == 2
+
+
+def test_drain_counts_only_new_rows(db, spool):
+    p = _payload()
+    ingest.insert_batch(db, [p])
+    ingest.enqueue(p)
+    ingest.enqueue(_payload("Fő utca 5"))
+
+    assert ingest.drain_all() == 2
+    assert ingest.queue_stats()["beirt"] == 1
+    assert ingest.queue_stats()["sor_hossz"] == 0
+
+
+@pytest.mark.parametrize("szel, hossz", [("nan", "17.65"), ("47.68", "999"), ("inf", "17.65")])
+def test_invalid_coordinates_rejected(szel, hossz):
+    with pytest.raises(ValueError):
+        ingest.new_payload(None, szel, hossz, "lom", None)
+
+
+def test_queue_mode_rejects_invalid_coordinates(db, spool, monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr(ingest, "MODE", "queue")
+    monkeypatch.setattr(ingest, "ensure_writer", lambda: None)
+    client = app.test_client()
+    for szel, hossz in [("nan", "17.65"), ("47.68", "999"), ("-91", "17.65")]:
+        resp = client.post("/bejelentes", data={"koord_szel": szel, "koord_hossz": hossz}, follow_redirects=True)
+        assert "közötti szám legyen" in resp.get_data(as_text=True)
+    assert ingest.queue_stats()["sor_hossz"] == 0
+
+    client.post("/bejelentes", data={"koord_szel": "47.68", "koord_hossz": "17.65"})
+    assert ingest.queue_stats()["sor_hossz"] == 1
+
+
+def test_bad_spool_item_dead_lettered_at_once(db, spool):
+    # validáció nélkül (régebbi kód) spoolba került tétel
+    bad = dict(_payload(), cim=None, koord_szel=float("nan"), koord_hossz=17.65)
+    with pytest.raises(ValueError):
+        ingest.enqueue(bad)
+    ingest.enqueue(_payload("Fő utca 3"))
+    spool.execute("INSERT INTO spool (payload, enqueued_at) VALUES (?, 0)", (json.dumps(bad),))
+    ingest.enqueue(_payload("Fő utca 5"))
+
+    assert ingest.drain_once() == 3
+    assert ingest.queue_stats()["beirt"] == 2
+    assert ingest._stats["hibas_kotegek"] == 0
+    assert spool.execute("SELECT COUNT(*) FROM spool").fetchone()[0] == 0
+    assert spool.execute("SELECT COUNT(*) FROM spool_dead").fetchone()[0] == 1
+
+
+def test_permanent_write_error_not_retried(db, spool, monkeypatch):
+    good, bad = _payload("Fő utca 3"), _payload("Fő utca 5")
+    ingest.enqueue(good)
+    ingest.enqueue(bad)
+    write = ingest._write
+
+    def check_violation(claimed):
+        if any(p["token"] == bad["token"] for _, p in claimed):
+            raise IntegrityError("INSERT", {}, Exception("CHECK constraint failed"))
+        return write(claimed)
+
+    monkeypatch.setattr(ingest, "_write", check_violation)
+    assert ingest.drain_once() == 2
+    assert ingest.queue_stats()["beirt"] == 1
+    assert spool.execute("SELECT COUNT(*) FROM spool").fetchone()[0] == 0
+    assert spool.execute("SELECT COUNT(*) FROM spool_dead").fetchone()[0] == 1
+
+
+def test_nearest_candidate_wins_beyond_limit(db, monkeypatch):
+    from app import duplicates
+
+    # 25 m-re lévő bejelentések (kisebb geohash, az index szerint elöl) és egy 2 m-re lévő
+    far = [Bejelentes(cim=f"a{i}", koord_szel=47.68 - 0.000225, koord_hossz=17.65 - i * 0.000001) for i in range(5)]
+    near = Bejelentes(cim="b", koord_szel=47.68 + 0.000018, koord_hossz=17.65)
+    for b in [*far, near]:
+        b.geohash = geo.geohash_for(b.koord_szel, b.koord_hossz)
+    db.add_all(far)
+    db.commit()
+    db.add(near)
+    db.commit()
+
+    monkeypatch.setattr(duplicates, "CANDIDATE_LIMIT", 3)
+    assert duplicates.find_canonical(db, None, 47.68, 17.65) == near.bejelentesID
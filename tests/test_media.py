@@ -0,0 +1,44 @@
+import hashlib
+import io
+from pathlib import Path
+
+import pytest
+
+from app import images
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def client(storage):
+    from app.main import app
+
+    return app.test_client()
+
+
+def _photo() -> bytes:
+    exif = Image.Exif()
+    exif[0x010F] = "Telefon"
+    buf = io.BytesIO()
+    Image.new("RGB", (32, 32), (200, 40, 40)).save(buf, format="JPEG", exif=exif)
+    return buf.getvalue()
+
+
+def test_immutable_photo_matches_its_etag(client, storage):
+    key, _ = images.save_upload(storage, io.BytesIO(_photo()), ".jpg")
+    fields = images.process_photo(storage.url(key))
+
+    for url in [storage.url(key), fields["foto_thumb_url"], fields["foto_webp_url"]]:
+        r = client.get(url)
+        assert r.status_code == 200
+        assert "immutable" in r.headers["Cache-Control"]
+        assert r.headers["ETag"].strip('"') == Path(storage.key_for_url(url)).stem
+
+    r = client.get(storage.url(key))
+    assert hashlib.sha256(r.data).hexdigest() == r.headers["ETag"].strip('"')
+    assert client.get(storage.url(key), headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
+
+
+def test_hidden_and_missing_files(client, storage):
+    assert client.get("/uploads/ab/cd/.upload-tmp").status_code == 404
+    assert client.get("/uploads/ab/cd/" + "0" * 64 + ".jpg").status_code == 404
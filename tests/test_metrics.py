@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from app import metrics
+
+pytestmark = pytest.mark.skipif(not metrics.ENABLED, reason="METRICS=off")
+
+
+@pytest.fixture
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    # ez a folyamat is az új könyvtárba írjon
+    monkeypatch.setattr(metrics, "_file", None)
+    return tmp_path
+
+
+def _worker(metrics_dir, pid):
+    """Egy (másik) worker fájlja."""
+    return metrics.ProcessFile(os.path.join(metrics_dir, f"metrics-{pid}.db"))
+
+
+def _lines(body: str) -> dict:
+    return dict(line.rsplit(" ", 1) for line in body.splitlines() if not line.startswith("#"))
+
+
+def test_workers_summed_at_endpoint(metrics_dir):
+    from app.main import app
+
+    labels = {"endpoint": "public.list_bejelentesek", "method": "GET", "status": "200"}
+    for pid, n, elapsed in ((111, 3, 0.003), (222, 4, 0.2)):
+        f = _worker(metrics_dir, pid)
+        le = metrics._fmt(next(b for b in metrics.BUCKETS if elapsed <= b))
+        f.inc(metrics._key("zold_http_requests_total", labels), n)
+        f.inc(metrics._key("zold_http_request_duration_seconds_bucket", {**labels, "le": le}), n)
+        f.inc(metrics._key("zold_http_request_duration_seconds_sum", labels), n * elapsed)
+    _worker(metrics_dir, 333).inc(metrics._key("zold_uploads_total", {"tarolas": "uj"}), 2)
+
+    resp = app.test_client().get("/metrics")
+    assert resp.status_code == 200 and resp.mimetype == "text/plain"
+    lines = _lines(resp.get_data(as_text=True))
+
+    def line(name, **extra):
+        return lines[name + metrics._labels({**labels, **extra})]
+
+    assert line("zold_http_requests_total") == "7"
+    assert lines['zold_uploads_total{tarolas="uj"}'] == "2"
+    # a bucketek kumulálva, a két worker összegéből
+    assert line("zold_http_request_duration_seconds_bucket", le="0.005") == "3"
+    assert line("zold_http_request_duration_seconds_bucket", le="0.1") == "3"
+    assert line("zold_http_request_duration_seconds_bucket", le="0.25") == "7"
+    assert line("zold_http_request_duration_seconds_bucket", le="+Inf") == "7"
+    assert line("zold_http_request_duration_seconds_count") == "7"
+    assert float(line("zold_http_request_duration_seconds_sum")) == pytest.approx(0.809)
+
+
+def test_requests_counted_in_own_file(metrics_dir):
+    from app.main import app
+
+    client = app.test_client()
+    client.get("/bejelentesek/kozel")   # 400: hiányzó paraméter
+    lines = _lines(client.get("/metrics").get_data(as_text=True))
+    assert lines[
+        'zold_http_requests_total{endpoint="public.list_bejelentesek_kozel",method="GET",status="400"}'
+    ] == "1"
+    assert os.path.exists(metrics_dir / f"metrics-{os.getpid()}.db")
+
+
+def test_pool_gauges_exported(metrics_dir, db):
+    from app import querylog
+    from app.main import app
+
+    own = querylog.pool_metrics()
+    assert own and own["zold_db_pool_size"] > 0
+    # egy futó és egy már leállt worker értékei
+    gauge = metrics._key("zold_db_pool_checked_out", {})
+    checkouts = metrics._key("zold_db_pool_checkouts_total", {})
+    live = _worker(metrics_dir, os.getppid())
+    live.set(gauge, 2)
+    live.set(checkouts, 5)
+    dead = _worker(metrics_dir, 2 ** 22 + 1)
+    dead.set(gauge, 7)
+    dead.set(checkouts, 3)
+
+    body = app.test_client().get("/metrics").get_data(as_text=True)
+    assert "# TYPE zold_db_pool_checked_out gauge" in body
+    lines = _lines(body)
+    for name in ("zold_db_pool_overflow", "zold_db_pool_wait_seconds_total", "zold_db_pool_timeouts_total"):
+        assert name in lines
+    # a leállt worker gauge értéke kimarad, a számlálója megmarad
+    assert 2 <= float(lines["zold_db_pool_checked_out"]) < 7
+    assert float(lines["zold_db_pool_checkouts_total"]) >= 5 + 3
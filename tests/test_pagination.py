@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import cache
+from app.models import Bejelentes, Modositas
+from app.pagination import decode_cursor, encode_cursor, keyset_page, parse_page_size
+
+# néhány időpont, mindegyiken több sor: a lapok határa egy időponton belülre is esik
+TIMES = [datetime(2025, 3, 4, 5, 6, 7) + timedelta(minutes=m) for m in (0, 0, 0, 1, 1, 2, 2, 2, 2, 3, 5, 5, 5)]
+
+
+def test_cursor_roundtrip():
+    ts = datetime(2025, 3, 4, 5, 6, 7)
+    assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+
+
+def test_cursor_from_driver_text():
+    # app/serialize.py: a driver nyers (szöveges) dátuma
+    assert decode_cursor(encode_cursor("2025-03-04 05:06:07", 7)) == (datetime(2025, 3, 4, 5, 6, 7), 7)
+
+
+def test_cursor_is_url_safe_without_padding():
+    token = encode_cursor(datetime(2025, 1, 1), 1)
+    assert "=" not in token and "+" not in token and "/" not in token
+
+
+@pytest.mark.parametrize("token", ["", "nem-base64!!", "W10", encode_cursor("nem dátum", 1)])
+def test_invalid_cursor(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+@pytest.mark.parametrize("raw,expected", [(None, 50), ("", 50), ("x", 50), ("0", 1), ("20", 20), ("99999", 1000)])
+def test_page_size(raw, expected):
+    assert parse_page_size(raw, 50) == expected
+
+
+def _reports(db):
+    items = [Bejelentes(cim=f"Fő utca {i}", datum_ido=ts) for i, ts in enumerate(TIMES)]
+    db.add_all(items)
+    cache.invalidate(db)
+    db.commit()
+    return items
+
+
+def _expected_order(rows, id_key):
+    return [getattr(r, id_key) for r in sorted(rows, key=lambda r: (r.datum_ido, getattr(r, id_key)), reverse=True)]
+
+
+def _walk(client, url, id_key, limit):
+    seen = []
+    cursor = None
+    while True:
+        resp = client.get(url, query_string={"limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert resp.status_code == 200
+        body = resp.get_json()
+        # a token nélküli oldal az utolsó: üres "maradék" oldal nincs
+        assert 0 < len(body["items"]) <= limit
+        seen.extend(item[id_key] for item in body["items"])
+        cursor = body["next"]
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("limit", [1, 3, 4, len(TIMES), len(TIMES) + 1])
+def test_keyset_page_walks_shared_timestamps(db, limit):
+    items = _reports(db)
+    seen = []
+    cursor = None
+    while True:
+        rows, cursor = keyset_page(db.query(Bejelentes), Bejelentes.datum_ido, Bejelentes.bejelentesID, cursor, limit)
+        assert rows
+        seen.extend(b.bejelentesID for b in rows)
+        if cursor is None:
+            break
+        assert len(rows) == limit
+    assert seen == _expected_order(items, "bejelentesID")
+
+
+@pytest.mark.parametrize("limit", [2, 5])
+def test_public_list_pages(db, limit):
+    from app.main import app
+
+    items = _reports(db)
+    seen = _walk(app.test_client(), "/bejelentesek", "bejelentesID", limit)
+    assert seen == _expected_order(items, "bejelentesID")
+
+
+def test_admin_log_pages(db):
+    from app.main import app
+
+    b = _reports(db)[0]
+    logs = [Modositas(bejelentesID=b.bejelentesID, adminID=1, datum_ido=ts, mezo="státusz", uj_ertek="lezárt")
+            for ts in TIMES]
+    db.add_all(logs)
+    db.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["admin_id"] = 1
+    seen = _walk(client, "/admin/modositasok", "modositasID", 4)
+    assert seen == _expected_order(logs, "modositasiID")
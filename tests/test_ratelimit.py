@@ -0,0 +1,66 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import ratelimit
+from app.models import Adminisztrator
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    monkeypatch.setitem(ratelimit.LIMITS, "ip", 5)
+    monkeypatch.setitem(ratelimit.LIMITS, "nev", 2)
+    t = ratelimit.BucketTable(str(tmp_path / "login-limit"), 64)
+    monkeypatch.setattr(ratelimit, "_table", t)
+    return t
+
+
+def test_bucket_exhausted_then_refilled(table):
+    keys = ["ip:1.2.3.4", "nev:admin"]
+    assert table.hit(keys, now=0.0) == (0.0, [])
+    assert table.hit(keys, now=0.0) == (0.0, [])
+
+    wait, empty = table.hit(keys, now=0.0)
+    assert empty == ["nev:admin"]
+    assert wait == pytest.approx(ratelimit.WINDOW_S / 2)
+    # az elutasított kísérlet az IP vödréből sem fogyasztott
+    [ip] = [e for e in table.entries(now=0.0) if e["kulcs"] == "ip:1.2.3.4"]
+    assert ip["tokenek"] == 3
+
+    # fél ablak alatt egy token töltődik vissza
+    assert table.hit(keys, now=ratelimit.WINDOW_S / 2 - 1)[1] == ["nev:admin"]
+    assert table.hit(keys, now=ratelimit.WINDOW_S / 2) == (0.0, [])
+    assert table.hit(keys, now=ratelimit.WINDOW_S / 2)[1] == ["nev:admin"]
+
+
+def test_successful_login_refills_name_bucket(table):
+    table.hit(["nev:admin"], now=0.0)
+    table.hit(["nev:admin"], now=0.0)
+    table.reset("nev:admin")
+    assert table.hit(["nev:admin"]) == (0.0, [])
+
+
+@pytest.mark.skipif(not ratelimit.ENABLED, reason="LOGIN_RATE_LIMIT=off")
+def test_throttled_login_skips_password_hash(db, table, monkeypatch):
+    from app.main import app
+    from app.routes import admin
+
+    db.add(Adminisztrator(nev="admin", jelszo_hash=generate_password_hash("titok"), fiok_allapot="nyitott"))
+    db.commit()
+
+    hashed = []
+    check = admin.check_password_hash
+
+    def counting_check(*args):
+        hashed.append(args)
+        return check(*args)
+
+    monkeypatch.setattr(admin, "check_password_hash", counting_check)
+    client = app.test_client()
+    for _ in range(2):
+        assert client.post("/admin/login", data={"nev": "admin", "jelszo": "rossz"}).status_code == 302
+
+    # a helyes jelszóval sem jut el a hash-elésig
+    resp = client.post("/admin/login", data={"nev": "Admin ", "jelszo": "titok"})
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) > 0
+    assert len(hashed) == 2
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app import cache, replica
+from app.models import Bejelentes
+from app.schema import ensure_schema
+
+
+@pytest.fixture
+def replica_db(db, tmp_path, monkeypatch):
+    """Egy külön SQLite replika, saját (az elsődlegestől eltérő) tartalommal."""
+    r = replica.Replica(f"sqlite:///{tmp_path}/replika.db")
+    ensure_schema(r.engine)
+    with Session(r.engine) as s:
+        s.add(Bejelentes(cim="a replikáról"))
+        s.commit()
+    monkeypatch.setattr(replica, "replicas", [r])
+    cache._entries.clear()
+    yield r
+    r.engine.dispose()
+
+
+def _cimek(client):
+    return [item["cim"] for item in client.get("/bejelentesek").get_json()["items"]]
+
+
+def test_reads_go_to_healthy_replica(db, replica_db):
+    from app.main import app
+
+    db.add(Bejelentes(cim="az elsődlegesről"))
+    db.commit()
+    assert _cimek(app.test_client()) == ["a replikáról"]
+
+
+def test_unusable_replica_falls_back_to_primary(db, tmp_path, monkeypatch):
+    from app.main import app
+
+    # séma nélküli (pl. félkész) replika
+    broken = replica.Replica(f"sqlite:///{tmp_path}/ures.db")
+    monkeypatch.setattr(replica, "replicas", [broken])
+    cache._entries.clear()
+    db.add(Bejelentes(cim="az elsődlegesről"))
+    db.commit()
+
+    assert _cimek(app.test_client()) == ["az elsődlegesről"]
+    assert not broken.healthy and broken.error
+    broken.engine.dispose()
+
+
+def test_reads_stick_to_primary_after_write(db, replica_db):
+    from app.main import app
+
+    client = app.test_client()
+    assert _cimek(client) == ["a replikáról"]
+
+    resp = client.post("/bejelentes", data={"cim": "Győr, Fő utca 3"})
+    assert resp.status_code == 302
+    # a saját írását az elsődlegesről látja (a replika még nem kapta meg)
+    assert _cimek(client) == ["Győr, Fő utca 3"]
+
+
+def test_sticky_window_expires(db, replica_db, monkeypatch):
+    from app.main import app
+
+    client = app.test_client()
+    client.post("/bejelentes", data={"cim": "Győr, Fő utca 3"})
+    monkeypatch.setattr(replica, "STICKY_S", 0.0)
+    assert _cimek(client) == ["a replikáról"]
@@ -0,0 +1,45 @@
+from sqlalchemy import inspect
+
+from app.filters import dashboard_filters
+from app.schema import ensure_schema, explain_dashboard_filters
+
+
+def test_dashboard_default_hides_duplicates():
+    filters, _, _ = dashboard_filters("", "", "", "", duplikatumok="")
+    assert any("kanonikusID" in str(f) for f in filters)
+    filters, _, _ = dashboard_filters("", "", "", "", duplikatumok="1")
+    assert not any("kanonikusID" in str(f) for f in filters)
+
+
+def test_explain_checks_the_dashboard_query(db):
+    results = explain_dashboard_filters(db.get_bind())
+    default_view = [r for r in results if r["szurok"]["duplikatumok"] == ""]
+    assert default_view
+    assert all('"kanonikusID" IS NULL' in r["sql"] for r in default_view)
+    assert all(r["uses_index"] for r in results), [r["szurok"] for r in results if not r["uses_index"]]
+
+
+def test_explain_skips_unsupported_dialect():
+    class _Dialect:
+        name = "oracle"
+
+    class _Engine:
+        dialect = _Dialect()
+
+    assert explain_dashboard_filters(_Engine()) == []
+
+
+def _ingest_token_index(eng):
+    return next(ix for ix in inspect(eng).get_indexes("Bejelentes") if ix["name"] == "IX_Bejelentes_ingest_token")
+
+
+def test_ensure_schema_makes_old_index_unique(db):
+    eng = db.get_bind()
+    with eng.begin() as conn:
+        conn.exec_driver_sql('DROP INDEX "IX_Bejelentes_ingest_token"')
+        conn.exec_driver_sql('CREATE INDEX "IX_Bejelentes_ingest_token" ON "Bejelentes" (ingest_token)')
+    assert not _ingest_token_index(eng)["unique"]
+
+    assert "IX_Bejelentes_ingest_token" in ensure_schema(eng)
+    assert _ingest_token_index(eng)["unique"]
+    assert ensure_schema(eng) == []
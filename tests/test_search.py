@@ -0,0 +1,49 @@
+import pytest
+
+from app import search
+from app.models import Bejelentes
+
+
+@pytest.mark.parametrize("text, expected", [
+    (None, []),
+    ("", []),
+    ("Győr, Fő u. 3.", ["gyor", "fo", "utca", "3"]),
+    ("Árpád krt 12/B", ["arpad", "korut", "12"]),
+    ("ŐSZI LOMB és a szemét", ["oszi", "lomb", "es", "szemet"]),
+    ("hrsz. 0123/4", ["helyrajziszam", "0123", "4"]),
+])
+def test_tokenize(text, expected):
+    assert search.tokenize(text) == expected
+
+
+def test_long_tokens_truncated():
+    assert search.tokenize("a" * 100) == ["a" * search.MAX_TOKEN_LEN]
+
+
+def test_normalize_matches_abbreviated_and_full_form():
+    assert search.normalize("Fő u. 3") == search.normalize("fo utca 3") == "fo utca 3"
+    assert search.normalize("!!! ?") == ""
+
+
+def test_document_text():
+    assert search.document_text("Fő utca 3", "Illegális hulladék") == "fo utca 3 illegalis hulladek"
+    assert search.document_text(None, "  ") is None
+
+
+def test_search_ranks_by_matched_words(db):
+    for cim, leiras in [
+        ("Fő utca 3", "lom a járdán"),
+        ("Fő utca 187", "építési törmelék"),
+        ("Kossuth utca 1", "törmelék"),
+    ]:
+        b = Bejelentes(cim=cim, leiras=leiras)
+        db.add(b)
+        db.flush()
+        search.index_bejelentes(db, b, replace=False)
+    db.commit()
+
+    hits = search.search(db, "fő u. törmel")
+    assert [b.cim for b, _ in hits][:1] == ["Fő utca 187"]
+    assert hits[0][1] == 1.0
+    assert {b.cim for b, _ in hits} == {"Fő utca 3", "Fő utca 187", "Kossuth utca 1"}
+    assert search.search(db, "!!!") == []
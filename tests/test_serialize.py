@@ -0,0 +1,100 @@
+import gzip
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app import cache, serialize
+from app.models import Bejelentes
+from app.routes.public import bejelentes_to_dict
+
+
+def _reports(db, n):
+    items = [
+        Bejelentes(
+            cim=f"Győr, Fő utca {i}",
+            koord_szel=47.123456 + i * 0.000001,
+            koord_hossz=17.654321,
+            datum_ido=datetime(2025, 3, 4, 5, 6, 7, 891011),
+        )
+        for i in range(n)
+    ]
+    db.add_all(items)
+    cache.invalidate(db)
+    db.commit()
+    return items
+
+
+def _get(client, accept_encoding=None):
+    headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+    return client.get("/bejelentesek?limit=200", headers=headers)
+
+
+def test_projection_matches_orm_dicts(db):
+    _reports(db, 3)
+    rows = db.connection().execute(
+        select(*serialize.BEJELENTES.columns).order_by(Bejelentes.bejelentesID)
+    ).all()
+
+    items = serialize.BEJELENTES.dicts(rows)
+    assert items == [bejelentes_to_dict(b) for b in db.query(Bejelentes).order_by(Bejelentes.bejelentesID)]
+    # Numeric -> float már a drivertől (nincs Decimal), a dátum másodpercre levágva
+    assert type(items[0]["koord_szel"]) is float and items[0]["koord_szel"] == 47.123456
+    assert items[0]["datum_ido"] == "2025-03-04 05:06:07"
+
+
+def test_driver_values_coerced():
+    # PostgreSQL-szerű driver: datetime objektum; a skála szerinti kerekítés
+    row = (1, datetime(2025, 3, 4, 5, 6, 7, 891011), None, 47.1234564, None, "beérkezett",
+           None, None, None, None, None)
+    [item] = serialize.BEJELENTES.dicts([row])
+    assert item["datum_ido"] == "2025-03-04 05:06:07"
+    assert item["koord_szel"] == 47.123456 and item["koord_hossz"] is None
+    assert serialize.dumps({"x": 1.5}) == b'{"x":1.5}'
+    with pytest.raises(TypeError):
+        serialize.dumps({"x": Decimal("1.5")})
+
+
+def test_gzip_negotiated(db):
+    from app.main import app
+
+    _reports(db, 50)
+    client = app.test_client()
+
+    plain = _get(client)
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+    assert len(plain.get_data()) >= serialize.COMPRESS_MIN_BYTES
+
+    packed = _get(client, "gzip")
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(packed.get_data()) == plain.get_data()
+
+
+def test_small_response_not_compressed(db):
+    from app.main import app
+
+    _reports(db, 1)
+    resp = _get(app.test_client(), "gzip")
+    assert "Content-Encoding" not in resp.headers
+
+
+@pytest.mark.skipif(serialize.brotli is not None, reason="a brotli csomag telepítve van")
+def test_brotli_falls_back_to_gzip(db):
+    from app.main import app
+
+    _reports(db, 50)
+    client = app.test_client()
+    assert _get(client, "br, gzip").headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in _get(client, "br").headers
+
+
+@pytest.mark.skipif(serialize.brotli is None, reason="nincs brotli csomag")
+def test_brotli_preferred(db):
+    from app.main import app
+
+    _reports(db, 50)
+    resp = _get(app.test_client(), "gzip, br")
+    assert resp.headers["Content-Encoding"] == "br"
+    assert serialize.brotli.decompress(resp.get_data()).startswith(b'{"items":')
@@ -0,0 +1,37 @@
+import io
+
+import pytest
+
+from app.storage import Storage, content_key, derived_key
+
+
+def test_keys():
+    key = content_key("abcdef" + "0" * 58, ".JPG")
+    assert key == "ab/cd/abcdef" + "0" * 58 + ".jpg"
+    assert derived_key(key, "thumb.webp") == "ab/cd/abcdef" + "0" * 58 + "_thumb.webp"
+
+
+def test_incomplete_backend_rejected():
+    class NoUrl(Storage):
+        def exists(self, key):
+            return False
+
+        def put_file(self, local_path, key):
+            pass
+
+        def open(self, key):
+            return io.BytesIO()
+
+        def key_for_url(self, url):
+            return None
+
+    with pytest.raises(TypeError):
+        NoUrl()
+
+
+def test_save_stream_dedup(storage):
+    key, is_new = storage.save_stream(io.BytesIO(b"abc" * 100_000), ".bin")
+    assert is_new and storage.exists(key)
+    again, is_new = storage.save_stream(io.BytesIO(b"abc" * 100_000), ".bin")
+    assert again == key and not is_new
+    assert storage.key_for_url(storage.url(key)) == key
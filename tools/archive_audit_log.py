@@ -0,0 +1,72 @@
+# tools/archive_audit_log.py
+"""
+Move old Modositas (audit log) rows into the ModositasArchiv table, so the
+hot table stays small. Rows keep their ids; a report's full history is still
+available at /admin/bejelentes/<id>/modositasok and in the audit log export.
+Runs in batches, each in its own transaction, so it can be interrupted and
+re-run at any time (e.g. nightly from cron). Creates the table if missing.
+Also drops change-feed (Valtozas) rows older than VALTOZAS_MEGORZES_NAP (7).
+
+Usage:
+  python tools/archive_audit_log.py                 # older than MODOSITAS_ARCHIVE_DAYS (180)
+  python tools/archive_audit_log.py --days 90
+  python tools/archive_audit_log.py --dry-run
+  python tools/archive_audit_log.py --status
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path so "import app.*" works reliably
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from sqlalchemy import func, select
+
+from app import archive, changefeed
+from app.database import SessionLocal, engine
+from app.models import Modositas
+from app.schema import ensure_schema
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Régi módosítások archiválása.")
+    parser.add_argument("--days", type=int, default=archive.ARCHIVE_AFTER_DAYS,
+                        help="ennél régebbi sorok kerülnek át")
+    parser.add_argument("--batch-size", type=int, default=archive.BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="csak megszámolja az érintett sorokat")
+    parser.add_argument("--status", action="store_true", help="a két tábla mérete, időtartománya")
+    args = parser.parse_args()
+
+    ensure_schema(engine)
+    db = SessionLocal()
+    try:
+        if args.status:
+            print(json.dumps(archive.status(db), ensure_ascii=False, indent=2))
+            return 0
+
+        before = archive.cutoff(args.days)
+        if args.dry_run:
+            n = db.scalar(select(func.count()).select_from(Modositas).where(Modositas.datum_ido < before))
+            print(f"{n} sor archiválható ({before:%Y-%m-%d %H:%M} előtti).")
+            return 0
+
+        started = time.monotonic()
+        moved = archive.archive(
+            db, before, batch_size=args.batch_size,
+            log=lambda n: print(f"  {n} sor áthelyezve...", file=sys.stderr),
+        )
+        print(f"✅ {moved} sor archiválva ({before:%Y-%m-%d %H:%M} előtti), "
+              f"{time.monotonic() - started:.1f} mp.")
+        print(f"✅ {changefeed.prune(db)} régi változásnapló-sor törölve.")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+# tools/backfill_address_keys.py
+"""
+Fill Bejelentes.cim_kulcs (the normalized address used by duplicate
+detection) for rows that were created before the column existed.
+
+Usage:
+  python tools/ensure_indexes.py      # adds the column + index first
+  python tools/backfill_address_keys.py
+"""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path so "import app.*" works reliably
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.database import SessionLocal
+from app.duplicates import backfill_address_keys
+
+
+def main():
+    db = SessionLocal()
+    try:
+        n = backfill_address_keys(db)
+        print(f"✅ {n} bejelentés címkulcsa kitöltve.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# tools/backfill_geohash.py
+"""
+Fill Bejelentes.geohash for rows that have coordinates but no geohash yet
+(rows created before the spatial index existed).
+
+Usage:
+  python tools/ensure_indexes.py      # adds the geohash column + index first
+  python tools/backfill_geohash.py
+"""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path so "import app.*" works reliably
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.database import SessionLocal
+from app.geo import backfill_geohash
+
+
+def main():
+    db = SessionLocal()
+    try:
+        n = backfill_geohash(db)
+        print(f"✅ {n} bejelentés geohash-e kitöltve.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
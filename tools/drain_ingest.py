@@ -0,0 +1,40 @@
+# tools/drain_ingest.py
+"""
+Write every report still waiting in the ingestion spool (INGEST_MODE=queue)
+into the database, e.g. after a crash or before shutting the app down for
+maintenance. Safe to run while the app is running: batches are leased, and
+reports already written are recognised by their ingest token.
+
+Usage:
+  python tools/drain_ingest.py            # drain and print the queue status
+  python tools/drain_ingest.py --status   # only print the queue status
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path so "import app.*" works reliably
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import ingest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--status", action="store_true", help="csak az állapot kiírása")
+    args = parser.parse_args()
+
+    if not args.status:
+        n = ingest.drain_all()
+        print(f"✅ {n} tétel kivéve a spoolból ({ingest.SPOOL_PATH}).")
+
+    print(json.dumps(ingest.queue_stats(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+# tools/ensure_indexes.py
+"""
+Add missing tables, nullable columns and indexes to an existing database
+without touching data, then optionally verify with EXPLAIN that every
+dashboard filter combination is served by an index.
+
+Usage:
+  python tools/ensure_indexes.py
+  python tools/ensure_indexes.py --explain
+  python tools/ensure_indexes.py --explain --verbose
+
+Exit code is 1 if --explain finds a filter combination that scans the table.
+"""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path so "import app.*" works reliably
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.database import engine
+from app.schema import ensure_schema, explain_dashboard_filters
+
+
+def main():
+    created = ensure_schema(engine)
+    if created:
+        for name in created:
+            print(f"✅ Létrehozva: {name}")
+    else:
+        print("Minden oszlop és index megvan.")
+
+    if "--explain" not in sys.argv:
+        return 0
+
+    verbose = "--verbose" in sys.argv
+    results = explain_dashboard_filters(engine)
+    if not results:
+        print(f"EXPLAIN ellenőrzés kihagyva: {engine.dialect.name} nem támogatott.")
+        return 0
+    hibas = 0
+    for r in results:
+        szurok = ", ".join(f"{k}={v!r}" for k, v in r["szurok"].items() if v) or "(nincs szűrő)"
+        jel = "✅" if r["uses_index"] else "❌"
+        print(f"{jel} {szurok}")
+        if verbose or not r["uses_index"]:
+            print("   " + r["plan"].strip().replace("\n", "\n   "))
+        if not r["uses_index"]:
+            hibas += 1
+
+    if hibas:
+        print(f"❌ {hibas} szűrő-kombináció teljes táblaolvasást használ.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
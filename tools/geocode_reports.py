@@ -0,0 +1,75 @@
+# tools/geocode_reports.py
+"""
+Offline geocoding of address-only reports against the local gazetteer
+(app/geocode.py). No external service is called.
+
+Usage:
+  python tools/ensure_indexes.py                       # Cimjegyzek, GeokodCache, Bejelentes.geokod
+  python tools/geocode_reports.py --load cimjegyzek.csv   # replace the gazetteer (clears the cache)
+  python tools/geocode_reports.py                      # backfill koord_szel / koord_hossz
+  python tools/geocode_reports.py --status
+
+The gazetteer CSV has the columns telepules, utca, hazszam, lat, lng
+("," or ";" separated, header row first). The backfill commits per batch,
+so it can be interrupted and re-run; rows the gazetteer cannot resolve
+(at GEOKOD_MIN_PONTOSSAG precision) keep their NULL coordinates, and their
+negative result is cached until the next --load.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path so "import app.*" works reliably
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import geocode
+from app.database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Címmel beküldött bejelentések geokódolása.")
+    parser.add_argument("--load", metavar="CSV", help="a címjegyzék betöltése (a régi helyére)")
+    parser.add_argument("--status", action="store_true", help="csak az állapot kiírása")
+    parser.add_argument("--batch-size", type=int, default=geocode.BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.load:
+            started = time.perf_counter()
+            try:
+                n = geocode.load_gazetteer(
+                    db, args.load, log=lambda n: print(f"  {n} sor...", end="\r", flush=True)
+                )
+            except (OSError, ValueError) as e:
+                db.rollback()
+                print(f"❌ A címjegyzék nem tölthető be: {e}", file=sys.stderr)
+                return 1
+            print(f"✅ {n} címjegyzék sor betöltve ({time.perf_counter() - started:.1f} s).")
+            return 0
+
+        if args.status:
+            print(json.dumps(geocode.status(db), ensure_ascii=False, indent=2))
+            return 0
+
+        started = time.perf_counter()
+        seen, filled = geocode.backfill(
+            db,
+            batch_size=args.batch_size,
+            log=lambda seen, filled: print(f"  {seen} vizsgálva, {filled} kitöltve...", end="\r", flush=True),
+        )
+        elapsed = time.perf_counter() - started
+        rate = seen / elapsed if elapsed > 0 else 0
+        print(f"✅ {filled} / {seen} bejelentés koordinátája kitöltve ({elapsed:.1f} s, {rate:.0f} cím/s).")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
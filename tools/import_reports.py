@@ -0,0 +1,123 @@
+# tools/import_reports.py
+"""
+Bulk import of historical reports (and their photos) from CSV or JSONL
+(app/importer.py). The columns are those of tools/export_reports.py, so an
+export can be imported as-is; "foto" may point to a local photo file.
+
+Usage:
+  python tools/import_reports.py regi.csv --foto-dir /mnt/regi/fotok
+  python tools/import_reports.py regi.jsonl --batch-size 10000 --workers 8
+  python tools/import_reports.py regi.csv --no-derivatives   # derivatives later: tools/process_images.py
+
+Every committed batch is recorded in <source>.checkpoint.json; running the
+same command again after an interruption (Ctrl+C, crash) continues from the
+next record. --restart ignores the checkpoint and clears the rejects file;
+records that were already imported are still skipped (their ingest_token is
+derived from the source name and the record number). Invalid records go to
+<source>.rejected.jsonl with the reason.
+
+Rows are written with executemany, or with COPY on PostgreSQL (psycopg2).
+After each batch, duplicates are linked to earlier open reports (the same rules
+as on submission). The source should be in date order for the best results.
+DUPLIKATUM_KERESES=off skips this step.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path so "import app.*" works reliably
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import importer
+from app.database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Régi bejelentések tömeges betöltése.")
+    parser.add_argument("source", help="CSV vagy JSONL fájl")
+    parser.add_argument("--format", choices=importer.FORMATS, help="alapértelmezés: a kiterjesztés szerint")
+    parser.add_argument("--batch-size", type=int, default=importer.BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="fotó feldolgozó folyamatok")
+    parser.add_argument("--foto-dir", help="a relatív fotó útvonalak alapkönyvtára")
+    parser.add_argument("--no-derivatives", action="store_true",
+                        help="csak a fotók másolása (származékok: tools/process_images.py)")
+    parser.add_argument("--no-copy", action="store_true", help="PostgreSQL-en is executemany COPY helyett")
+    parser.add_argument("--source-id", help="a forrás azonosítója az ingest_token-ekhez (alapértelmezés: a fájlnév)")
+    parser.add_argument("--checkpoint", help="alapértelmezés: <forrás>.checkpoint.json")
+    parser.add_argument("--rejects", help="alapértelmezés: <forrás>.rejected.jsonl")
+    parser.add_argument("--restart", action="store_true", help="a checkpoint figyelmen kívül hagyása")
+    args = parser.parse_args()
+
+    checkpoint = args.checkpoint or f"{args.source}.checkpoint.json"
+    rejects = args.rejects or f"{args.source}.rejected.jsonl"
+    if args.restart:
+        for path in (checkpoint, rejects):
+            if os.path.exists(path):
+                os.remove(path)
+
+    db = SessionLocal()
+    try:
+        try:
+            job = importer.Importer(
+                db,
+                importer.Source(args.source, args.format),
+                checkpoint,
+                rejects,
+                source_id=args.source_id,
+                batch_size=args.batch_size,
+                foto_dir=args.foto_dir,
+                workers=args.workers,
+                derivatives=not args.no_derivatives,
+                use_copy=False if args.no_copy else None,
+            )
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+
+        start = dict(job.state)
+        if start["rekord"]:
+            print(f"Folytatás a(z) {start['rekord'] + 1}. rekordtól ({checkpoint}).")
+        started = time.perf_counter()
+
+        def progress(state):
+            elapsed = time.perf_counter() - started
+            done = state["rekord"] - start["rekord"]
+            print(
+                f"  {state['rekord']} rekord, {state['beirt']} beírva, {state['elutasitott']} elutasítva"
+                f" ({done / elapsed:.0f} rekord/s)",
+                end="\r", flush=True,
+            )
+
+        try:
+            state = job.run(progress)
+        except KeyboardInterrupt:
+            db.rollback()
+            print(f"\n❌ Megszakítva; folytatás ugyanezzel a paranccsal ({checkpoint}).", file=sys.stderr)
+            return 130
+
+        elapsed = time.perf_counter() - started
+        records = state["rekord"] - start["rekord"]
+        inserted = state["beirt"] - start["beirt"]
+        print()
+        print(
+            f"✅ {records} rekord feldolgozva {elapsed:.1f} s alatt "
+            f"({records / elapsed if elapsed > 0 else 0:.0f} rekord/s, "
+            f"{inserted / elapsed if elapsed > 0 else 0:.0f} beírt sor/s)."
+        )
+        print(f"   beírva: {inserted}, már megvolt: {state['mar_megvolt'] - start['mar_megvolt']}, "
+              f"elutasítva: {state['elutasitott'] - start['elutasitott']}, "
+              f"fotó hiba: {state['foto_hibak'] - start['foto_hibak']}")
+        if state["elutasitott"] > start["elutasitott"] or state["foto_hibak"] > start["foto_hibak"]:
+            print(f"   a hibás rekordok: {rejects}")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+# tools/process_images.py
+"""
+Create thumbnails / WebP / AVIF derivatives and strip metadata for every
+uploaded photo that has not been processed yet (e.g. uploads from before the
+image pipeline existed, or ones whose background job was lost on restart).
+
+Usage:
+  python tools/ensure_indexes.py      # adds the derivative columns first
+  python tools/process_images.py
+
+Requires Pillow.
+"""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path so "import app.*" works reliably
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import images
+from app.database import SessionLocal
+
+
+def main():
+    if images.Image is None:
+        print("❌ A Pillow nincs telepítve (pip install Pillow).")
+        return 1
+
+    db = SessionLocal()
+    try:
+        n = images.process_pending(db)
+        print(f"✅ {n} fotó feldolgozva.")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
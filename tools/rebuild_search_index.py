@@ -0,0 +1,33 @@
+# tools/rebuild_search_index.py
+"""
+Rebuild the full-text search data (Bejelentes.kereso_szoveg and, outside
+PostgreSQL, the KeresesiIndex table) for every report.
+
+Usage:
+  python tools/ensure_indexes.py      # adds the search column / table / indexes first
+  python tools/rebuild_search_index.py
+"""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path so "import app.*" works reliably
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.database import SessionLocal
+from app.search import rebuild_index
+
+
+def main():
+    db = SessionLocal()
+    try:
+        n = rebuild_index(db)
+        print(f"✅ {n} bejelentés újraindexelve.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# tools/rebuild_statistics.py
+"""
+Recompute the Statisztika summary table from Bejelentes (after an import,
+or if the counters ever drift). Creates the table first if it is missing.
+
+Run it while no reports are being created or updated: writes that happen
+during the rebuild may be counted twice or not at all.
+
+Usage:
+  python tools/rebuild_statistics.py
+"""
+
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path so "import app.*" works reliably
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import stats
+from app.database import SessionLocal, engine
+from app.schema import ensure_schema
+
+
+def main():
+    ensure_schema(engine)
+    db = SessionLocal()
+    try:
+        n = stats.rebuild(db)
+        print(f"✅ Statisztika újraszámolva ({n} kombináció).")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
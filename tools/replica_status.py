@@ -0,0 +1,88 @@
+# tools/replica_status.py
+"""
+Show the health of the read replicas configured in DATABASE_REPLICA_URLS
+(reachability, replication lag on PostgreSQL) as JSON.
+
+For local testing with two SQLite databases there is no real replication;
+--sync copies the primary into every SQLite replica (sqlite3 backup API),
+so reads routed to the replica see the primary's state as of the copy:
+
+  export DATABASE_URL=sqlite:///primary.db
+  export DATABASE_REPLICA_URLS=sqlite:///replica.db
+  python tools/replica_status.py --sync          # one copy
+  python tools/replica_status.py --sync --every 5   # "replicate" every 5 s
+
+Between copies the replica lags behind, which is what the read-your-writes
+stickiness (REPLICA_STICKY_S) and the cache guard (REPLICA_MAX_LAG_S) are for.
+Removing or corrupting replica.db shows the fallback to the primary.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path so "import app.*" works reliably
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import replica
+from app.database import engine
+
+
+def sync_sqlite() -> int:
+    if engine.dialect.name != "sqlite":
+        print("❌ A --sync csak SQLite elsődleges adatbázissal működik.", file=sys.stderr)
+        return 0
+    copied = 0
+    src = sqlite3.connect(engine.url.database)
+    try:
+        for r in replica.replicas:
+            if r.engine.dialect.name != "sqlite":
+                continue
+            r.engine.dispose()
+            dst = sqlite3.connect(r.engine.url.database)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+            copied += 1
+    finally:
+        src.close()
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Olvasási replikák állapota.")
+    parser.add_argument("--sync", action="store_true",
+                        help="SQLite: az elsődleges átmásolása a replikákba")
+    parser.add_argument("--every", type=float, default=0,
+                        help="--sync ismétlése ennyi másodpercenként (Ctrl+C: leállítás)")
+    args = parser.parse_args()
+
+    if not replica.replicas:
+        print("❌ Nincs replika beállítva (DATABASE_REPLICA_URLS).", file=sys.stderr)
+        return 1
+
+    if args.sync:
+        while True:
+            n = sync_sqlite()
+            print(f"✅ {n} replika frissítve ({time.strftime('%H:%M:%S')}).")
+            if args.every <= 0:
+                break
+            try:
+                time.sleep(args.every)
+            except KeyboardInterrupt:
+                break
+
+    for r in replica.replicas:
+        r.check()
+    print(json.dumps(replica.status(), ensure_ascii=False, indent=2))
+    return 0 if all(r.healthy for r in replica.replicas) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())